@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from quizzes.signals import connect_answer_key_signals
+        from .models import Option, Question, Quiz
+        connect_answer_key_signals(Quiz, Question, Option)
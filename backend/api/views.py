@@ -8,7 +8,6 @@ from .serializers import (
     UserSerializer, CourseSerializer, QuizSerializer, QuestionSerializer,
     OptionSerializer, UserCourseSerializer, CertificateSerializer, QuizAttemptSerializer
 )
-import googleapiclient.discovery
 from youtube_transcript_api import YouTubeTranscriptApi
 import openai
 import uuid
@@ -22,27 +21,17 @@ import json
 from django.http import JsonResponse
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
+from courses.services.youtube_metadata import youtube_metadata
+from courses.services.youtube_service import get_youtube_service
+from quizzes.services.quiz_builder import create_quiz
+from quizzes.services.quiz_generation import parse_numbered_quiz
+from quizzes.services.scoring import score_submission
 
 # Initialize Firebase Admin SDK if not already initialized
 if not firebase_admin._apps:
     cred = credentials.Certificate("serviceAccountKey.json")
     firebase_admin.initialize_app(cred)
 
-# YouTube API service
-def get_youtube_service():
-    api_key = os.environ.get('YOUTUBE_API_KEY')
-    if not api_key:
-        print("WARNING: YOUTUBE_API_KEY environment variable is not set")
-        return None
-    
-    try:
-        return googleapiclient.discovery.build(
-            "youtube", "v3", developerKey=api_key
-        )
-    except Exception as e:
-        print(f"Error creating YouTube service: {e}")
-        return None
-
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def firebase_auth(request):
@@ -158,17 +147,14 @@ class CourseViewSet(viewsets.ModelViewSet):
                 )
                 response = request.execute()
                 
+                # Get video durations and statistics in one batched lookup
+                details = youtube_metadata.videos([item['id']['videoId'] for item in response.get('items', [])])
+                
                 for item in response.get('items', []):
                     video_id = item['id']['videoId']
                     snippet = item['snippet']
                     
-                    # Get video duration and statistics
-                    video_request = youtube.videos().list(
-                        part="contentDetails,statistics",
-                        id=video_id
-                    )
-                    video_response = video_request.execute()
-                    video_details = video_response.get('items', [{}])[0] if video_response.get('items') else {}
+                    video_details = details.get(video_id, {})
                     content_details = video_details.get('contentDetails', {})
                     statistics = video_details.get('statistics', {})
                     
@@ -242,23 +228,11 @@ class CourseViewSet(viewsets.ModelViewSet):
             
             # Get video/playlist title and description
             if course.is_playlist:
-                playlist_request = youtube.playlists().list(
-                    part="snippet",
-                    id=course.youtube_id
-                )
-                playlist_response = playlist_request.execute()
-                playlist_data = playlist_response['items'][0]['snippet']
-                title = playlist_data['title']
-                description = playlist_data['description']
+                resource = youtube_metadata.playlist(course.youtube_id)
             else:
-                video_request = youtube.videos().list(
-                    part="snippet",
-                    id=course.youtube_id
-                )
-                video_response = video_request.execute()
-                video_data = video_response['items'][0]['snippet']
-                title = video_data['title']
-                description = video_data['description']
+                resource = youtube_metadata.video(course.youtube_id)
+            title = resource['snippet']['title']
+            description = resource['snippet']['description']
             
             # Get OpenAI API key from environment variable
             openai.api_key = os.environ.get('OPENAI_API_KEY')
@@ -268,8 +242,8 @@ class CourseViewSet(viewsets.ModelViewSet):
             difficulty_levels = ['basic', 'intermediate', 'advanced']
             questions_per_level = 5
             
-            # Create a new quiz for this course
-            quiz = Quiz.objects.create(course=course)
+            # Collect the questions, then save the quiz in one go
+            questions = []
             
             for difficulty in difficulty_levels:
                 prompt = f"""
@@ -316,71 +290,13 @@ class CourseViewSet(viewsets.ModelViewSet):
                     
                     # Process the generated questions
                     generated_text = response.choices[0].message['content']
-                    
-                    # Parse the generated questions
-                    lines = generated_text.strip().split('\n')
-                    
-                    current_question = None
-                    options = []
-                    correct_option = None
-                    
-                    for line in lines:
-                        line = line.strip()
-                        
-                        if not line:
-                            continue
-                        
-                        # Check if this is a question line (starts with a number and a dot)
-                        if line[0].isdigit() and '.' in line[:3]:
-                            # Save the previous question if exists
-                            if current_question and options:
-                                question = Question.objects.create(
-                                    quiz=quiz,
-                                    text=current_question,
-                                    difficulty=difficulty
-                                )
-                                
-                                for i, option_text in enumerate(options):
-                                    Option.objects.create(
-                                        question=question,
-                                        text=option_text,
-                                        is_correct=(i == correct_option)
-                                    )
-                            
-                            # Start a new question
-                            current_question = line.split('.', 1)[1].strip()
-                            options = []
-                            correct_option = None
-                        
-                        # Check if this is an option line
-                        elif line and line[0] in "ABCD" and line[1] in [")", "."]:
-                            option_text = line[2:].strip()
-                            
-                            # Check if this is the correct option
-                            if "(correct)" in option_text.lower():
-                                correct_option = len(options)
-                                option_text = option_text.replace("(correct)", "").replace("(Correct)", "").strip()
-                            
-                            options.append(option_text)
-                    
-                    # Save the last question if exists
-                    if current_question and options:
-                        question = Question.objects.create(
-                            quiz=quiz,
-                            text=current_question,
-                            difficulty=difficulty
-                        )
-                        
-                        for i, option_text in enumerate(options):
-                            Option.objects.create(
-                                question=question,
-                                text=option_text,
-                                is_correct=(i == correct_option)
-                            )
+                    questions.extend(parse_numbered_quiz(generated_text, difficulty))
                 
                 except Exception as e:
                     return Response({"error": f"OpenAI API error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
+            quiz = create_quiz(course, questions, quiz_model=Quiz)
+            
             return Response({"message": "Quiz generated successfully", "quiz_id": quiz.id}, status=status.HTTP_201_CREATED)
         
         except Exception as e:
@@ -396,27 +312,8 @@ class QuizViewSet(viewsets.ModelViewSet):
         user = request.user
         answers = request.data.get('answers', [])
         
-        correct_count = 0
-        total_questions = quiz.questions.count()
-        
-        for answer in answers:
-            question_id = answer.get('question_id')
-            selected_option_id = answer.get('option_id')
-            
-            try:
-                question = Question.objects.get(id=question_id, quiz=quiz)
-                if Option.objects.get(id=selected_option_id, question=question).is_correct:
-                    correct_count += 1
-            except (Question.DoesNotExist, Option.DoesNotExist):
-                continue
-        
-        if total_questions > 0:
-            score = (correct_count / total_questions) * 100
-        else:
-            score = 0
-            
-        # Pass if score is 70% or higher
-        passed = score >= 70
+        # Score the whole submission against the quiz's answer key
+        score, passed, correct_count, total_questions = score_submission(quiz, answers)
         
         # Create quiz attempt
         attempt = QuizAttempt.objects.create(
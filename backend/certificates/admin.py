@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Certificate
+
+
+@admin.register(Certificate)
+class CertificateAdmin(admin.ModelAdmin):
+    list_display = ['certificate_id', 'user', 'course', 'render_status', 'upload_status', 'pin_status', 'created_at']
+    list_filter = ['render_status', 'upload_status', 'pin_status', 'is_valid']
+    search_fields = ['certificate_id', 'user__username', 'course__title']
+    list_select_related = ['user', 'course']
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from certificates.services.batch import issue_certificates, outstanding_certificates, uncertified_completions
+
+
+class Command(BaseCommand):
+    help = (
+        "Issue certificates to every user who passed a course's quiz but has none for it, "
+        "and finish any issuance left outstanding by an earlier run"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='course_ids', help='Only this course ID (repeatable)')
+        parser.add_argument('--limit', type=int, help='Issue at most this many certificates; run again to continue')
+        parser.add_argument('--render-processes', type=int, help='Processes rendering PDFs (default: one per core)')
+        parser.add_argument('--upload-concurrency', type=int, help='Uploads running at the same time')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be issued')
+
+    def handle(self, *args, **options):
+        course_ids = options['course_ids']
+
+        if options['dry_run']:
+            missing = len(uncertified_completions(course_ids))
+            outstanding = outstanding_certificates(course_ids).count()
+            self.stdout.write(f"{missing} certificates to create, {outstanding} existing certificates outstanding")
+            return
+
+        def progress(done, total):
+            if done == total or done % 50 == 0:
+                self.stdout.write(f"{done}/{total} certificates processed")
+
+        stats = issue_certificates(
+            course_ids=course_ids,
+            limit=options['limit'],
+            render_processes=options['render_processes'],
+            upload_concurrency=options['upload_concurrency'],
+            progress=progress
+        )
+
+        self.stdout.write(
+            f"Created {stats['created']} certificates; issued {stats['issued']} of {stats['queued']} "
+            f"({stats['failed']} failed) in {stats['elapsed_seconds']}s "
+            f"(rendering took {stats['render_seconds']}s, {stats['per_second']} certificates/s)"
+        )
+        if stats['failed']:
+            self.stdout.write(self.style.WARNING('Run the command again to retry failed certificates'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:55
+
+from django.db import migrations, models
+
+
+def mark_existing_certificates(apps, schema_editor):
+    """
+    Certificates issued before the pipeline were rendered and uploaded inline
+    """
+    Certificate = apps.get_model('certificates', 'Certificate')
+    Certificate.objects.update(render_status='succeeded')
+    Certificate.objects.exclude(pdf_url__isnull=True).exclude(pdf_url='').update(upload_status='succeeded')
+    Certificate.objects.filter(pdf_url__isnull=True).update(upload_status='failed')
+    Certificate.objects.filter(pdf_url='').update(upload_status='failed')
+    Certificate.objects.exclude(ipfs_hash__isnull=True).exclude(ipfs_hash='').update(pin_status='succeeded')
+    Certificate.objects.filter(pin_status='pending').update(pin_status='skipped')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0002_certificate_is_dynamic_certificate_last_updated_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='artifact_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='artifact_error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='artifact_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='pin_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('skipped', 'Skipped')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='render_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('skipped', 'Skipped')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='upload_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('skipped', 'Skipped')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_certificates, migrations.RunPython.noop),
+    ]
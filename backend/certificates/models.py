@@ -7,6 +7,20 @@ class Certificate(TimeStampedModel):
     """
     Certificate model for course completion with support for dynamic updates
     """
+    STAGE_PENDING = 'pending'
+    STAGE_RUNNING = 'running'
+    STAGE_SUCCEEDED = 'succeeded'
+    STAGE_FAILED = 'failed'
+    STAGE_SKIPPED = 'skipped'
+    STAGE_STATUS_CHOICES = [
+        (STAGE_PENDING, 'Pending'),
+        (STAGE_RUNNING, 'Running'),
+        (STAGE_SUCCEEDED, 'Succeeded'),
+        (STAGE_FAILED, 'Failed'),
+        (STAGE_SKIPPED, 'Skipped'),
+    ]
+    DONE_STATUSES = [STAGE_SUCCEEDED, STAGE_SKIPPED]
+    
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='user_certificates')
     # For dynamic certificates, this can be the main/first course, but we'll track all courses in related model
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='course_certificates')
@@ -19,9 +33,30 @@ class Certificate(TimeStampedModel):
     is_dynamic = models.BooleanField(default=True)  # Whether this is a dynamic certificate
     last_updated = models.DateTimeField(auto_now=True)  # When the certificate was last updated
     metadata = models.JSONField(default=dict, blank=True)  # Additional metadata for dynamic certificates
+    # Background issuance pipeline (render -> upload -> pin)
+    render_status = models.CharField(max_length=20, choices=STAGE_STATUS_CHOICES, default=STAGE_PENDING)
+    upload_status = models.CharField(max_length=20, choices=STAGE_STATUS_CHOICES, default=STAGE_PENDING)
+    pin_status = models.CharField(max_length=20, choices=STAGE_STATUS_CHOICES, default=STAGE_PENDING)
+    artifact_attempts = models.PositiveIntegerField(default=0)  # Stage attempts made by the current run
+    artifact_error = models.TextField(blank=True, null=True)  # Last stage error, if any
+    artifact_version = models.PositiveIntegerField(default=0)  # Bumped whenever the PDF has to be re-issued
     
     def __str__(self):
         return f"{self.user.username}'s {self.course.title} certificate"
+    
+    @property
+    def artifact_status(self):
+        """
+        Overall state of the PDF: pending, ready or failed.
+
+        Pinning is optional, so a failed pin still leaves the PDF ready.
+        """
+        stages = [self.render_status, self.upload_status]
+        if self.STAGE_FAILED in stages:
+            return 'failed'
+        if all(stage in self.DONE_STATUSES for stage in stages):
+            return 'ready'
+        return 'pending'
 
 class CertificateCourse(models.Model):
     """
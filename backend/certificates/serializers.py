@@ -2,6 +2,7 @@ from rest_framework import serializers
 from .models import Certificate, CertificateVerification, CertificateCourse
 from courses.serializers import CourseSerializer
 from django.contrib.auth.models import User
+from django.db.models import Count, Max, Q
 import uuid
 
 class CertificateVerificationSerializer(serializers.ModelSerializer):
@@ -38,20 +39,23 @@ class CertificateSerializer(serializers.ModelSerializer):
     course_details = CourseSerializer(source='course', read_only=True)
     username = serializers.CharField(source='user.username', read_only=True)
     user_fullname = serializers.SerializerMethodField(read_only=True)
-    verifications = CertificateVerificationSerializer(many=True, read_only=True)
+    verification_summary = serializers.SerializerMethodField(read_only=True)
     certificate_courses = CertificateCourseSerializer(many=True, read_only=True)
     course_count = serializers.SerializerMethodField(read_only=True)
+    artifact_status = serializers.CharField(read_only=True)
     
     class Meta:
         model = Certificate
         fields = [
             'id', 'user', 'username', 'user_fullname', 'course', 'course_details', 
             'certificate_id', 'pdf_url', 'ipfs_hash', 'blockchain_tx', 'nft_token_id',
-            'is_valid', 'verifications', 'created_at', 'updated_at', 'is_dynamic',
-            'last_updated', 'metadata', 'certificate_courses', 'course_count'
+            'is_valid', 'verification_summary', 'created_at', 'updated_at', 'is_dynamic',
+            'last_updated', 'metadata', 'certificate_courses', 'course_count',
+            'artifact_status', 'render_status', 'upload_status', 'pin_status', 'artifact_error'
         ]
         read_only_fields = ['id', 'certificate_id', 'ipfs_hash', 'blockchain_tx', 'nft_token_id', 
-                           'created_at', 'updated_at', 'last_updated']
+                           'created_at', 'updated_at', 'last_updated',
+                           'render_status', 'upload_status', 'pin_status', 'artifact_error']
     
     def get_user_fullname(self, obj):
         """
@@ -63,8 +67,38 @@ class CertificateSerializer(serializers.ModelSerializer):
         """
         Get the count of courses included in this certificate
         """
+        # Prefer the count annotated by the view, then prefetched courses
+        course_count = getattr(obj, 'course_count', None)
+        if course_count is not None:
+            return course_count
+        if 'certificate_courses' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len(obj.certificate_courses.all())
         return obj.certificate_courses.count()
     
+    def get_verification_summary(self, obj):
+        """
+        Summarize verification records instead of listing every one
+        """
+        if hasattr(obj, 'verification_count'):
+            total = obj.verification_count
+            valid = obj.valid_verification_count
+            last_verified_at = obj.last_verified_at
+        else:
+            summary = obj.verifications.aggregate(
+                total=Count('pk'),
+                valid=Count('pk', filter=Q(is_valid=True)),
+                last_verified_at=Max('created_at')
+            )
+            total = summary['total']
+            valid = summary['valid']
+            last_verified_at = summary['last_verified_at']
+        
+        return {
+            'count': total,
+            'valid_count': valid,
+            'last_verified_at': serializers.DateTimeField().to_representation(last_verified_at) if last_verified_at else None
+        }
+    
     def create(self, validated_data):
         """
         Set the certificate_id and user if not provided
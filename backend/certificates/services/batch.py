@@ -0,0 +1,222 @@
+"""
+Bulk certificate issuance for cohorts.
+
+``issue_certificates`` creates a certificate for every user who passed a
+course's quiz but has no certificate for that course. It then works through
+every certificate whose PDF is still outstanding. That includes certificates
+left behind by an interrupted earlier batch, so running it again resumes
+where the last run stopped.
+
+PDFs are rendered in a process pool, one process per core by default
+(``CERTIFICATE_BATCH_RENDER_PROCESSES``). Each rendered PDF goes straight to
+a bounded thread pool (``CERTIFICATE_BATCH_UPLOAD_CONCURRENCY``), which runs
+the upload and pin stages of ``CertificateIssuance``. New renders are only
+submitted while fewer than ``render processes + upload concurrency`` PDFs are
+in flight, so memory stays flat however large the cohort is.
+
+Batches started from the admin run one at a time on their own thread
+(``schedule_certificate_batch``) with ``CERTIFICATE_ADMIN_BATCH_RENDER_PROCESSES``
+render processes, so they never occupy the shared background pool.
+"""
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef
+
+from certificates.models import Certificate, CertificateCourse
+from core.singleflight import SingleFlight
+from core.tasks import BackgroundPool
+from quizzes.models import QuizAttempt
+
+from .issuance import CertificateIssuance, StaleIssuance, pending_stages
+from .render_process import init_render_process, render_in_process
+
+BATCH_SIZE = 500
+
+batch_pool = BackgroundPool('certificate-batches', 1)
+
+
+def uncertified_completions(course_ids=None):
+    """
+    ``(user_id, course_id)`` pairs with a passing quiz attempt but no certificate for the course
+    """
+    attempts = QuizAttempt.objects.filter(passed=True)
+    if course_ids:
+        attempts = attempts.filter(quiz__course_id__in=course_ids)
+    has_certificate = Certificate.objects.filter(user_id=OuterRef('user_id'), course_id=OuterRef('quiz__course_id'))
+    # Courses added to a dynamic certificate count as certified too
+    included = CertificateCourse.objects.filter(
+        certificate__user_id=OuterRef('user_id'), course_id=OuterRef('quiz__course_id')
+    )
+    return list(
+        attempts
+        .exclude(Exists(has_certificate))
+        .exclude(Exists(included))
+        .order_by()
+        .values_list('user_id', 'quiz__course_id')
+        .distinct()
+    )
+
+
+def create_missing_certificates(course_ids=None):
+    """
+    Insert a certificate (with every stage pending) for each uncertified completion
+    """
+    # Overlapping runs would each insert a certificate for the same completion,
+    # so they take turns; a later run only sees what the earlier one left
+    flight = SingleFlight('certificate-batch-create', ttl=getattr(settings, 'CERTIFICATE_BATCH_LOCK_TTL', 600))
+    while not flight.acquire():
+        flight.wait(flight.ttl)
+    try:
+        certificates = [
+            Certificate(user_id=user_id, course_id=course_id, certificate_id=uuid.uuid4().hex, is_valid=True)
+            for user_id, course_id in uncertified_completions(course_ids)
+        ]
+        Certificate.objects.bulk_create(certificates, batch_size=BATCH_SIZE)
+    finally:
+        flight.release()
+    return len(certificates)
+
+
+def outstanding_certificates(course_ids=None):
+    """
+    Certificates whose PDF hasn't been rendered and uploaded yet
+    """
+    certificates = Certificate.objects.exclude(
+        render_status__in=Certificate.DONE_STATUSES,
+        upload_status__in=Certificate.DONE_STATUSES
+    )
+    if course_ids:
+        certificates = certificates.filter(course_id__in=course_ids)
+    return certificates
+
+
+def claim_certificates(certificate_pks):
+    """
+    Take over issuance of certificates from any older run and return their new versions
+    """
+    versions = {}
+    for start in range(0, len(certificate_pks), BATCH_SIZE):
+        chunk = certificate_pks[start:start + BATCH_SIZE]
+        Certificate.objects.filter(pk__in=chunk).update(
+            artifact_version=F('artifact_version') + 1,
+            artifact_attempts=0,
+            artifact_error=None
+        )
+        versions.update(Certificate.objects.filter(pk__in=chunk).values_list('pk', 'artifact_version'))
+    return versions
+
+
+def finish_issuance(certificate_pk, version, pdf_bytes=None, render_error=None):
+    """
+    Record a batch render and run the remaining stages. Returns True once the PDF is uploaded.
+    """
+    certificate = Certificate.objects.select_related('user', 'course').filter(pk=certificate_pk).first()
+    if certificate is None:
+        return False
+
+    # The batch waits on its own upload pool, so retries back off in place
+    issuance = CertificateIssuance(certificate, version, pdf_bytes, retry_later=False)
+    try:
+        if render_error is not None:
+            issuance.update(render_status=Certificate.STAGE_FAILED, artifact_error=f"render: {render_error}")
+            return False
+        issuance.update(render_status=Certificate.STAGE_SUCCEEDED)
+        issuance.run(pending_stages(certificate))
+    except StaleIssuance:
+        print(f"Batch issuance of certificate {certificate.certificate_id} superseded by a newer run")
+        return False
+    return certificate.artifact_status == 'ready'
+
+
+def issue_certificates(course_ids=None, limit=None, render_processes=None, upload_concurrency=None, progress=None):
+    """
+    Create missing certificates and issue every outstanding one.
+
+    ``progress(done, total)`` is called as certificates finish. Returns a dict
+    with counts and timings.
+    """
+    started = time.monotonic()
+    created = create_missing_certificates(course_ids)
+
+    certificate_pks = list(outstanding_certificates(course_ids).order_by('pk').values_list('pk', flat=True))
+    if limit:
+        certificate_pks = certificate_pks[:limit]
+    versions = claim_certificates(certificate_pks)
+
+    render_processes = render_processes or getattr(settings, 'CERTIFICATE_BATCH_RENDER_PROCESSES', None) or os.cpu_count() or 1
+    upload_concurrency = upload_concurrency or getattr(settings, 'CERTIFICATE_BATCH_UPLOAD_CONCURRENCY', 8)
+
+    stats = {'created': created, 'queued': len(certificate_pks), 'issued': 0, 'failed': 0}
+    upload_pool = BackgroundPool('certificate-batch', upload_concurrency)
+    # PDFs rendering or waiting to upload; bounded so a cohort's PDFs are never all in memory at once
+    window = render_processes + upload_concurrency
+    pending_pks = iter(certificate_pks)
+    renders = {}
+    uploads = set()
+    rendered_at = started
+    try:
+        if certificate_pks:
+            # Spawned rather than forked, so workers don't inherit locks or
+            # database connections from the threads of a running server
+            with ProcessPoolExecutor(
+                max_workers=min(render_processes, len(certificate_pks)),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_render_process
+            ) as renderers:
+                while True:
+                    while len(renders) + len(uploads) < window:
+                        pk = next(pending_pks, None)
+                        if pk is None:
+                            break
+                        renders[renderers.submit(render_in_process, pk)] = pk
+                    if not renders and not uploads:
+                        break
+
+                    done, _ = wait([*renders, *uploads], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future in uploads:
+                            uploads.discard(future)
+                            if future.exception() is None and future.result():
+                                stats['issued'] += 1
+                            else:
+                                stats['failed'] += 1
+                            if progress:
+                                progress(stats['issued'] + stats['failed'], stats['queued'])
+                            continue
+
+                        # Dropping the render future releases its PDF once the upload is done with it
+                        pk = renders.pop(future)
+                        rendered_at = time.monotonic()
+                        error = future.exception()
+                        if error is not None:
+                            print(f"Batch render of certificate {pk} failed: {str(error)}")
+                            uploads.add(upload_pool.submit(finish_issuance, pk, versions[pk], render_error=str(error)))
+                        else:
+                            uploads.add(upload_pool.submit(finish_issuance, pk, versions[pk], future.result()))
+    finally:
+        upload_pool.shutdown()
+
+    elapsed = time.monotonic() - started
+    stats.update({
+        'render_seconds': round(rendered_at - started, 2),
+        'elapsed_seconds': round(elapsed, 2),
+        'per_second': round(stats['issued'] / elapsed, 2) if elapsed else 0.0,
+    })
+    print(f"Certificate batch finished: {stats}")
+    return stats
+
+
+def schedule_certificate_batch(course_ids=None):
+    """
+    Issue outstanding certificates on the dedicated batch thread with a small, fixed number of render processes
+    """
+    return batch_pool.submit(
+        issue_certificates,
+        course_ids=course_ids,
+        render_processes=getattr(settings, 'CERTIFICATE_ADMIN_BATCH_RENDER_PROCESSES', 2)
+    )
@@ -0,0 +1,221 @@
+"""
+Background certificate issuance.
+
+Creating a certificate only inserts the row; its PDF is produced afterwards
+by ``run_certificate_issuance`` on a local worker pool, in three stages:
+
+1. render  - draw the PDF (through the render cache)
+2. upload  - Cloudinary, falling back to local media storage once retries
+              run out (or straight away when Cloudinary isn't configured)
+3. pin     - pin the PDF to IPFS through Pinata (skipped when not configured)
+
+Each stage records its status on the certificate and is retried with
+exponential backoff (``CERTIFICATE_STAGE_RETRIES``,
+``CERTIFICATE_STAGE_RETRY_DELAY``). A failed stage doesn't wait on its
+worker: the stage goes back to pending and a timer re-submits the run to the
+pool once the backoff has passed. Every enqueue bumps
+``artifact_version``; a run only writes its results while its version is
+still current, so a newer request (e.g. a course added to the certificate)
+always wins over an older run that finishes later.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from certificates.models import Certificate
+from core.tasks import BackgroundPool
+
+from .publishing import (
+    cloudinary_configured, pin_to_ipfs, pinata_configured, save_to_local_storage, upload_to_cloudinary
+)
+from .pdf_cache import get_certificate_pdf
+
+STAGE_RENDER = 'render'
+STAGE_UPLOAD = 'upload'
+STAGE_PIN = 'pin'
+STAGES = [STAGE_RENDER, STAGE_UPLOAD, STAGE_PIN]
+
+certificate_pool = BackgroundPool('certificates', getattr(settings, 'CERTIFICATE_WORKERS', 2))
+
+
+class StaleIssuance(Exception):
+    """
+    Raised when a newer issuance superseded the running one
+    """
+
+
+class UploadFailed(Exception):
+    """
+    Raised to retry an upload before falling back to local storage
+    """
+
+
+def enqueue_certificate_issuance(certificate, stages=STAGES):
+    """
+    Mark ``stages`` pending and issue them in the background once the transaction commits
+    """
+    updates = {f'{stage}_status': Certificate.STAGE_PENDING for stage in stages}
+    Certificate.objects.filter(pk=certificate.pk).update(
+        artifact_version=F('artifact_version') + 1,
+        artifact_attempts=0,
+        artifact_error=None,
+        **updates
+    )
+    certificate.refresh_from_db(fields=['artifact_version', 'artifact_attempts', 'artifact_error'] + list(updates))
+    schedule_certificate_issuance(certificate)
+
+
+def schedule_certificate_issuance(certificate):
+    """
+    Run a certificate's pending stages in the background once the transaction commits.
+
+    New certificates start with every stage pending, so they only need this.
+    """
+    certificate_pk, version = certificate.pk, certificate.artifact_version
+    transaction.on_commit(lambda: certificate_pool.submit(run_certificate_issuance, certificate_pk, version))
+
+
+def pending_stages(certificate):
+    return [stage for stage in STAGES if getattr(certificate, f'{stage}_status') not in Certificate.DONE_STATUSES]
+
+
+def schedule_stage_retry(certificate_pk, version, stage, attempt, delay):
+    """
+    Re-submit a run to the pool after ``delay`` seconds, resuming ``stage`` at ``attempt``
+    """
+    timer = threading.Timer(
+        delay, certificate_pool.submit,
+        args=(run_certificate_issuance, certificate_pk, version),
+        kwargs={'attempts': {stage: attempt}}
+    )
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+def run_certificate_issuance(certificate_pk, version=None, attempts=None):
+    """
+    Run the outstanding stages for a certificate on a worker thread.
+
+    ``attempts`` maps a stage to the attempt it resumes at when a retry re-submits the run.
+    """
+    certificate = Certificate.objects.select_related('user', 'course').filter(pk=certificate_pk).first()
+    if certificate is None:
+        return None
+    if version is None:
+        version = certificate.artifact_version
+    elif certificate.artifact_version != version:
+        # A newer run was queued after this one
+        return None
+
+    stages = pending_stages(certificate)
+    if not stages:
+        return certificate
+
+    issuance = CertificateIssuance(certificate, version, attempts=attempts)
+    try:
+        issuance.run(stages)
+    except StaleIssuance:
+        print(f"Issuance of certificate {certificate.certificate_id} superseded by a newer run")
+        return None
+    return certificate
+
+
+class CertificateIssuance:
+    """
+    One run of the render -> upload -> pin pipeline for a certificate.
+
+    With ``retry_later`` a failed stage is handed to ``schedule_stage_retry``
+    and the run stops; otherwise it sleeps through the backoff (batches, which
+    wait on their own upload pool).
+    """
+
+    def __init__(self, certificate, version, pdf_bytes=None, attempts=None, retry_later=True):
+        self.certificate = certificate
+        self.version = version
+        self.pdf_bytes = pdf_bytes
+        self.attempts = attempts or {}
+        self.retry_later = retry_later
+
+    def run(self, stages):
+        # Uploading and pinning need the PDF, so it's rendered whenever either is
+        # outstanding (unless the caller rendered it already, as batches do)
+        if self.pdf_bytes is None and not self.stage(STAGE_RENDER, self.render):
+            return
+        if STAGE_UPLOAD in stages and not self.stage(STAGE_UPLOAD, self.upload):
+            # Nothing to pin without an uploaded PDF
+            return
+        if STAGE_PIN in stages:
+            if pinata_configured():
+                self.stage(STAGE_PIN, self.pin)
+            else:
+                self.update(pin_status=Certificate.STAGE_SKIPPED)
+
+    def stage(self, name, work):
+        """
+        Run one stage with retries and record its status. Returns True on success
+        (False on failure or when a retry was scheduled).
+        """
+        retries = getattr(settings, 'CERTIFICATE_STAGE_RETRIES', 3)
+        delay = getattr(settings, 'CERTIFICATE_STAGE_RETRY_DELAY', 2)
+        status_field = f'{name}_status'
+
+        self.update(**{status_field: Certificate.STAGE_RUNNING})
+        for attempt in range(self.attempts.get(name, 0), retries + 1):
+            self.update(artifact_attempts=F('artifact_attempts') + 1)
+            try:
+                fields = work(last_attempt=attempt == retries) or {}
+            except StaleIssuance:
+                raise
+            except Exception as e:
+                print(f"Certificate {self.certificate.certificate_id} {name} attempt {attempt + 1} failed: {str(e)}")
+                error = f"{name}: {str(e)}"
+                if attempt < retries and self.retry_later:
+                    self.update(**{status_field: Certificate.STAGE_PENDING, 'artifact_error': error})
+                    schedule_stage_retry(self.certificate.pk, self.version, name, attempt + 1, delay * (2 ** attempt))
+                    return False
+                if attempt < retries:
+                    time.sleep(delay * (2 ** attempt))
+                    continue
+                self.update(**{status_field: Certificate.STAGE_FAILED, 'artifact_error': error})
+                return False
+
+            self.update(**{status_field: Certificate.STAGE_SUCCEEDED, 'artifact_error': None}, **fields)
+            return True
+
+    def render(self, last_attempt=False):
+        # Stored in the render cache too, so the first download is free
+        self.pdf_bytes = get_certificate_pdf(self.certificate).read()
+
+    def upload(self, last_attempt=False):
+        certificate_id = self.certificate.certificate_id
+        if cloudinary_configured():
+            pdf_url = upload_to_cloudinary(self.pdf_bytes, certificate_id)
+            if pdf_url:
+                return {'pdf_url': pdf_url}
+            if not last_attempt:
+                raise UploadFailed('Cloudinary upload failed')
+
+        # Fallback to local storage if Cloudinary is unavailable
+        print(f"Falling back to local storage for certificate {certificate_id}")
+        return {'pdf_url': save_to_local_storage(self.pdf_bytes, certificate_id)}
+
+    def pin(self, last_attempt=False):
+        return {'ipfs_hash': pin_to_ipfs(self.certificate, self.pdf_bytes)}
+
+    def update(self, **fields):
+        """
+        Save fields on the certificate unless a newer run has taken over
+        """
+        updated = Certificate.objects.filter(
+            pk=self.certificate.pk, artifact_version=self.version
+        ).update(updated_at=timezone.now(), **fields)
+        if not updated:
+            raise StaleIssuance()
+        for name, value in fields.items():
+            if not hasattr(value, 'resolve_expression'):
+                setattr(self.certificate, name, value)
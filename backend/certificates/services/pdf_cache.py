@@ -0,0 +1,98 @@
+"""
+Content-addressed cache of rendered certificate PDFs.
+
+A render is stored in ``default_storage`` under
+``CERTIFICATE_PDF_CACHE_DIR/<certificate_id>/<digest>.pdf``, where the digest
+is a hash of everything the renderer draws plus ``TEMPLATE_VERSION``. As
+long as those inputs don't change the stored file is served as is; when they
+do, the digest changes, the certificate is rendered once more and older
+renders of it are removed. The digest doubles as the download's ETag.
+"""
+import hashlib
+import json
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .rendering import render_certificate_pdf, render_inputs
+
+
+class RenderedCertificate:
+    """
+    A stored certificate render
+    """
+
+    def __init__(self, path, digest, content=None):
+        self.path = path
+        self.digest = digest
+        self._content = content
+
+    @property
+    def etag(self):
+        return f'"{self.digest}"'
+
+    def open(self):
+        return default_storage.open(self.path, 'rb')
+
+    def read(self):
+        if self._content is None:
+            with self.open() as pdf_file:
+                self._content = pdf_file.read()
+        return self._content
+
+    @property
+    def size(self):
+        if self._content is not None:
+            return len(self._content)
+        return default_storage.size(self.path)
+
+
+def cache_dir(certificate):
+    return posixpath.join(getattr(settings, 'CERTIFICATE_PDF_CACHE_DIR', 'certificates/rendered'), certificate.certificate_id)
+
+
+def render_digest(certificate, inputs=None):
+    if inputs is None:
+        inputs = render_inputs(certificate)
+    encoded = json.dumps(inputs, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def get_certificate_pdf(certificate):
+    """
+    Return the stored render of a certificate, rendering it if its inputs changed
+    """
+    inputs = render_inputs(certificate)
+    digest = render_digest(certificate, inputs)
+    path = posixpath.join(cache_dir(certificate), f"{digest}.pdf")
+    if default_storage.exists(path):
+        return RenderedCertificate(path, digest)
+
+    content = render_certificate_pdf(certificate, certificate.user, certificate.course, inputs).getvalue()
+    # Another request may have stored the same render meanwhile
+    if not default_storage.exists(path):
+        saved = default_storage.save(path, ContentFile(content))
+        if saved != path:
+            # It won the race and the storage gave this copy another name;
+            # the canonical file is identical, so drop ours
+            default_storage.delete(saved)
+    prune_renders(certificate, keep=path)
+    return RenderedCertificate(path, digest, content)
+
+
+def prune_renders(certificate, keep):
+    """
+    Delete renders of a certificate other than ``keep``
+    """
+    directory = cache_dir(certificate)
+    try:
+        _, files = default_storage.listdir(directory)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for name in files:
+        path = posixpath.join(directory, name)
+        if path != keep:
+            default_storage.delete(path)
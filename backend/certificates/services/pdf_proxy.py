@@ -0,0 +1,334 @@
+"""
+Streaming proxy for certificate PDFs stored in the cloud.
+
+``proxy_pdf`` forwards a PDF from its upload URL in chunks, so a worker
+never holds a whole file in memory. Upstream requests go through one pooled
+``requests.Session`` with connect/read timeouts and retries on gateway
+errors.
+
+Full downloads are written to a local disk cache while they stream
+(``CERTIFICATE_PDF_PROXY_CACHE_DIR``, capped at
+``CERTIFICATE_PDF_PROXY_CACHE_MAX_BYTES``). Cached copies are served from disk
+for ``CERTIFICATE_PDF_PROXY_CACHE_TTL`` seconds and revalidated upstream with
+their ETag / Last-Modified after that. Conditional requests (If-None-Match,
+If-Modified-Since) get 304s and single byte ranges get 206s, from either the
+cache or upstream.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CHUNK_SIZE = 64 * 1024
+
+# Headers passed between the client and the upstream response
+FORWARDED_REQUEST_HEADERS = ['Range', 'If-None-Match', 'If-Modified-Since']
+FORWARDED_RESPONSE_HEADERS = ['Content-Length', 'Content-Range', 'ETag', 'Last-Modified', 'Accept-Ranges']
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Return the process-wide pooled HTTP session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool_size = getattr(settings, 'CERTIFICATE_PDF_PROXY_POOL_SIZE', 10)
+            retries = Retry(
+                total=2,
+                backoff_factor=0.5,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=['GET']
+            )
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def upstream_timeout():
+    return (
+        getattr(settings, 'CERTIFICATE_PDF_PROXY_CONNECT_TIMEOUT', 5),
+        getattr(settings, 'CERTIFICATE_PDF_PROXY_READ_TIMEOUT', 30),
+    )
+
+
+class PDFDiskCache:
+    """
+    Recently proxied PDFs on local disk, keyed by URL
+    """
+
+    def __init__(self, directory=None, max_bytes=None, ttl=None):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+
+    @property
+    def directory(self):
+        return self._directory or getattr(
+            settings, 'CERTIFICATE_PDF_PROXY_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'edutube-pdf-cache')
+        )
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes or getattr(settings, 'CERTIFICATE_PDF_PROXY_CACHE_MAX_BYTES', 200 * 1024 * 1024)
+
+    @property
+    def ttl(self):
+        return self._ttl or getattr(settings, 'CERTIFICATE_PDF_PROXY_CACHE_TTL', 60 * 60 * 24)
+
+    def paths(self, url):
+        name = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{name}.pdf"), os.path.join(self.directory, f"{name}.json")
+
+    def get(self, url):
+        """
+        Return the cached entry's metadata (with its file ``path``), or None
+        """
+        pdf_path, meta_path = self.paths(url)
+        try:
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(pdf_path):
+            return None
+        meta['path'] = pdf_path
+        return meta
+
+    def is_fresh(self, meta):
+        return time.time() - meta['fetched_at'] < self.ttl
+
+    def touch(self, url, meta):
+        """
+        Mark an entry as revalidated
+        """
+        meta = dict(meta, fetched_at=time.time())
+        meta.pop('path', None)
+        self._write_meta(url, meta)
+        return dict(meta, path=self.paths(url)[0])
+
+    def open_temp(self):
+        os.makedirs(self.directory, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=self.directory, suffix='.part', delete=False)
+
+    def commit(self, url, temp_path, headers):
+        """
+        Move a completely downloaded file into the cache
+        """
+        pdf_path, _ = self.paths(url)
+        os.replace(temp_path, pdf_path)
+        self._write_meta(url, {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'size': os.path.getsize(pdf_path),
+            'fetched_at': time.time(),
+        })
+        self.prune()
+
+    def prune(self):
+        """
+        Delete the least recently used files until the cache fits in ``max_bytes``
+        """
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.pdf')]
+        except OSError:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_atime, reverse=True)
+        total = 0
+        for entry in entries:
+            total += entry.stat().st_size
+            if total > self.max_bytes:
+                for path in (entry.path, entry.path[:-len('.pdf')] + '.json'):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def _write_meta(self, url, meta):
+        _, meta_path = self.paths(url)
+        temp_path = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(temp_path, meta_path)
+
+
+pdf_disk_cache = PDFDiskCache()
+
+
+def parse_range(header, size):
+    """
+    Parse a single ``bytes=start-end`` range. Returns (start, end) inclusive,
+    None to serve the whole file, or False if the range can't be satisfied.
+    """
+    match = RANGE_PATTERN.match(header or '')
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def iter_file_range(path, start, end):
+    with open(path, 'rb') as pdf_file:
+        pdf_file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = pdf_file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_cached(request, meta):
+    """
+    Serve a cached PDF, honouring conditional and range requests
+    """
+    last_modified = parse_http_date_safe(meta['last_modified']) if meta.get('last_modified') else None
+    not_modified = get_conditional_response(request, etag=meta.get('etag'), last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    size = meta['size']
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(meta['path'], 'rb'), content_type='application/pdf')
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(iter_file_range(meta['path'], start, end), status=206, content_type='application/pdf')
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+
+    response['Accept-Ranges'] = 'bytes'
+    if meta.get('etag'):
+        response['ETag'] = meta['etag']
+    if meta.get('last_modified'):
+        response['Last-Modified'] = meta['last_modified']
+    return response
+
+
+def stream_upstream(upstream, cache_url=None):
+    """
+    Yield an upstream body in chunks, saving it to the disk cache when ``cache_url`` is given
+    """
+    temp_file = pdf_disk_cache.open_temp() if cache_url else None
+    completed = False
+    try:
+        for chunk in upstream.iter_content(CHUNK_SIZE):
+            if chunk:
+                if temp_file:
+                    temp_file.write(chunk)
+                yield chunk
+        completed = True
+    finally:
+        upstream.close()
+        if temp_file:
+            temp_file.close()
+            if completed:
+                pdf_disk_cache.commit(cache_url, temp_file.name, upstream.headers)
+            else:
+                # The client went away or the upstream failed mid-stream
+                os.unlink(temp_file.name)
+
+
+def proxy_pdf(request, url, use_cache=True):
+    """
+    Return a response that streams the PDF at ``url`` to the client
+    """
+    meta = pdf_disk_cache.get(url) if use_cache else None
+    if meta and pdf_disk_cache.is_fresh(meta):
+        return serve_cached(request, meta)
+
+    headers = {'Accept-Encoding': 'identity'}
+    if meta:
+        # Revalidate the cached copy instead of downloading it again
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    else:
+        for name in FORWARDED_REQUEST_HEADERS:
+            if request.headers.get(name):
+                headers[name] = request.headers[name]
+
+    upstream = get_session().get(url, headers=headers, stream=True, timeout=upstream_timeout())
+
+    if upstream.status_code == 304:
+        upstream.close()
+        if meta:
+            return serve_cached(request, pdf_disk_cache.touch(url, meta))
+        response = HttpResponseNotModified()
+        for name in ['ETag', 'Last-Modified']:
+            if upstream.headers.get(name):
+                response[name] = upstream.headers[name]
+        return response
+
+    if upstream.status_code == 416:
+        upstream.close()
+        response = HttpResponse(status=416)
+        if upstream.headers.get('Content-Range'):
+            response['Content-Range'] = upstream.headers['Content-Range']
+        return response
+
+    if upstream.status_code not in (200, 206):
+        upstream.close()
+        return None
+
+    if meta and 'Range' in request.headers:
+        # Refreshed copy, but the client wants part of it: cache first, then serve the range
+        for _ in stream_upstream(upstream, cache_url=url):
+            pass
+        refreshed = pdf_disk_cache.get(url)
+        if refreshed:
+            return serve_cached(request, refreshed)
+        # Pruned straight away (e.g. larger than the whole cache): forward the range upstream
+        return proxy_pdf(request, url, use_cache=False)
+
+    # Only complete bodies are worth caching
+    cache_url = url if use_cache and upstream.status_code == 200 else None
+    response = StreamingHttpResponse(
+        stream_upstream(upstream, cache_url),
+        status=upstream.status_code,
+        content_type='application/pdf'
+    )
+    for name in FORWARDED_RESPONSE_HEADERS:
+        if upstream.headers.get(name):
+            response[name] = upstream.headers[name]
+    return response
@@ -0,0 +1,131 @@
+"""
+Publishing rendered certificate PDFs: Cloudinary, local media storage and
+IPFS pinning through Pinata.
+"""
+import json
+import os
+import traceback
+from datetime import datetime
+
+import cloudinary
+import cloudinary.uploader
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+PINATA_PIN_FILE_URL = "https://api.pinata.cloud/pinning/pinFileToIPFS"
+
+
+def upload_to_cloudinary(pdf_buffer, certificate_id):
+    """
+    Upload a PDF file to Cloudinary
+    """
+    try:
+        # Configure Cloudinary if not already configured
+        try:
+            # Check if Cloudinary is already configured
+            cloudinary.config().cloud_name
+        except:
+            # Configure Cloudinary with environment variables
+            cloudinary.config(
+                cloud_name=os.environ.get('CLOUDINARY_CLOUD_NAME', ''),
+                api_key=os.environ.get('CLOUDINARY_API_KEY', ''),
+                api_secret=os.environ.get('CLOUDINARY_API_SECRET', ''),
+                secure=True
+            )
+        
+        # Add timestamp to prevent caching issues
+        timestamp = int(datetime.now().timestamp())
+        
+        # Upload the PDF to Cloudinary with improved parameters
+        result = cloudinary.uploader.upload(
+            pdf_buffer,
+            public_id=f"certificates/{certificate_id}_{timestamp}",
+            folder="edutube",
+            resource_type="raw",
+            format="pdf",
+            type="upload",
+            overwrite=True,
+            use_filename=True,
+            unique_filename=True,
+            flags="attachment",
+            tags=["certificate", "pdf", "edutube"],
+            quality="auto:best",
+            access_mode="public",
+            # Add these additional parameters to ensure public accessibility
+            delivery_type="upload",
+            invalidate=True,
+            accessibility_analysis=True,
+            public_access="true"
+        )
+        
+        print(f"Cloudinary upload success! URL: {result['secure_url']}")
+        
+        # The secure_url is the URL with HTTPS
+        # Return both secure and regular URLs for flexibility
+        return result['secure_url']
+    except Exception as e:
+        print(f"Error uploading certificate to Cloudinary: {str(e)}")
+        traceback.print_exc()  # Print detailed stack trace
+        return None
+
+
+def cloudinary_configured():
+    return bool(cloudinary.config().cloud_name)
+
+
+def save_to_local_storage(pdf_bytes, certificate_id):
+    """
+    Save a PDF to media storage and return its URL
+    """
+    pdf_path = f'certificates/{certificate_id}.pdf'
+    if default_storage.exists(pdf_path):
+        default_storage.delete(pdf_path)
+    saved_path = default_storage.save(pdf_path, ContentFile(pdf_bytes))
+    return f"{settings.MEDIA_URL}{saved_path}"
+
+
+def pinata_configured():
+    return bool(settings.PINATA_API_KEY and settings.PINATA_SECRET_API_KEY)
+
+
+def pin_to_ipfs(certificate, pdf_bytes):
+    """
+    Pin a certificate PDF to IPFS via Pinata and return its IPFS hash.
+
+    Raises on network errors and non-200 responses so the caller can retry.
+    """
+    course = certificate.course
+    data = {
+        'pinataMetadata': json.dumps({
+            'name': f'EduTube Certificate - {course.title}',
+            'keyvalues': {
+                'certificateId': certificate.certificate_id,
+                'userId': str(certificate.user_id),
+                'courseId': str(course.id),
+                'issueDate': datetime.now().isoformat()
+            }
+        })
+    }
+    headers = {
+        'pinata_api_key': settings.PINATA_API_KEY,
+        'pinata_secret_api_key': settings.PINATA_SECRET_API_KEY
+    }
+    files = {
+        'file': ('certificate.pdf', pdf_bytes, 'application/pdf')
+    }
+
+    response = requests.post(
+        PINATA_PIN_FILE_URL,
+        files=files,
+        data=data,
+        headers=headers,
+        timeout=getattr(settings, 'PINATA_TIMEOUT', 30)
+    )
+    response.raise_for_status()
+
+    ipfs_hash = response.json().get('IpfsHash')
+    if not ipfs_hash:
+        raise ValueError('Pinata response did not include an IPFS hash')
+    return ipfs_hash
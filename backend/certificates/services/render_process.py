@@ -0,0 +1,23 @@
+"""
+Entry points for certificate render processes.
+
+Spawned processes start without Django loaded, so nothing that touches the
+app registry is imported until ``init_render_process`` has set it up.
+"""
+import django
+
+
+def init_render_process():
+    django.setup()
+
+
+def render_in_process(certificate_pk):
+    """
+    Render a certificate in a pool process (through the render cache)
+    """
+    from certificates.models import Certificate
+
+    from .pdf_cache import get_certificate_pdf
+
+    certificate = Certificate.objects.select_related('user', 'course').get(pk=certificate_pk)
+    return get_certificate_pdf(certificate).read()
@@ -0,0 +1,338 @@
+"""
+Certificate PDF rendering.
+"""
+import os
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from reportlab.lib.colors import Color, black, blue, navy
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from quizzes.models import QuizAttempt
+
+# Bump whenever the certificate layout changes so cached renders are replaced
+TEMPLATE_VERSION = 2
+
+BACKGROUND_FORM = 'certificate-background'
+
+# Band opacities are rounded to this many decimals so bands can share a
+# graphics state and be filled together
+BAND_OPACITY_PRECISION = 3
+
+
+@lru_cache(maxsize=None)
+def register_fonts():
+    """
+    Register the Roboto fonts once per process and return (regular, bold) font names.
+
+    Parsing the TTF files is the slowest part of rendering, so it must not
+    happen per certificate. Falls back to Helvetica when the fonts aren't
+    bundled.
+    """
+    try:
+        font_path = os.path.join(settings.BASE_DIR, 'certificates', 'fonts')
+        regular_font = os.path.join(font_path, 'Roboto-Regular.ttf')
+        bold_font = os.path.join(font_path, 'Roboto-Bold.ttf')
+        
+        if os.path.exists(regular_font) and os.path.exists(bold_font):
+            pdfmetrics.registerFont(TTFont('Roboto', regular_font))
+            pdfmetrics.registerFont(TTFont('Roboto-Bold', bold_font))
+            return 'Roboto', 'Roboto-Bold'
+    except Exception as e:
+        print(f"Error registering fonts: {e}")
+    
+    # Fall back to default fonts
+    return 'Helvetica', 'Helvetica-Bold'
+
+
+@lru_cache(maxsize=None)
+def background_bands(width, height):
+    """
+    The subtle gradient as ``(opacity, [(x, y, w, h), ...])`` groups, computed once per page size
+    """
+    groups = {}
+    for y in range(30, int(height), 4):
+        opacity = round(0.03 - (0.02 * (y / height)), BAND_OPACITY_PRECISION)  # Gradually decrease opacity
+        if opacity > 0:
+            groups.setdefault(opacity, []).append((30, y, width - 60, 2))
+    return tuple((opacity, tuple(rects)) for opacity, rects in groups.items())
+
+
+def draw_background(p, width, height):
+    """
+    Draw the static certificate layer as a form XObject and place it on the page
+    """
+    p.beginForm(BACKGROUND_FORM)
+    
+    # Draw certificate border with more elegant design
+    p.setStrokeColor(blue)
+    p.setLineWidth(3)
+    p.rect(30, 30, width - 60, height - 60, stroke=1, fill=0)
+    
+    # Add a subtle background color gradient
+    # Draw horizontal bands, one fill per opacity level
+    for opacity, rects in background_bands(width, height):
+        p.setFillColor(Color(0.8, 0.8, 1, alpha=opacity))
+        path = p.beginPath()
+        for rect in rects:
+            path.rect(*rect)
+        p.drawPath(path, stroke=0, fill=1)
+    
+    # Add decorative corners
+    corner_size = 20
+    p.setStrokeColor(blue)
+    p.setLineWidth(2)
+    p.lines([
+        # Top-left corner
+        (30, 30+corner_size, 30, 30),
+        (30, 30, 30+corner_size, 30),
+        # Top-right corner
+        (width-30-corner_size, 30, width-30, 30),
+        (width-30, 30, width-30, 30+corner_size),
+        # Bottom-left corner
+        (30, height-30-corner_size, 30, height-30),
+        (30, height-30, 30+corner_size, height-30),
+        # Bottom-right corner
+        (width-30-corner_size, height-30, width-30, height-30),
+        (width-30, height-30, width-30, height-30-corner_size),
+    ])
+    
+    p.endForm()
+    p.doForm(BACKGROUND_FORM)
+
+
+def render_inputs(certificate):
+    """
+    Everything ``render_certificate_pdf`` draws for a certificate.
+
+    Two certificates with the same inputs render to the same PDF, so a hash
+    of these identifies a rendered artifact.
+    """
+    user = certificate.user
+    course = certificate.course
+    best_score = (
+        QuizAttempt.objects
+        .filter(user=user, quiz__course=course, passed=True)
+        .order_by('-score', '-created_at')
+        .values_list('score', flat=True)
+        .first()
+    )
+    courses = list(
+        certificate.certificate_courses
+        .order_by('-added_at')
+        .values_list('course__title', 'added_at', 'quiz_score')
+    )
+    return {
+        'template_version': TEMPLATE_VERSION,
+        'certificate_id': certificate.certificate_id,
+        'user': [user.first_name, user.last_name, user.username],
+        'course_title': course.title,
+        'best_score': best_score,
+        'is_dynamic': certificate.is_dynamic,
+        'courses': courses,
+        # last_updated is bumped by every save, but only the date is drawn
+        'last_updated': certificate.last_updated.strftime("%B %d, %Y"),
+        'ipfs_hash': certificate.ipfs_hash,
+        'blockchain_tx': certificate.blockchain_tx,
+        'site_url': settings.SITE_URL,
+    }
+
+
+def render_certificate_pdf(certificate, user, course, inputs=None):
+    """
+    Render the PDF certificate for a user and course, raising on errors
+    For dynamic certificates, include all the courses the user has completed
+
+    ``inputs`` is the certificate's ``render_inputs``; callers that already
+    hashed them pass them in so the score and course queries run once.
+    """
+    if inputs is None:
+        inputs = render_inputs(certificate)
+    courses = inputs['courses']
+    best_score = inputs['best_score']
+
+    # Create a BytesIO buffer to receive the PDF data
+    buffer = BytesIO()
+    
+    # Create the PDF object, using the BytesIO buffer as its "file"
+    # Changed to landscape for better certificate layout
+    p = canvas.Canvas(buffer, pagesize=landscape(letter))
+    p.setTitle(f"Certificate of Completion - {course.title}")
+    p.setAuthor("EduTube Learning Platform")
+    p.setSubject(f"Certificate for {user.username}")
+    p.setKeywords(["certificate", "education", "completion", "edutube"])
+    
+    width, height = landscape(letter)  # Landscape for better certificate format
+    
+    # Fonts are registered once per process
+    regular_font_name, bold_font_name = register_fonts()
+    
+    # Border, background bands and corners are the same on every certificate
+    draw_background(p, width, height)
+    
+    # Add certificate header
+    p.setFont(bold_font_name, 36)  # Increased font size
+    p.setFillColor(navy)
+    
+    # For dynamic certificates, use a different title
+    if certificate.is_dynamic and len(courses) > 1:
+        header_text = "CERTIFICATE OF ACHIEVEMENT"
+    else:
+        header_text = "CERTIFICATE OF COMPLETION"
+        
+    header_width = stringWidth(header_text, bold_font_name, 36)
+    p.drawString((width - header_width) / 2, height - 120, header_text)
+    
+    # Add decorative line
+    p.setStrokeColor(blue)
+    p.setLineWidth(2)
+    p.line(width/4, height-140, width*3/4, height-140)
+    
+    # Add certificate text
+    p.setFont(regular_font_name, 18)  # Increased font size
+    p.setFillColor(black)
+    p.drawCentredString(width/2, height-180, "This certificate is presented to")
+    
+    # Add user name
+    user_name = f"{user.first_name} {user.last_name}".strip()
+    if not user_name:
+        user_name = user.username
+    p.setFont(bold_font_name, 30)  # Larger font for name
+    p.setFillColor(navy)
+    p.drawCentredString(width/2, height-230, user_name)
+    
+    # For dynamic certificates, we'll present multiple courses
+    if certificate.is_dynamic and courses:
+        p.setFont(regular_font_name, 18)
+        p.setFillColor(black)
+        p.drawCentredString(width/2, height-280, "for successfully completing the following courses:")
+        
+        # Add course list
+        y_position = height - 330
+        
+        for i, (course_title, added_at, quiz_score) in enumerate(courses[:5]):  # Limit to 5 courses for space
+            if len(course_title) > 40:
+                course_title = course_title[:37] + "..."
+                
+            p.setFont(bold_font_name, 16)
+            p.setFillColor(navy)
+            p.drawString(width/4, y_position, f"{i+1}. {course_title}")
+            
+            # Add completion date and score
+            p.setFont(regular_font_name, 14)
+            p.setFillColor(black)
+            completion_date = added_at.strftime("%B %d, %Y")
+            p.drawString(width/4, y_position - 20, f"Completed: {completion_date} | Score: {quiz_score:.1f}%")
+            
+            y_position -= 40
+            
+        # If there are more courses, indicate this
+        if len(courses) > 5:
+            p.setFont(regular_font_name, 14)
+            p.setFillColor(black)
+            more_count = len(courses) - 5
+            p.drawString(width/4, y_position, f"+ {more_count} more course(s). View all online.")
+            
+            y_position -= 30
+    else:
+        # Single course certificate (original behavior)
+        p.setFont(regular_font_name, 18)
+        p.setFillColor(black)
+        p.drawCentredString(width/2, height-280, "for successfully completing the course")
+        
+        # Add course title
+        p.setFont(bold_font_name, 24)  # Larger font
+        p.setFillColor(navy)
+        
+        # Handle long course titles by splitting them
+        course_title = course.title
+        if len(course_title) > 40:
+            # Split the title for better display
+            words = course_title.split()
+            first_line = ' '.join(words[:len(words)//2])
+            second_line = ' '.join(words[len(words)//2:])
+            p.drawCentredString(width/2, height-330, first_line)
+            p.drawCentredString(width/2, height-360, second_line)
+            
+            y_position = height - 410
+        else:
+            p.drawCentredString(width/2, height-330, course_title)
+            
+            y_position = height - 380
+        
+        # Add score if available
+        if best_score is not None:
+            p.setFont(bold_font_name, 20)
+            p.setFillColor(blue)
+            p.drawCentredString(width/2, y_position, f"Score: {best_score:.1f}%")
+            y_position -= 40
+    
+    # Add certificate date
+    p.setFont(regular_font_name, 16)
+    p.setFillColor(black)
+    p.drawCentredString(width/2, y_position, f"Last Updated: {inputs['last_updated']}")
+    
+    # Add "Certified by EduTube" text
+    p.setFont(bold_font_name, 18)
+    p.setFillColor(navy)
+    p.drawCentredString(width/2, 100, "Certified by EduTube Learning Platform")
+    
+    # Add certificate ID
+    p.setFont(regular_font_name, 11)
+    p.setFillColor(black)
+    p.drawString(50, 50, f"Certificate ID: {certificate.certificate_id}")
+    
+    # Add verification info - use IPFS URL if available
+    p.setFont(regular_font_name, 11)
+    if certificate.ipfs_hash and not certificate.ipfs_hash.startswith('ipfs-placeholder'):
+        p.drawString(50, 65, f"Verify at: https://ipfs.io/ipfs/{certificate.ipfs_hash}")
+    else:
+        # Fallback to site URL
+        p.drawString(50, 65, f"Verify at: {settings.SITE_URL}/verify/{certificate.certificate_id}")
+    
+    # Add blockchain verification if available
+    if certificate.blockchain_tx and not certificate.blockchain_tx.startswith('0x00000'):
+        p.setFont(regular_font_name, 9)
+        p.setFillColor(black)
+        p.drawString(50, 80, f"Blockchain verification: {certificate.blockchain_tx[:20]}...")
+        if certificate.blockchain_tx.startswith('0x'):
+            p.drawString(50, 90, f"View on Polygon Scan: https://mumbai.polygonscan.com/tx/{certificate.blockchain_tx}")
+    
+    # Add dynamic certificate badge if applicable
+    if certificate.is_dynamic:
+        p.setFont(bold_font_name, 11)
+        p.setFillColor(blue)
+        p.drawRightString(width-50, 80, "DYNAMIC CERTIFICATE")
+    
+    # Close the PDF object cleanly
+    p.showPage()
+    p.save()
+    
+    # Return the PDF data
+    buffer.seek(0)
+    return buffer
+
+
+def generate_certificate_pdf(certificate, user, course):
+    """
+    Generate PDF certificate for a user and course
+    Returns an error PDF instead of raising if rendering fails
+    """
+    try:
+        return render_certificate_pdf(certificate, user, course)
+    except Exception as e:
+        print(f"Error generating certificate PDF: {str(e)}")
+        # Create a simple error PDF to return
+        buffer = BytesIO()
+        p = canvas.Canvas(buffer, pagesize=landscape(letter))
+        p.setTitle("Error Certificate")
+        p.drawString(100, 400, f"Error generating certificate: {str(e)}")
+        p.showPage()
+        p.save()
+        buffer.seek(0)
+        return buffer
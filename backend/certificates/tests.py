@@ -1,3 +1,368 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from requests.structures import CaseInsensitiveDict
+from rest_framework.test import APIClient
+
+from courses.models import Course
+from quizzes.models import Quiz, QuizAttempt
+
+from .models import Certificate, CertificateCourse
+from .services import batch, issuance, pdf_cache, pdf_proxy
+from .services.issuance import CertificateIssuance, StaleIssuance, run_certificate_issuance
+from .services.rendering import render_certificate_pdf, render_inputs
+
+
+class CertificateTestMixin:
+    def create_certificate(self, **fields):
+        user = User.objects.create_user(username=f"student{User.objects.count()}", password='pw')
+        course = Course.objects.create(title='Course', description='', youtube_id='vid')
+        return Certificate.objects.create(user=user, course=course, certificate_id=f"cert-{user.pk}", **fields)
+
+
+@override_settings(CERTIFICATE_STAGE_RETRIES=3, CERTIFICATE_STAGE_RETRY_DELAY=2)
+class CertificateIssuanceTests(CertificateTestMixin, TestCase):
+    def setUp(self):
+        self.certificate = self.create_certificate(artifact_version=1)
+        patches = {
+            'get_certificate_pdf': mock.Mock(return_value=mock.Mock(read=mock.Mock(return_value=b'%PDF'))),
+            'cloudinary_configured': mock.Mock(return_value=True),
+            'upload_to_cloudinary': mock.Mock(return_value='https://cdn.example.com/cert.pdf'),
+            'save_to_local_storage': mock.Mock(return_value='/media/cert.pdf'),
+            'pinata_configured': mock.Mock(return_value=False),
+            'schedule_stage_retry': mock.Mock(),
+        }
+        for name, value in patches.items():
+            patcher = mock.patch.object(issuance, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.mocks = patches
+
+    def test_run_issues_every_stage(self):
+        run_certificate_issuance(self.certificate.pk, 1)
+        self.certificate.refresh_from_db()
+        self.assertEqual(self.certificate.artifact_status, 'ready')
+        self.assertEqual(self.certificate.pdf_url, 'https://cdn.example.com/cert.pdf')
+        self.assertEqual(self.certificate.pin_status, Certificate.STAGE_SKIPPED)
+
+    def test_outdated_run_does_nothing(self):
+        self.assertIsNone(run_certificate_issuance(self.certificate.pk, 0))
+        self.mocks['get_certificate_pdf'].assert_not_called()
+        self.certificate.refresh_from_db()
+        self.assertEqual(self.certificate.render_status, Certificate.STAGE_PENDING)
+
+    def test_stale_issuance_stops_writing(self):
+        run = CertificateIssuance(self.certificate, 1)
+        Certificate.objects.filter(pk=self.certificate.pk).update(artifact_version=F('artifact_version') + 1)
+        with self.assertRaises(StaleIssuance):
+            run.update(render_status=Certificate.STAGE_SUCCEEDED)
+        self.certificate.refresh_from_db()
+        self.assertEqual(self.certificate.render_status, Certificate.STAGE_PENDING)
+
+    def test_newer_run_during_a_stage_wins(self):
+        def superseded(*args):
+            Certificate.objects.filter(pk=self.certificate.pk).update(artifact_version=2, pdf_url='https://new.example.com')
+            return 'https://old.example.com'
+        self.mocks['upload_to_cloudinary'].side_effect = superseded
+
+        self.assertIsNone(run_certificate_issuance(self.certificate.pk, 1))
+        self.certificate.refresh_from_db()
+        self.assertEqual(self.certificate.pdf_url, 'https://new.example.com')
+
+    def test_failed_stage_is_resubmitted_instead_of_sleeping(self):
+        self.mocks['upload_to_cloudinary'].return_value = None
+        with mock.patch.object(issuance.time, 'sleep') as sleep:
+            run_certificate_issuance(self.certificate.pk, 1)
+        sleep.assert_not_called()
+        self.mocks['schedule_stage_retry'].assert_called_once_with(self.certificate.pk, 1, 'upload', 1, 2)
+        self.certificate.refresh_from_db()
+        self.assertEqual(self.certificate.upload_status, Certificate.STAGE_PENDING)
+        self.assertEqual(self.certificate.artifact_status, 'pending')
+
+    def test_last_retry_falls_back_to_local_storage(self):
+        self.mocks['upload_to_cloudinary'].return_value = None
+        run_certificate_issuance(self.certificate.pk, 1, attempts={'upload': 3})
+        self.mocks['schedule_stage_retry'].assert_not_called()
+        self.certificate.refresh_from_db()
+        self.assertEqual(self.certificate.pdf_url, '/media/cert.pdf')
+        self.assertEqual(self.certificate.artifact_status, 'ready')
+
+
+class RenderCertificateTests(CertificateTestMixin, TestCase):
+    def setUp(self):
+        self.certificate = self.create_certificate()
+        for n in range(7):
+            course = Course.objects.create(title=f"Course {n}", description='', youtube_id=f"v{n}")
+            CertificateCourse.objects.create(certificate=self.certificate, course=course, quiz_score=80 + n)
+        self.certificate = Certificate.objects.select_related('user', 'course').get(pk=self.certificate.pk)
+
+    def test_render_reuses_the_hashed_inputs(self):
+        inputs = render_inputs(self.certificate)
+        with self.assertNumQueries(0):
+            pdf = render_certificate_pdf(self.certificate, self.certificate.user, self.certificate.course, inputs)
+        self.assertTrue(pdf.getvalue().startswith(b'%PDF'))
+
+    def test_render_without_inputs_queries_them_once(self):
+        with self.assertNumQueries(2):
+            render_certificate_pdf(self.certificate, self.certificate.user, self.certificate.course)
+
+
+class PdfCacheTests(CertificateTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.certificate = self.create_certificate()
+        patcher = mock.patch.object(pdf_cache, 'render_certificate_pdf', wraps=pdf_cache.render_certificate_pdf)
+        self.render = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stored_renders(self):
+        return default_storage.listdir(pdf_cache.cache_dir(self.certificate))[1]
+
+    def test_save_without_drawn_changes_keeps_the_digest(self):
+        digest = pdf_cache.render_digest(self.certificate)
+        self.certificate.save()
+        self.assertEqual(pdf_cache.render_digest(self.certificate), digest)
+
+    def test_drawn_changes_change_the_digest(self):
+        digest = pdf_cache.render_digest(self.certificate)
+        course = Course.objects.create(title='Another', description='', youtube_id='v2')
+        CertificateCourse.objects.create(certificate=self.certificate, course=course, quiz_score=90)
+        self.assertNotEqual(pdf_cache.render_digest(self.certificate), digest)
+
+    def test_render_is_stored_and_reused(self):
+        first = pdf_cache.get_certificate_pdf(self.certificate)
+        second = pdf_cache.get_certificate_pdf(self.certificate)
+        self.render.assert_called_once()
+        self.assertEqual(first.path, second.path)
+        self.assertEqual(second.read(), first.read())
+
+    def test_concurrent_miss_keeps_the_canonical_render(self):
+        first = pdf_cache.get_certificate_pdf(self.certificate)
+        # A second request that missed before the first one stored its render
+        exists = default_storage.exists
+        misses = [first.path, first.path]
+        def racing_exists(name):
+            if name in misses:
+                misses.remove(name)
+                return False
+            return exists(name)
+        with mock.patch.object(default_storage, 'exists', side_effect=racing_exists):
+            second = pdf_cache.get_certificate_pdf(self.certificate)
+        self.assertEqual(self.render.call_count, 2)
+        self.assertEqual(second.path, first.path)
+        self.assertEqual(self.stored_renders(), [f"{first.digest}.pdf"])
+
+    def test_download_revalidates_with_the_etag(self):
+        client = APIClient()
+        client.force_authenticate(self.certificate.user)
+        url = f"/api/certificates/{self.certificate.pk}/download/"
+
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        etag = response['ETag']
+
+        cache.clear()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.render.assert_called_once()
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(pdf_proxy.parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(pdf_proxy.parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(pdf_proxy.parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(pdf_proxy.parse_range('bytes=990-2000', 1000), (990, 999))
+
+    def test_whole_file(self):
+        self.assertIsNone(pdf_proxy.parse_range(None, 1000))
+        self.assertIsNone(pdf_proxy.parse_range('bytes=0-1,5-9', 1000))
+        self.assertIsNone(pdf_proxy.parse_range('bytes=-', 1000))
+
+    def test_unsatisfiable(self):
+        self.assertIs(pdf_proxy.parse_range('bytes=1000-', 1000), False)
+        self.assertIs(pdf_proxy.parse_range('bytes=20-10', 1000), False)
+        self.assertIs(pdf_proxy.parse_range('bytes=-0', 1000), False)
+
+
+class FakeUpstream:
+    def __init__(self, status_code=200, body=b'', headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = CaseInsensitiveDict(headers or {})
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class ProxyPdfTests(SimpleTestCase):
+    url = 'https://cdn.example.com/cert.pdf'
+    body = b'%PDF-1.4 certificate body'
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings_override = override_settings(
+            CERTIFICATE_PDF_PROXY_CACHE_DIR=directory,
+            CERTIFICATE_PDF_PROXY_CACHE_MAX_BYTES=1024 * 1024,
+            CERTIFICATE_PDF_PROXY_CACHE_TTL=60
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.session = mock.Mock()
+        patcher = mock.patch.object(pdf_proxy, 'get_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    def proxy(self, **headers):
+        return pdf_proxy.proxy_pdf(self.factory.get('/', **headers), self.url)
+
+    def cache_body(self):
+        self.session.get.return_value = FakeUpstream(200, self.body, {'ETag': '"v1"', 'Content-Length': str(len(self.body))})
+        response = self.proxy()
+        self.assertEqual(b''.join(response.streaming_content), self.body)
+        self.session.get.reset_mock()
+
+    def test_cached_range_is_served_without_upstream(self):
+        self.cache_body()
+        response = self.proxy(HTTP_RANGE='bytes=0-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 0-3/{len(self.body)}')
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF')
+        self.session.get.assert_not_called()
+
+    def test_matching_etag_is_not_modified(self):
+        self.cache_body()
+        response = self.proxy(HTTP_IF_NONE_MATCH='"v1"')
+        self.assertEqual(response.status_code, 304)
+        self.session.get.assert_not_called()
+
+    def test_unsatisfiable_range(self):
+        self.cache_body()
+        response = self.proxy(HTTP_RANGE=f'bytes={len(self.body)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.body)}')
+
+    def test_upstream_partial_content_is_forwarded(self):
+        self.session.get.return_value = FakeUpstream(206, b'%PDF', {'Content-Range': f'bytes 0-3/{len(self.body)}'})
+        response = self.proxy(HTTP_RANGE='bytes=0-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 0-3/{len(self.body)}')
+        self.assertEqual(self.session.get.call_args.kwargs['headers']['Range'], 'bytes=0-3')
+        self.assertIsNone(pdf_proxy.pdf_disk_cache.get(self.url))
+
+    def test_range_on_a_refreshed_entry_that_was_pruned_goes_upstream(self):
+        self.cache_body()
+        refreshed = FakeUpstream(200, self.body + b' v2', {'ETag': '"v2"'})
+        partial = FakeUpstream(206, b'%PDF', {'Content-Range': 'bytes 0-3/28'})
+        self.session.get.side_effect = [refreshed, partial]
+        # Expired, and too large to stay cached once it's refreshed
+        with override_settings(CERTIFICATE_PDF_PROXY_CACHE_TTL=-1, CERTIFICATE_PDF_PROXY_CACHE_MAX_BYTES=1):
+            response = self.proxy(HTTP_RANGE='bytes=0-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF')
+        self.assertEqual(self.session.get.call_args.kwargs['headers']['Range'], 'bytes=0-3')
+
+
+class BatchIssuanceTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title='Course', description='', youtube_id='vid')
+        self.other_course = Course.objects.create(title='Other', description='', youtube_id='vid2')
+        self.passed = self.learner('passed', self.course, passed=True)
+        self.failed = self.learner('failed', self.course, passed=False)
+        self.certified = self.learner('certified', self.course, passed=True)
+        Certificate.objects.create(user=self.certified, course=self.course, certificate_id='existing')
+        self.included = self.learner('included', self.other_course, passed=True)
+        dynamic = Certificate.objects.create(user=self.included, course=self.course, certificate_id='dynamic')
+        CertificateCourse.objects.create(certificate=dynamic, course=self.other_course)
+
+    def learner(self, username, course, passed):
+        user = User.objects.create_user(username=username)
+        quiz, _ = Quiz.objects.get_or_create(course=course)
+        # Several passing attempts still make one completion
+        for score in (80, 90):
+            QuizAttempt.objects.create(user=user, quiz=quiz, score=score, passed=passed)
+        return user
+
+    def test_uncertified_completions(self):
+        self.assertEqual(batch.uncertified_completions(), [(self.passed.pk, self.course.pk)])
+        self.assertEqual(batch.uncertified_completions([self.other_course.pk]), [])
+
+    def test_create_missing_certificates_is_idempotent(self):
+        self.assertEqual(batch.create_missing_certificates(), 1)
+        self.assertEqual(batch.create_missing_certificates(), 0)
+        self.assertEqual(Certificate.objects.filter(user=self.passed, course=self.course).count(), 1)
+
+    def test_outstanding_certificates(self):
+        Certificate.objects.filter(certificate_id='existing').update(
+            render_status=Certificate.STAGE_SUCCEEDED, upload_status=Certificate.STAGE_SUCCEEDED
+        )
+        Certificate.objects.filter(certificate_id='dynamic').update(
+            render_status=Certificate.STAGE_SUCCEEDED, upload_status=Certificate.STAGE_FAILED
+        )
+        batch.create_missing_certificates()
+        outstanding = set(batch.outstanding_certificates([self.course.pk]).values_list('user__username', flat=True))
+        self.assertEqual(outstanding, {'included', 'passed'})
+        self.assertFalse(batch.outstanding_certificates([self.other_course.pk]).exists())
+
+    def test_batch_bounds_the_pdfs_in_flight(self):
+        lock = threading.Lock()
+        in_flight = {'now': 0, 'peak': 0}
+
+        def render(pk):
+            with lock:
+                in_flight['now'] += 1
+                in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+            return b'%PDF'
+
+        def finish(pk, version, pdf_bytes=None, render_error=None):
+            with lock:
+                in_flight['now'] -= 1
+            return True
+
+        def renderers(max_workers, mp_context, initializer):
+            return ThreadPoolExecutor(max_workers=max_workers)
+
+        with mock.patch.object(batch, 'ProcessPoolExecutor', renderers), \
+                mock.patch.object(batch, 'render_in_process', render), \
+                mock.patch.object(batch, 'finish_issuance', finish):
+            stats = batch.issue_certificates(render_processes=1, upload_concurrency=1)
+        self.assertEqual(stats['issued'], stats['queued'])
+        self.assertGreater(stats['queued'], 2)
+        self.assertLessEqual(in_flight['peak'], 2)
+
+    def test_admin_action_hands_off_to_the_batch_thread(self):
+        from courses.admin import CourseAdmin
+
+        admin = CourseAdmin(Course, mock.Mock())
+        with mock.patch('courses.admin.schedule_certificate_batch') as schedule, \
+                mock.patch.object(admin, 'message_user'):
+            admin.issue_pending_certificates(mock.Mock(), Course.objects.filter(pk=self.course.pk))
+        schedule.assert_called_once_with([self.course.pk])
+        self.assertTrue(Certificate.objects.filter(user=self.passed, course=self.course).exists())
+
+    def test_scheduled_batch_uses_the_fixed_render_process_count(self):
+        with override_settings(CERTIFICATE_ADMIN_BATCH_RENDER_PROCESSES=2), \
+                mock.patch.object(batch, 'issue_certificates') as issue:
+            batch.schedule_certificate_batch([self.course.pk]).result()
+        issue.assert_called_once_with(course_ids=[self.course.pk], render_processes=2)
@@ -8,339 +8,24 @@ import os
 import json
 import requests
 from datetime import datetime
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.pdfbase.pdfmetrics import stringWidth
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
-from reportlab.platypus import Paragraph
-from reportlab.platypus.flowables import Spacer
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
-from reportlab.lib.colors import black, blue, navy, white, red, green, yellow, cyan, Color
-from io import BytesIO
-import base64
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 from django.conf import settings
-import cloudinary
-import cloudinary.uploader
 import traceback
 import random
 import hashlib
 import time
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from rest_framework.authtoken.models import Token
 
 from .models import Certificate, CertificateVerification, CertificateCourse
 from .serializers import CertificateSerializer, CertificateVerificationSerializer, PublicCertificateSerializer
 from courses.models import Course
 from quizzes.models import QuizAttempt
-
-def generate_certificate_pdf(certificate, user, course):
-    """
-    Generate PDF certificate for a user and course
-    For dynamic certificates, include all the courses the user has completed
-    """
-    try:
-        # Create a BytesIO buffer to receive the PDF data
-        buffer = BytesIO()
-        
-        # Create the PDF object, using the BytesIO buffer as its "file"
-        # Changed to landscape for better certificate layout
-        p = canvas.Canvas(buffer, pagesize=landscape(letter))
-        p.setTitle(f"Certificate of Completion - {course.title}")
-        p.setAuthor("EduTube Learning Platform")
-        p.setSubject(f"Certificate for {user.username}")
-        p.setKeywords(["certificate", "education", "completion", "edutube"])
-        
-        width, height = landscape(letter)  # Landscape for better certificate format
-        
-        # Try to register fonts, fall back to default if not available
-        try:
-            font_path = os.path.join(settings.BASE_DIR, 'certificates', 'fonts')
-            regular_font = os.path.join(font_path, 'Roboto-Regular.ttf')
-            bold_font = os.path.join(font_path, 'Roboto-Bold.ttf')
-            
-            if os.path.exists(regular_font) and os.path.exists(bold_font):
-                pdfmetrics.registerFont(TTFont('Roboto', regular_font))
-                pdfmetrics.registerFont(TTFont('Roboto-Bold', bold_font))
-                regular_font_name = 'Roboto'
-                bold_font_name = 'Roboto-Bold'
-            else:
-                # Fall back to default fonts
-                regular_font_name = 'Helvetica'
-                bold_font_name = 'Helvetica-Bold'
-        except Exception as e:
-            print(f"Error registering fonts: {e}")
-            # Fall back to default fonts
-            regular_font_name = 'Helvetica'
-            bold_font_name = 'Helvetica-Bold'
-        
-        # Set up the certificate
-        p.setTitle(f"Certificate of Completion - {course.title}")
-        
-        # Draw certificate border with more elegant design
-        p.setStrokeColor(blue)
-        p.setLineWidth(3)
-        p.rect(30, 30, width - 60, height - 60, stroke=1, fill=0)
-        
-        # Add a subtle background color gradient
-        # Draw horizontal bands for a more elegant look
-        for y in range(30, int(height), 4):
-            opacity = 0.03 - (0.02 * (y / height))  # Gradually decrease opacity
-            if opacity > 0:
-                p.setFillColor(Color(0.8, 0.8, 1, alpha=opacity))
-                p.rect(30, y, width - 60, 2, fill=1, stroke=0)
-        
-        # Add decorative corners
-        corner_size = 20
-        p.setStrokeColor(blue)
-        p.setLineWidth(2)
-        
-        # Top-left corner
-        p.line(30, 30+corner_size, 30, 30)
-        p.line(30, 30, 30+corner_size, 30)
-        
-        # Top-right corner
-        p.line(width-30-corner_size, 30, width-30, 30)
-        p.line(width-30, 30, width-30, 30+corner_size)
-        
-        # Bottom-left corner
-        p.line(30, height-30-corner_size, 30, height-30)
-        p.line(30, height-30, 30+corner_size, height-30)
-        
-        # Bottom-right corner
-        p.line(width-30-corner_size, height-30, width-30, height-30)
-        p.line(width-30, height-30, width-30, height-30-corner_size)
-        
-        # Add certificate header
-        p.setFont(bold_font_name, 36)  # Increased font size
-        p.setFillColor(navy)
-        
-        # For dynamic certificates, use a different title
-        if certificate.is_dynamic and certificate.certificate_courses.count() > 1:
-            header_text = "CERTIFICATE OF ACHIEVEMENT"
-        else:
-            header_text = "CERTIFICATE OF COMPLETION"
-            
-        header_width = stringWidth(header_text, bold_font_name, 36)
-        p.drawString((width - header_width) / 2, height - 120, header_text)
-        
-        # Add decorative line
-        p.setStrokeColor(blue)
-        p.setLineWidth(2)
-        p.line(width/4, height-140, width*3/4, height-140)
-        
-        # Add certificate text
-        p.setFont(regular_font_name, 18)  # Increased font size
-        p.setFillColor(black)
-        p.drawCentredString(width/2, height-180, "This certificate is presented to")
-        
-        # Add user name
-        user_name = f"{user.first_name} {user.last_name}".strip()
-        if not user_name:
-            user_name = user.username
-        p.setFont(bold_font_name, 30)  # Larger font for name
-        p.setFillColor(navy)
-        p.drawCentredString(width/2, height-230, user_name)
-        
-        # Get quiz attempt to include score
-        quiz_attempt = None
-        try:
-            # Try to find a successful quiz attempt for this course by this user
-            quiz_attempts = QuizAttempt.objects.filter(
-                user=user, 
-                quiz__course=course,
-                passed=True
-            ).order_by('-score', '-created_at')
-            
-            if quiz_attempts.exists():
-                quiz_attempt = quiz_attempts.first()
-        except Exception as e:
-            print(f"Error retrieving quiz attempt: {e}")
-        
-        # For dynamic certificates, we'll present multiple courses
-        if certificate.is_dynamic and certificate.certificate_courses.count() > 0:
-            p.setFont(regular_font_name, 18)
-            p.setFillColor(black)
-            p.drawCentredString(width/2, height-280, "for successfully completing the following courses:")
-            
-            # Add course list
-            y_position = height - 330
-            
-            # Get all courses for this certificate
-            courses = certificate.certificate_courses.all().order_by('-added_at')
-            
-            for i, cert_course in enumerate(courses[:5]):  # Limit to 5 courses for space
-                course_title = cert_course.course.title
-                if len(course_title) > 40:
-                    course_title = course_title[:37] + "..."
-                    
-                p.setFont(bold_font_name, 16)
-                p.setFillColor(navy)
-                p.drawString(width/4, y_position, f"{i+1}. {course_title}")
-                
-                # Add completion date and score
-                p.setFont(regular_font_name, 14)
-                p.setFillColor(black)
-                completion_date = cert_course.added_at.strftime("%B %d, %Y")
-                p.drawString(width/4, y_position - 20, f"Completed: {completion_date} | Score: {cert_course.quiz_score:.1f}%")
-                
-                y_position -= 40
-                
-            # If there are more courses, indicate this
-            if certificate.certificate_courses.count() > 5:
-                p.setFont(regular_font_name, 14)
-                p.setFillColor(black)
-                more_count = certificate.certificate_courses.count() - 5
-                p.drawString(width/4, y_position, f"+ {more_count} more course(s). View all online.")
-                
-                y_position -= 30
-        else:
-            # Single course certificate (original behavior)
-            p.setFont(regular_font_name, 18)
-            p.setFillColor(black)
-            p.drawCentredString(width/2, height-280, "for successfully completing the course")
-            
-            # Add course title
-            p.setFont(bold_font_name, 24)  # Larger font
-            p.setFillColor(navy)
-            
-            # Handle long course titles by splitting them
-            course_title = course.title
-            if len(course_title) > 40:
-                # Split the title for better display
-                words = course_title.split()
-                first_line = ' '.join(words[:len(words)//2])
-                second_line = ' '.join(words[len(words)//2:])
-                p.drawCentredString(width/2, height-330, first_line)
-                p.drawCentredString(width/2, height-360, second_line)
-                
-                y_position = height - 410
-            else:
-                p.drawCentredString(width/2, height-330, course_title)
-                
-                y_position = height - 380
-            
-            # Add score if available
-            if quiz_attempt:
-                p.setFont(bold_font_name, 20)
-                p.setFillColor(blue)
-                p.drawCentredString(width/2, y_position, f"Score: {quiz_attempt.score:.1f}%")
-                y_position -= 40
-        
-        # Add certificate date
-        p.setFont(regular_font_name, 16)
-        p.setFillColor(black)
-        issue_date = certificate.last_updated.strftime("%B %d, %Y")
-        p.drawCentredString(width/2, y_position, f"Last Updated: {issue_date}")
-        
-        # Add "Certified by EduTube" text
-        p.setFont(bold_font_name, 18)
-        p.setFillColor(navy)
-        p.drawCentredString(width/2, 100, "Certified by EduTube Learning Platform")
-        
-        # Add certificate ID
-        p.setFont(regular_font_name, 11)
-        p.setFillColor(black)
-        p.drawString(50, 50, f"Certificate ID: {certificate.certificate_id}")
-        
-        # Add verification info - use IPFS URL if available
-        p.setFont(regular_font_name, 11)
-        if certificate.ipfs_hash and not certificate.ipfs_hash.startswith('ipfs-placeholder'):
-            p.drawString(50, 65, f"Verify at: https://ipfs.io/ipfs/{certificate.ipfs_hash}")
-        else:
-            # Fallback to site URL
-            p.drawString(50, 65, f"Verify at: {settings.SITE_URL}/verify/{certificate.certificate_id}")
-        
-        # Add blockchain verification if available
-        if certificate.blockchain_tx and not certificate.blockchain_tx.startswith('0x00000'):
-            p.setFont(regular_font_name, 9)
-            p.setFillColor(black)
-            p.drawString(50, 80, f"Blockchain verification: {certificate.blockchain_tx[:20]}...")
-            if certificate.blockchain_tx.startswith('0x'):
-                p.drawString(50, 90, f"View on Polygon Scan: https://mumbai.polygonscan.com/tx/{certificate.blockchain_tx}")
-        
-        # Add dynamic certificate badge if applicable
-        if certificate.is_dynamic:
-            p.setFont(bold_font_name, 11)
-            p.setFillColor(blue)
-            p.drawRightString(width-50, 80, "DYNAMIC CERTIFICATE")
-        
-        # Close the PDF object cleanly
-        p.showPage()
-        p.save()
-        
-        # Return the PDF data
-        buffer.seek(0)
-        return buffer
-    except Exception as e:
-        print(f"Error generating certificate PDF: {str(e)}")
-        # Create a simple error PDF to return
-        buffer = BytesIO()
-        p = canvas.Canvas(buffer, pagesize=landscape(letter))
-        p.setTitle("Error Certificate")
-        p.drawString(100, 400, f"Error generating certificate: {str(e)}")
-        p.showPage()
-        p.save()
-        buffer.seek(0)
-        return buffer
-
-def upload_to_cloudinary(pdf_buffer, certificate_id):
-    """
-    Upload a PDF file to Cloudinary
-    """
-    try:
-        # Configure Cloudinary if not already configured
-        try:
-            # Check if Cloudinary is already configured
-            cloudinary.config().cloud_name
-        except:
-            # Configure Cloudinary with environment variables
-            cloudinary.config(
-                cloud_name=os.environ.get('CLOUDINARY_CLOUD_NAME', ''),
-                api_key=os.environ.get('CLOUDINARY_API_KEY', ''),
-                api_secret=os.environ.get('CLOUDINARY_API_SECRET', ''),
-                secure=True
-            )
-        
-        # Add timestamp to prevent caching issues
-        timestamp = int(datetime.now().timestamp())
-        
-        # Upload the PDF to Cloudinary with improved parameters
-        result = cloudinary.uploader.upload(
-            pdf_buffer,
-            public_id=f"certificates/{certificate_id}_{timestamp}",
-            folder="edutube",
-            resource_type="raw",
-            format="pdf",
-            type="upload",
-            overwrite=True,
-            use_filename=True,
-            unique_filename=True,
-            flags="attachment",
-            tags=["certificate", "pdf", "edutube"],
-            quality="auto:best",
-            access_mode="public",
-            # Add these additional parameters to ensure public accessibility
-            delivery_type="upload",
-            invalidate=True,
-            accessibility_analysis=True,
-            public_access="true"
-        )
-        
-        print(f"Cloudinary upload success! URL: {result['secure_url']}")
-        
-        # The secure_url is the URL with HTTPS
-        # Return both secure and regular URLs for flexibility
-        return result['secure_url']
-    except Exception as e:
-        print(f"Error uploading certificate to Cloudinary: {str(e)}")
-        traceback.print_exc()  # Print detailed stack trace
-        return None
+from .services.issuance import STAGE_RENDER, STAGE_UPLOAD, enqueue_certificate_issuance, schedule_certificate_issuance
+from .services.pdf_cache import get_certificate_pdf
+from .services.pdf_proxy import proxy_pdf
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
@@ -586,6 +271,40 @@ def get_quiz_score(user, course):
     
     return 100  # Default to 100% if no score found
 
+def _certificate_count(model, **filters):
+    """
+    Correlated COUNT(*) of a certificate's related rows
+    """
+    rows = (
+        model.objects
+        .filter(certificate=OuterRef('pk'), **filters)
+        .order_by()
+        .values('certificate')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+def annotate_certificate_counts(queryset):
+    """
+    Annotate course and verification counts read by CertificateSerializer.
+
+    Subqueries are used instead of joins so certificates with thousands of
+    verifications don't multiply the rows of the main query.
+    """
+    last_verified = (
+        CertificateVerification.objects
+        .filter(certificate=OuterRef('pk'))
+        .order_by('-created_at')
+        .values('created_at')[:1]
+    )
+    return queryset.annotate(
+        course_count=_certificate_count(CertificateCourse),
+        verification_count=_certificate_count(CertificateVerification),
+        valid_verification_count=_certificate_count(CertificateVerification, is_valid=True),
+        last_verified_at=Subquery(last_verified),
+    )
+
 class CertificateViewSet(viewsets.ModelViewSet):
     """
     ViewSet for certificates
@@ -597,7 +316,15 @@ class CertificateViewSet(viewsets.ModelViewSet):
         """
         Return only the current user's certificates
         """
-        return Certificate.objects.filter(user=self.request.user)
+        queryset = Certificate.objects.filter(user=self.request.user)
+        if self.action in ['list', 'retrieve']:
+            # Everything CertificateSerializer reads, in a fixed number of queries
+            queryset = annotate_certificate_counts(
+                queryset
+                .select_related('user', 'course')
+                .prefetch_related('course__lessons', 'certificate_courses__course__lessons')
+            )
+        return queryset
     
     @action(detail=True, methods=['post'])
     def add_course(self, request, pk=None):
@@ -656,18 +383,9 @@ class CertificateViewSet(viewsets.ModelViewSet):
         })
         certificate.save()
         
-        # Generate a new PDF with the updated information
-        pdf_buffer = generate_certificate_pdf(certificate, request.user, certificate.course)
-        
-        # Upload the PDF to Cloudinary
-        cloudinary_url = upload_to_cloudinary(pdf_buffer.getvalue(), certificate.certificate_id)
-        
-        if cloudinary_url:
-            certificate.pdf_url = cloudinary_url
-            certificate.save()
-        
-        # Upload to IPFS (optional - only if you want to update the blockchain record)
-        # This would require minting a new NFT or updating the existing one
+        # Re-issue the PDF with the updated information in the background
+        # (IPFS is only pinned at issue time, so the pin is left as it is)
+        enqueue_certificate_issuance(certificate, stages=[STAGE_RENDER, STAGE_UPLOAD])
         
         return Response({
             'message': f'Course {course.title} added to certificate',
@@ -714,54 +432,12 @@ class CertificateViewSet(viewsets.ModelViewSet):
             
             print(f"New certificate created with ID: {certificate_id}")
             
-            try:
-                # Generate PDF certificate
-                pdf_buffer = generate_certificate_pdf(certificate, request.user, course)
-                
-                # Try Cloudinary upload
-                cloudinary_url = None
-                try:
-                    print(f"Uploading certificate {certificate_id} to Cloudinary...")
-                    cloudinary_url = upload_to_cloudinary(pdf_buffer.getvalue(), certificate_id)
-                    print(f"Cloudinary upload result: {cloudinary_url}")
-                except Exception as cloud_error:
-                    print(f"Cloudinary upload failed: {str(cloud_error)}")
-                    traceback.print_exc()
-                
-                if cloudinary_url:
-                    certificate.pdf_url = cloudinary_url
-                    certificate.save()
-                    print(f"Certificate {certificate_id} saved with Cloudinary URL: {cloudinary_url}")
-                else:
-                    # Fallback to local storage if Cloudinary upload fails
-                    print(f"Falling back to local storage for certificate {certificate_id}")
-                    pdf_path = f'certificates/{certificate_id}.pdf'
-                    default_storage.save(pdf_path, ContentFile(pdf_buffer.getvalue()))
-                    certificate.pdf_url = f"{settings.MEDIA_URL}{pdf_path}"
-                    certificate.save()
-                
-                # Try to upload to IPFS if configurations are available
-                try:
-                    # Upload to IPFS via Pinata if credentials are available
-                    pinata_api_key = os.environ.get('PINATA_API_KEY')
-                    pinata_secret_key = os.environ.get('PINATA_SECRET_API_KEY')
-                    
-                    if pinata_api_key and pinata_secret_key:
-                        self._upload_to_ipfs(certificate, pdf_buffer, course)
-                except Exception as ipfs_error:
-                    print(f"IPFS upload error (non-critical): {str(ipfs_error)}")
-                
-                serializer = self.get_serializer(certificate)
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
-                
-            except Exception as e:
-                # If certificate creation fails, delete the certificate
-                print(f"Error during certificate creation: {str(e)}")
-                traceback.print_exc()
-                certificate.delete()
-                return Response({
-                    'error': f'Failed to generate certificate: {str(e)}'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            # Render, upload and pin the PDF in the background; the certificate
+            # is returned straight away with its stages pending
+            schedule_certificate_issuance(certificate)
+            
+            serializer = self.get_serializer(certificate)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
             return Response({
                 'error': 'You must pass the quiz to get a certificate. Please complete the quiz first.'
@@ -770,25 +446,25 @@ class CertificateViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
         """
-        Download the certificate PDF
+        Download the certificate PDF, re-rendered only when its content changed
         """
         try:
             certificate = self.get_object()
-            print(f"Generating download for certificate: {certificate.certificate_id}")
-            
-            # Generate PDF
-            pdf_buffer = generate_certificate_pdf(certificate, certificate.user, certificate.course)
+            rendered = get_certificate_pdf(certificate)
             
-            # Get the PDF bytes
-            pdf_bytes = pdf_buffer.getvalue()
-            
-            # Set up proper response with correct headers
-            response = Response(pdf_bytes, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename=certificate-{certificate.certificate_id}.pdf'
-            response['Content-Length'] = len(pdf_bytes)
-            response['Access-Control-Expose-Headers'] = 'Content-Disposition, Content-Length'
+            if rendered.etag in parse_etags(request.headers.get('If-None-Match', '')):
+                response = HttpResponseNotModified()
+            else:
+                response = FileResponse(
+                    rendered.open(),
+                    content_type='application/pdf',
+                    as_attachment=True,
+                    filename=f'certificate-{certificate.certificate_id}.pdf'
+                )
+                response['Access-Control-Expose-Headers'] = 'Content-Disposition, Content-Length'
             
-            print(f"PDF generation successful, size: {len(pdf_bytes)} bytes")
+            response['ETag'] = rendered.etag
+            response['Cache-Control'] = 'private, no-cache'
             return response
             
         except Exception as e:
@@ -797,55 +473,6 @@ class CertificateViewSet(viewsets.ModelViewSet):
                 'error': f'Failed to generate PDF: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def _upload_to_ipfs(self, certificate, pdf_buffer, course):
-        """
-        Helper method to upload a certificate to IPFS via Pinata
-        """
-        pinata_api_key = os.environ.get('PINATA_API_KEY')
-        pinata_secret_key = os.environ.get('PINATA_SECRET_API_KEY')
-        
-        # Upload to IPFS via Pinata
-        pinata_url = "https://api.pinata.cloud/pinning/pinFileToIPFS"
-        
-        # Prepare file for upload
-        files = {
-            'file': ('certificate.pdf', pdf_buffer.getvalue(), 'application/pdf')
-        }
-        
-        # Metadata for the file
-        data = {
-            'pinataMetadata': json.dumps({
-                'name': f'EduTube Certificate - {course.title}',
-                'keyvalues': {
-                    'certificateId': certificate.certificate_id,
-                    'userId': str(certificate.user.id),
-                    'courseId': str(course.id),
-                    'issueDate': datetime.now().isoformat()
-                }
-            })
-        }
-        
-        # Headers for the request
-        headers = {
-            'pinata_api_key': pinata_api_key,
-            'pinata_secret_api_key': pinata_secret_key
-        }
-        
-        # Make the request to Pinata
-        response = requests.post(pinata_url, files=files, data=data, headers=headers)
-        
-        if response.status_code == 200:
-            # Get the IPFS hash from the response
-            response_json = response.json()
-            ipfs_hash = response_json.get('IpfsHash')
-            
-            if ipfs_hash:
-                certificate.ipfs_hash = ipfs_hash
-                certificate.save()
-                return True
-        
-        return False
-
 class CertificateVerificationViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for certificate verifications (admin only)
@@ -885,8 +512,8 @@ def serve_pdf(request, certificate_id):
         
         # If not owner or staff, this could be a public verification check
         if not is_owner and not is_staff:
-            # Only allow access if the certificate is verified
-            if not certificate.is_verified:
+            # Only allow access if the certificate is still valid
+            if not certificate.is_valid:
                 return Response(
                     {"error": "You do not have permission to view this certificate"}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -895,30 +522,37 @@ def serve_pdf(request, certificate_id):
         # Get the PDF URL from Cloudinary
         pdf_url = certificate.pdf_url
         
-        if not pdf_url:
-            return Response(
-                {"error": "PDF not available for this certificate"}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
+        if not pdf_url or not pdf_url.startswith(('http://', 'https://')):
+            # Not uploaded yet, or only saved to local media: serve the local render
+            rendered = get_certificate_pdf(certificate)
+            django_response = FileResponse(rendered.open(), content_type='application/pdf')
+            django_response['Content-Disposition'] = f'inline; filename="certificate-{certificate_id}.pdf"'
+            django_response['ETag'] = rendered.etag
+            django_response['Cache-Control'] = 'private, no-cache'
+            return django_response
         
-        # Download the PDF from Cloudinary
-        response = requests.get(pdf_url)
+        # Stream the PDF from Cloudinary (or the local copy of it)
+        django_response = proxy_pdf(request, pdf_url)
         
-        if response.status_code != 200:
+        if django_response is None:
             return Response(
-                {"error": f"Failed to fetch PDF from cloud storage: {response.status_code}"}, 
+                {"error": "Failed to fetch PDF from cloud storage"}, 
                 status=status.HTTP_502_BAD_GATEWAY
             )
         
-        # Create a Django response with the PDF content
-        django_response = HttpResponse(response.content, content_type='application/pdf')
         django_response['Content-Disposition'] = f'inline; filename="certificate-{certificate_id}.pdf"'
-        
-        # Add Cache-Control headers to improve performance
-        django_response['Cache-Control'] = 'public, max-age=31536000'
+        # Each re-issue uploads to a new timestamped public_id, but this endpoint's
+        # URL doesn't change with it, so browsers revalidate
+        django_response['Cache-Control'] = 'private, no-cache'
         
         return django_response
         
+    except requests.RequestException as e:
+        print(f"Error fetching PDF from cloud storage: {str(e)}")
+        return Response(
+            {"error": "Failed to fetch PDF from cloud storage"}, 
+            status=status.HTTP_502_BAD_GATEWAY
+        )
     except Certificate.DoesNotExist:
         return Response(
             {"error": "Certificate not found"}, 
@@ -0,0 +1,183 @@
+"""
+Shared Redis cache with a small in-process tier in front of it.
+
+``TieredRedisCache`` is Django's ``RedisCache`` (one connection pool per
+process) plus:
+
+* an L1 ``LocMemCache`` per process, holding recently read keys for a few
+  seconds so hot keys don't cost a Redis round trip on every request. Other
+  workers can see a stale value for up to ``L1_TIMEOUT`` seconds after a
+  write or delete.
+* a local-memory fallback used while Redis is unreachable, so the site keeps
+  working (with per-process caching) instead of failing requests. Redis is
+  retried after ``RETRY_AFTER`` seconds.
+
+Configure it in ``CACHES``::
+
+    'default': {
+        'BACKEND': 'core.cache.TieredRedisCache',
+        'LOCATION': REDIS_URL,
+        'L1_TIMEOUT': 5,
+        'L1_MAX_ENTRIES': 500,
+        'RETRY_AFTER': 30,
+        'OPTIONS': {'max_connections': 50},  # Passed to the connection pool
+    }
+"""
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+try:
+    from redis.exceptions import RedisError
+except ImportError:  # pragma: no cover - redis is required by RedisCache anyway
+    RedisError = Exception
+
+# Errors that mean Redis is unreachable rather than a bug in the caller
+REDIS_ERRORS = (RedisError, OSError)
+
+_MISSING = object()
+
+
+class TieredRedisCache(RedisCache):
+    """
+    Redis cache with an in-process L1 tier and a local fallback
+    """
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self.l1_timeout = params.get('L1_TIMEOUT', 5)
+        self.retry_after = params.get('RETRY_AFTER', 30)
+        self._l1 = LocMemCache(f'l1-{id(self)}', {
+            'TIMEOUT': self.l1_timeout,
+            'OPTIONS': {'MAX_ENTRIES': params.get('L1_MAX_ENTRIES', 500)},
+        })
+        self._fallback = LocMemCache(f'fallback-{id(self)}', {
+            'TIMEOUT': self.default_timeout,
+            'OPTIONS': {'MAX_ENTRIES': params.get('FALLBACK_MAX_ENTRIES', 1000)},
+        })
+        self._down_until = 0
+        self._state_lock = threading.Lock()
+
+    # Redis availability
+
+    def redis_available(self):
+        return time.monotonic() >= self._down_until
+
+    def _mark_down(self, error):
+        with self._state_lock:
+            if self.redis_available():
+                print(f"Redis cache unavailable, using local memory for {self.retry_after}s: {str(error)}")
+            self._down_until = time.monotonic() + self.retry_after
+
+    def _redis(self, method, *args, **kwargs):
+        """
+        Call the Redis backend, returning _MISSING if Redis is down
+        """
+        if not self.redis_available():
+            return _MISSING
+        try:
+            return getattr(super(), method)(*args, **kwargs)
+        except REDIS_ERRORS as e:
+            self._mark_down(e)
+            return _MISSING
+
+    def _l1_timeout(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return self.l1_timeout if timeout is None else min(timeout, self.l1_timeout)
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        value = self._l1.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+
+        value = self._redis('get', key, _MISSING, version=version)
+        if value is _MISSING:
+            if self.redis_available():
+                return default
+            return self._fallback.get(key, default, version=version)
+
+        self._l1.set(key, value, self.l1_timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._redis('set', key, value, timeout, version=version) is _MISSING:
+            self._fallback.set(key, value, timeout, version=version)
+        self._l1.set(key, value, self._l1_timeout(timeout), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self._redis('add', key, value, timeout, version=version)
+        if added is _MISSING:
+            added = self._fallback.add(key, value, timeout, version=version)
+        if added:
+            self._l1.set(key, value, self._l1_timeout(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        touched = self._redis('touch', key, timeout, version=version)
+        if touched is _MISSING:
+            return self._fallback.touch(key, timeout, version=version)
+        return touched
+
+    def delete(self, key, version=None):
+        self._l1.delete(key, version=version)
+        self._fallback.delete(key, version=version)
+        deleted = self._redis('delete', key, version=version)
+        return False if deleted is _MISSING else bool(deleted)
+
+    def has_key(self, key, version=None):
+        if self._l1.has_key(key, version=version):
+            return True
+        found = self._redis('has_key', key, version=version)
+        if found is _MISSING:
+            return self._fallback.has_key(key, version=version)
+        return found
+
+    def incr(self, key, delta=1, version=None):
+        # Counters always go to the shared tier so workers agree on them
+        self._l1.delete(key, version=version)
+        value = self._redis('incr', key, delta, version=version)
+        if value is _MISSING:
+            return self._fallback.incr(key, delta, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._l1.get(key, _MISSING, version=version)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+
+        if missing:
+            values = self._redis('get_many', missing, version=version)
+            if values is _MISSING:
+                values = self._fallback.get_many(missing, version=version)
+            else:
+                for key, value in values.items():
+                    self._l1.set(key, value, self.l1_timeout, version=version)
+            found.update(values)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._redis('set_many', data, timeout, version=version) is _MISSING:
+            self._fallback.set_many(data, timeout, version=version)
+        self._l1.set_many(data, self._l1_timeout(timeout), version=version)
+        return []
+
+    def delete_many(self, keys, version=None):
+        self._l1.delete_many(keys, version=version)
+        self._fallback.delete_many(keys, version=version)
+        self._redis('delete_many', keys, version=version)
+
+    def clear(self):
+        self._l1.clear()
+        self._fallback.clear()
+        cleared = self._redis('clear')
+        return False if cleared is _MISSING else cleared
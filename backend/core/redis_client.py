@@ -0,0 +1,33 @@
+"""
+Shared Redis connection.
+
+Returns ``None`` when ``REDIS_URL`` isn't configured so callers can fall back
+to the database or process-local state.
+"""
+import threading
+
+from django.conf import settings
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_redis_client():
+    """
+    Return the process-wide Redis client, or None if Redis isn't configured
+    """
+    global _client
+    redis_url = getattr(settings, 'REDIS_URL', '')
+    if not redis_url:
+        return None
+
+    with _lock:
+        if _client is None:
+            import redis
+            _client = redis.Redis.from_url(
+                redis_url,
+                decode_responses=True,
+                socket_timeout=getattr(settings, 'REDIS_SOCKET_TIMEOUT', 2),
+                socket_connect_timeout=getattr(settings, 'REDIS_SOCKET_TIMEOUT', 2)
+            )
+        return _client
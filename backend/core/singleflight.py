@@ -0,0 +1,126 @@
+"""
+Single-flight locks for expensive work that should only run once.
+
+The first caller to acquire a key becomes the leader and does the work;
+everyone else waits for the lock to be released and then reads the leader's
+result. The lock lives in Redis (``SET NX`` with an expiry) when it is
+configured, falls back to a PostgreSQL advisory lock, and finally to a
+process-local lock for SQLite development setups.
+"""
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import connection
+
+from .redis_client import get_redis_client
+
+# Only delete the key if we still own it, so an expired lock that another
+# leader has since taken isn't released by mistake
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+
+class SingleFlight:
+    """
+    Named lock with leader/follower semantics
+    """
+
+    def __init__(self, key, ttl=None, poll_interval=0.5):
+        self.key = f"singleflight:{key}"
+        self.ttl = ttl or getattr(settings, 'SINGLEFLIGHT_LOCK_TTL', 300)
+        self.poll_interval = poll_interval
+        self.token = uuid.uuid4().hex
+        self.backend = None
+
+    def acquire(self):
+        """
+        Try to become the leader without blocking
+        """
+        client = get_redis_client()
+        if client is not None:
+            try:
+                acquired = client.set(self.key, self.token, nx=True, ex=self.ttl)
+                self.backend = 'redis' if acquired else None
+                return bool(acquired)
+            except Exception as e:
+                print(f"Redis lock unavailable, falling back: {str(e)}")
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", [self._advisory_key()])
+                acquired = cursor.fetchone()[0]
+            self.backend = 'advisory' if acquired else None
+            return bool(acquired)
+
+        acquired = self._local_lock().acquire(blocking=False)
+        self.backend = 'local' if acquired else None
+        return acquired
+
+    def release(self):
+        """
+        Release the lock if this instance holds it
+        """
+        backend, self.backend = self.backend, None
+        if backend == 'redis':
+            try:
+                client = get_redis_client()
+                client.eval(RELEASE_SCRIPT, 1, self.key, self.token)
+            except Exception as e:
+                # The key expires on its own
+                print(f"Failed to release Redis lock {self.key}: {str(e)}")
+        elif backend == 'advisory':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [self._advisory_key()])
+        elif backend == 'local':
+            self._local_lock().release()
+
+    def is_locked(self):
+        """
+        Check whether a leader currently holds the lock
+        """
+        client = get_redis_client()
+        if client is not None:
+            try:
+                return bool(client.exists(self.key))
+            except Exception:
+                pass
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", [self._advisory_key()])
+                acquired = cursor.fetchone()[0]
+                if acquired:
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", [self._advisory_key()])
+            return not acquired
+
+        return self._local_lock().locked()
+
+    def wait(self, timeout):
+        """
+        Block until the leader releases the lock. Returns False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while self.is_locked():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+        return True
+
+    def _advisory_key(self):
+        # Advisory locks take a signed 64-bit integer
+        digest = hashlib.sha1(self.key.encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big', signed=True)
+
+    def _local_lock(self):
+        with _local_locks_guard:
+            return _local_locks.setdefault(self.key, threading.Lock())
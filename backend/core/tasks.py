@@ -0,0 +1,68 @@
+"""
+In-process background task pools.
+
+Work that shouldn't hold a gunicorn worker thread (quiz generation, syncs,
+uploads) is handed to a small thread pool inside the same process. Each task
+gets its own database connection, which is closed when the task finishes.
+"""
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+class BackgroundPool:
+    """
+    Lazily created, bounded thread pool for background tasks
+    """
+
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` on the pool and return its future
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+            executor = self._executor
+        return executor.submit(self._run, fn, *args, **kwargs)
+
+    def shutdown(self, wait=True):
+        """
+        Stop the pool's threads; it starts again on the next ``submit``
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _run(self, fn, *args, **kwargs):
+        """
+        Run a task with a fresh database connection and log any failure
+        """
+        close_old_connections()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            print(f"Background task {getattr(fn, '__name__', fn)} failed: {str(e)}")
+            traceback.print_exc()
+            raise
+        finally:
+            close_old_connections()
+
+
+default_pool = BackgroundPool('background', getattr(settings, 'BACKGROUND_WORKERS', 4))
+
+
+def run_in_background(fn, *args, **kwargs):
+    """
+    Run ``fn`` on the shared default background pool
+    """
+    return default_pool.submit(fn, *args, **kwargs)
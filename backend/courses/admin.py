@@ -1,3 +1,26 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-# Register your models here.
+from certificates.services.batch import create_missing_certificates, schedule_certificate_batch
+
+from .models import Course
+
+
+@admin.register(Course)
+class CourseAdmin(admin.ModelAdmin):
+    list_display = ['title', 'youtube_id', 'is_playlist', 'difficulty', 'created_at']
+    list_filter = ['is_playlist', 'difficulty']
+    search_fields = ['title', 'youtube_id']
+    actions = ['issue_pending_certificates']
+
+    @admin.action(description='Issue certificates to learners who passed')
+    def issue_pending_certificates(self, request, queryset):
+        course_ids = list(queryset.values_list('pk', flat=True))
+        # Rows are created right away; PDFs are issued by the batch thread and
+        # anything left unfinished is picked up by `manage.py issue_certificates`
+        created = create_missing_certificates(course_ids)
+        schedule_certificate_batch(course_ids)
+        self.message_user(
+            request,
+            f"Created {created} certificates; issuing PDFs in the background",
+            messages.SUCCESS
+        )
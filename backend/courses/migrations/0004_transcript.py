@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_alter_course_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Transcript',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('video_id', models.CharField(max_length=100)),
+                ('language', models.CharField(default='en', max_length=20)),
+                ('segments', models.JSONField(default=list)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+            options={
+                'unique_together': {('video_id', 'language')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_transcript'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='YouTubeResource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('kind', models.CharField(choices=[('video', 'Video'), ('playlist', 'Playlist')], max_length=20)),
+                ('youtube_id', models.CharField(max_length=100)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('is_available', models.BooleanField(default=True)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+            options={
+                'unique_together': {('kind', 'youtube_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_playlist_lesson_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='lessons_sync_attempted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
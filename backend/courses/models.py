@@ -18,6 +18,8 @@ class Course(TimeStampedModel):
     is_playlist = models.BooleanField(default=False)
     thumbnail_url = models.URLField(blank=True, null=True)
     difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES, default='basic')
+    lessons_synced_at = models.DateTimeField(null=True, blank=True)  # When playlist lessons were last synced from YouTube
+    lessons_sync_attempted_at = models.DateTimeField(null=True, blank=True)  # When a lesson sync was last scheduled, successful or not
     
     class Meta:
         ordering = ['-created_at']  # Order by creation date (newest first)
@@ -53,9 +55,59 @@ class Lesson(TimeStampedModel):
     youtube_id = models.CharField(max_length=100)
     order = models.PositiveIntegerField(default=0)
     duration = models.CharField(max_length=10, blank=True, null=True)  # Duration in minutes:seconds
+    playlist_item_id = models.CharField(max_length=100, blank=True, default='')  # YouTube playlist item this lesson was synced from
+    etag = models.CharField(max_length=100, blank=True, default='')  # Playlist item etag at the last sync
+    published_at = models.DateTimeField(null=True, blank=True)  # When the video was published
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['course', 'order']),
+        ]
     
     def __str__(self):
         return self.title
+
+class Transcript(TimeStampedModel):
+    """
+    Cached YouTube transcript for a single video and language
+    """
+    video_id = models.CharField(max_length=100)
+    language = models.CharField(max_length=20, default='en')
+    segments = models.JSONField(default=list)  # Raw transcript segments (text, start, duration)
+    content_hash = models.CharField(max_length=64)  # SHA-256 of the segment data
+    fetched_at = models.DateTimeField()  # When the transcript was last fetched from YouTube
+    
+    class Meta:
+        unique_together = ('video_id', 'language')
+    
+    def __str__(self):
+        return f"Transcript {self.video_id} ({self.language})"
+    
+    @property
+    def text(self):
+        """
+        The transcript as plain text
+        """
+        return " ".join([entry['text'] for entry in self.segments])
+
+class YouTubeResource(TimeStampedModel):
+    """
+    Stored YouTube video or playlist metadata, keyed by kind and ID
+    """
+    KIND_CHOICES = [
+        ('video', 'Video'),
+        ('playlist', 'Playlist'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    youtube_id = models.CharField(max_length=100)
+    data = models.JSONField(default=dict, blank=True)  # Raw API resource (snippet, contentDetails, ...)
+    is_available = models.BooleanField(default=True)  # False when the API no longer returns it
+    fetched_at = models.DateTimeField()  # When the metadata was last fetched from YouTube
+    
+    class Meta:
+        unique_together = ('kind', 'youtube_id')
+    
+    def __str__(self):
+        return f"YouTube {self.kind} {self.youtube_id}"
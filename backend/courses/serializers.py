@@ -2,6 +2,29 @@ from rest_framework import serializers
 from .models import Course, Lesson, UserCourse
 from django.contrib.auth.models import User
 
+def get_lesson_count(course):
+    """
+    Count a course's lessons without a query when the view already loaded them
+    """
+    # Prefer the count annotated by the view, then prefetched lessons
+    lesson_count = getattr(course, 'lesson_count', None)
+    if lesson_count is not None:
+        return lesson_count
+    if 'lessons' in getattr(course, '_prefetched_objects_cache', {}):
+        return len(course.lessons.all())
+    return course.lessons.count()
+
+class SparseFieldsMixin:
+    """
+    Limit a serializer's output to the ``fields`` passed to its constructor
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
 class LessonSerializer(serializers.ModelSerializer):
     """
     Serializer for the Lesson model
@@ -11,7 +34,7 @@ class LessonSerializer(serializers.ModelSerializer):
         fields = ['id', 'course', 'title', 'description', 'youtube_id', 'order', 'duration', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Course model
     """
@@ -20,14 +43,31 @@ class CourseSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Course
-        fields = ['id', 'title', 'description', 'youtube_id', 'is_playlist', 'thumbnail_url', 'difficulty', 'lessons', 'lesson_count', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        fields = ['id', 'title', 'description', 'youtube_id', 'is_playlist', 'thumbnail_url', 'difficulty', 'lessons', 'lesson_count', 'lessons_synced_at', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'lessons_synced_at', 'created_at', 'updated_at']
+    
+    def get_lesson_count(self, obj):
+        """
+        Get the number of lessons in the course
+        """
+        return get_lesson_count(obj)
+
+class CourseSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Slim course representation for list views (course cards)
+    """
+    lesson_count = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Course
+        fields = ['id', 'title', 'thumbnail_url', 'difficulty', 'lesson_count']
+        read_only_fields = fields
     
     def get_lesson_count(self, obj):
         """
         Get the number of lessons in the course
         """
-        return obj.lessons.count()
+        return get_lesson_count(obj)
 
 class UserCourseSerializer(serializers.ModelSerializer):
     """
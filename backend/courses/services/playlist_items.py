@@ -0,0 +1,92 @@
+"""
+Cached pages of a playlist's videos for the playlist page.
+
+``get_playlist_items_page`` returns one page as
+``{'items': [...], 'next_cursor': ..., 'page_size': ...}``. The cursor is
+YouTube's page token, so the client continues from where it stopped instead
+of re-fetching the first page. Each page is cached for
+``YOUTUBE_PLAYLIST_ITEMS_CACHE_TTL`` seconds together with an ETag computed
+from its content, which the view uses to answer ``If-None-Match`` with 304.
+Video details come from ``youtube_metadata`` so they are shared with search
+and lesson sync.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .playlist_sync import PAGE_SIZE, fetch_playlist_page
+from .youtube_metadata import youtube_metadata
+from .youtube_service import require_youtube_service
+
+KEY_PREFIX = 'youtube-playlist-items:v1'
+
+
+def format_playlist_item(item, video_details):
+    snippet = item['snippet']
+    content_details = video_details.get('contentDetails', {})
+    statistics = video_details.get('statistics', {})
+    return {
+        'id': item['contentDetails']['videoId'],
+        'title': snippet.get('title', ''),
+        'description': snippet.get('description', ''),
+        'thumbnail': snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
+        'channelTitle': snippet.get('channelTitle', ''),
+        'duration': content_details.get('duration', ''),
+        'viewCount': statistics.get('viewCount', 0),
+        'publishedAt': snippet.get('publishedAt', '')
+    }
+
+
+def clamp_page_size(page_size):
+    """
+    Parse a requested page size, limited to what one API call returns
+    """
+    if page_size in (None, ''):
+        return getattr(settings, 'YOUTUBE_PLAYLIST_PAGE_SIZE', PAGE_SIZE)
+    page_size = int(page_size)
+    if page_size < 1:
+        raise ValueError('page_size must be a positive integer')
+    return min(page_size, PAGE_SIZE)
+
+
+def make_etag(page):
+    digest = hashlib.sha1(json.dumps(page, sort_keys=True).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def cache_key(playlist_id, cursor, page_size):
+    return f"{KEY_PREFIX}:{playlist_id}:{page_size}:{cursor or ''}"
+
+
+def get_playlist_items_page(playlist_id, cursor=None, page_size=PAGE_SIZE):
+    """
+    Return ``(page, etag)`` for one page of a playlist, from the cache when possible
+    """
+    key = cache_key(playlist_id, cursor, page_size)
+    entry = cache.get(key)
+    if entry is not None:
+        return entry['page'], entry['etag']
+
+    response = fetch_playlist_page(require_youtube_service(), playlist_id, cursor, page_size)
+    items = response.get('items', [])
+
+    # Video details (duration, view count, etc.), cached per ID
+    video_details = youtube_metadata.videos([item['contentDetails']['videoId'] for item in items])
+
+    page = {
+        'items': [
+            format_playlist_item(item, video_details.get(item['contentDetails']['videoId'], {}))
+            for item in items
+        ],
+        'next_cursor': response.get('nextPageToken'),
+        'page_size': page_size,
+    }
+    etag = make_etag(page)
+    cache.set(key, {'page': page, 'etag': etag}, playlist_items_ttl())
+    return page, etag
+
+
+def playlist_items_ttl():
+    return getattr(settings, 'YOUTUBE_PLAYLIST_ITEMS_CACHE_TTL', 60 * 15)
@@ -0,0 +1,229 @@
+"""
+Playlist ingestion into ``Lesson`` rows.
+
+``sync_playlist_lessons`` pages through every ``playlistItems().list`` page
+of a playlist course and upserts one ``Lesson`` per video, ordered by its
+position in the playlist. Each lesson keeps the playlist item's etag, so a
+re-sync only looks up details (durations) for items that are new or whose
+etag changed; untouched items are at most reordered. Lessons for videos that
+left the playlist are deleted.
+
+Syncs are single-flight per course and normally run in the background via
+``schedule_playlist_sync`` so lesson pages are served from the database
+instead of live API calls. Each scheduled sync records its attempt time, and
+page views don't schedule another one until ``PLAYLIST_SYNC_RETRY_AFTER``
+has passed, so a playlist that keeps failing to sync isn't retried on every
+view.
+"""
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.singleflight import SingleFlight
+from core.tasks import run_in_background
+from courses.models import Course, Lesson
+
+from .youtube_metadata import youtube_metadata
+from .youtube_service import require_youtube_service
+
+# The API returns at most 50 playlist items per page
+PAGE_SIZE = 50
+
+ISO_DURATION = re.compile(r'^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$')
+
+# Titles YouTube uses for playlist entries whose video is gone
+UNAVAILABLE_TITLES = ('Deleted video', 'Private video')
+
+
+def format_duration(iso_duration):
+    """
+    Convert an ISO 8601 duration (PT1H2M3S) to minutes:seconds (62:03)
+    """
+    match = ISO_DURATION.match(iso_duration or '')
+    if not match:
+        return None
+    parts = {name: int(value or 0) for name, value in match.groupdict().items()}
+    minutes = parts['days'] * 24 * 60 + parts['hours'] * 60 + parts['minutes']
+    return f"{minutes}:{parts['seconds']:02d}"
+
+
+def fetch_playlist_page(youtube, playlist_id, page_token=None, page_size=PAGE_SIZE):
+    """
+    Fetch one page of playlist items
+    """
+    return youtube.playlistItems().list(
+        part="snippet,contentDetails",
+        maxResults=page_size,
+        playlistId=playlist_id,
+        pageToken=page_token
+    ).execute()
+
+
+def iter_playlist_items(youtube, playlist_id):
+    """
+    Yield every item of a playlist, one page at a time
+    """
+    page_token = None
+    while True:
+        response = fetch_playlist_page(youtube, playlist_id, page_token)
+        yield from response.get('items', [])
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+
+
+def is_available(item):
+    return item['snippet'].get('title') not in UNAVAILABLE_TITLES
+
+
+def sync_playlist_lessons(course, youtube=None):
+    """
+    Bring a playlist course's lessons in line with the playlist on YouTube.
+
+    Returns a dict of created/updated/deleted/unchanged counts, or None when
+    another sync of the same course is already running.
+    """
+    flight = SingleFlight(f"playlist-sync:{course.pk}", ttl=getattr(settings, 'PLAYLIST_SYNC_LOCK_TTL', 600))
+    if not flight.acquire():
+        print(f"Playlist sync already running for course {course.pk}")
+        return None
+
+    try:
+        return _sync(course, youtube or require_youtube_service())
+    finally:
+        flight.release()
+
+
+def _sync(course, youtube):
+    existing = list(course.lessons.all())
+    by_item_id = {lesson.playlist_item_id: lesson for lesson in existing if lesson.playlist_item_id}
+    # Lessons created before syncing existed are matched by video ID
+    by_video_id = {lesson.youtube_id: lesson for lesson in existing if not lesson.playlist_item_id}
+
+    reordered = []
+    changed = []  # (lesson or None, position, item)
+    seen = set()
+    position = 0
+    for item in iter_playlist_items(youtube, course.youtube_id):
+        if not is_available(item):
+            continue
+        video_id = item['contentDetails']['videoId']
+        lesson = by_item_id.get(item['id']) or by_video_id.pop(video_id, None)
+        if lesson is not None:
+            seen.add(lesson.pk)
+
+        if lesson is not None and lesson.etag == item['etag']:
+            if lesson.order != position:
+                lesson.order = position
+                reordered.append(lesson)
+        else:
+            changed.append((lesson, position, item))
+        position += 1
+
+    # Durations only for new or changed items, in batched lookups
+    details = youtube_metadata.videos([item['contentDetails']['videoId'] for _, _, item in changed])
+
+    to_create = []
+    to_update = []
+    for lesson, position, item in changed:
+        snippet = item['snippet']
+        video_id = item['contentDetails']['videoId']
+        content_details = details.get(video_id, {}).get('contentDetails', {})
+        fields = {
+            'title': snippet.get('title', '')[:255],
+            'description': snippet.get('description', ''),
+            'youtube_id': video_id,
+            'order': position,
+            'duration': format_duration(content_details.get('duration')),
+            'playlist_item_id': item['id'],
+            'etag': item['etag'],
+            'published_at': parse_datetime(item['contentDetails'].get('videoPublishedAt') or '') or None,
+        }
+        if lesson is None:
+            to_create.append(Lesson(course=course, **fields))
+        else:
+            for name, value in fields.items():
+                setattr(lesson, name, value)
+            to_update.append(lesson)
+
+    stale = [lesson.pk for lesson in existing if lesson.pk not in seen]
+    now = timezone.now()
+    for lesson in to_update + reordered:
+        lesson.updated_at = now
+
+    with transaction.atomic():
+        if stale:
+            Lesson.objects.filter(pk__in=stale).delete()
+        Lesson.objects.bulk_create(to_create, batch_size=500)
+        Lesson.objects.bulk_update(
+            to_update,
+            ['title', 'description', 'youtube_id', 'order', 'duration', 'playlist_item_id', 'etag', 'published_at', 'updated_at'],
+            batch_size=500
+        )
+        Lesson.objects.bulk_update(reordered, ['order', 'updated_at'], batch_size=500)
+        Course.objects.filter(pk=course.pk).update(lessons_synced_at=now)
+    course.lessons_synced_at = now
+
+    stats = {
+        'created': len(to_create),
+        'updated': len(to_update) + len(reordered),
+        'deleted': len(stale),
+        'unchanged': len(seen) - len(to_update) - len(reordered),
+    }
+    print(f"Synced playlist {course.youtube_id} for course {course.pk}: {stats}")
+    return stats
+
+
+def needs_lesson_sync(course):
+    """
+    Whether a playlist course has never been synced or its lessons are older than ``PLAYLIST_SYNC_INTERVAL``
+    """
+    if not course.is_playlist:
+        return False
+    if course.lessons_synced_at is None:
+        return True
+    interval = timedelta(seconds=getattr(settings, 'PLAYLIST_SYNC_INTERVAL', 60 * 60 * 24))
+    return timezone.now() - course.lessons_synced_at > interval
+
+
+def schedule_playlist_sync(course, force=False):
+    """
+    Sync a playlist course's lessons in the background once the transaction commits.
+
+    Without ``force`` nothing is scheduled while an attempt made within
+    ``PLAYLIST_SYNC_RETRY_AFTER`` may still be running or has failed.
+    Returns whether a sync was scheduled.
+    """
+    if not course.is_playlist:
+        return False
+    now = timezone.now()
+    attempts = Course.objects.filter(pk=course.pk)
+    if not force:
+        retry_after = timedelta(seconds=getattr(settings, 'PLAYLIST_SYNC_RETRY_AFTER', 60 * 60))
+        attempts = attempts.filter(
+            Q(lessons_sync_attempted_at__isnull=True) | Q(lessons_sync_attempted_at__lt=now - retry_after)
+        )
+    # The conditional update lets only one of several concurrent views schedule
+    if not attempts.update(lessons_sync_attempted_at=now):
+        return False
+    course.lessons_sync_attempted_at = now
+
+    course_id = course.pk
+    transaction.on_commit(lambda: run_in_background(sync_course_lessons, course_id, force))
+    return True
+
+
+def sync_course_lessons(course_id, force=False):
+    """
+    Background entry point for ``schedule_playlist_sync``
+    """
+    course = Course.objects.filter(pk=course_id, is_playlist=True).first()
+    # Several requests may have queued a sync before the first one finished
+    if course is None or not (force or needs_lesson_sync(course)):
+        return None
+    return sync_playlist_lessons(course)
@@ -0,0 +1,147 @@
+"""
+Cache for YouTube search results.
+
+Every search endpoint goes through ``youtube_search_cache`` so equivalent
+searches share one entry. Keys are built from the canonicalized parameters
+(lowercased, whitespace-collapsed query, search type, result limit and IDs),
+so "Python  Basics" and "python basics" hit the same entry.
+
+Entries are fresh for ``YOUTUBE_SEARCH_FRESH_TTL`` seconds. After that they
+are still served for up to ``YOUTUBE_SEARCH_STALE_TTL`` seconds while a
+background refresh fetches a new copy, so popular searches rarely wait on
+the YouTube API. Hit, stale and miss counts are kept in the cache for
+``stats()``.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.tasks import run_in_background
+
+KEY_PREFIX = 'youtube-search:v1'
+STATS_KEYS = ('hits', 'stale_hits', 'misses', 'refreshes', 'errors')
+
+CACHE_HIT = 'HIT'
+CACHE_STALE = 'STALE'
+CACHE_MISS = 'MISS'
+
+
+def normalize_query(query):
+    """
+    Lowercase a query and collapse its whitespace
+    """
+    return ' '.join(str(query or '').lower().split())
+
+
+def canonical_params(query='', search_type='video', max_results=None, video_id='', playlist_id='', **extra):
+    """
+    The parameters that identify a search, in canonical form
+    """
+    params = {
+        'query': normalize_query(query),
+        'type': str(search_type or 'video').strip().lower(),
+        'max_results': int(max_results) if max_results else None,
+        'video_id': str(video_id or '').strip(),
+        'playlist_id': str(playlist_id or '').strip(),
+    }
+    params.update(extra)
+    return params
+
+
+def make_key(params):
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+    return f"{KEY_PREFIX}:{digest}"
+
+
+class YouTubeSearchCache:
+    """
+    Search result cache with stale-while-revalidate semantics
+    """
+
+    def __init__(self, fresh_ttl=None, stale_ttl=None):
+        self._fresh_ttl = fresh_ttl
+        self._stale_ttl = stale_ttl
+
+    @property
+    def fresh_ttl(self):
+        return self._fresh_ttl or getattr(settings, 'YOUTUBE_SEARCH_FRESH_TTL', 60 * 60)
+
+    @property
+    def stale_ttl(self):
+        return self._stale_ttl or getattr(settings, 'YOUTUBE_SEARCH_STALE_TTL', 60 * 60 * 24)
+
+    def get_or_fetch(self, params, fetch):
+        """
+        Return ``(results, cache_state)`` for a search.
+
+        ``fetch`` is called with no arguments to run the search on a miss,
+        or in the background when a stale entry is served.
+        """
+        key = make_key(params)
+        entry = cache.get(key)
+
+        if entry is not None:
+            age = time.time() - entry['fetched_at']
+            if age < self.fresh_ttl:
+                self._count('hits')
+                return entry['results'], CACHE_HIT
+
+            self._count('stale_hits')
+            self._refresh_in_background(key, fetch)
+            return entry['results'], CACHE_STALE
+
+        self._count('misses')
+        results = fetch()
+        self._store(key, results)
+        return results, CACHE_MISS
+
+    def invalidate(self, params):
+        cache.delete(make_key(params))
+
+    def stats(self):
+        """
+        Hit/miss counters shared by all workers
+        """
+        counts = cache.get_many([f"{KEY_PREFIX}:stats:{name}" for name in STATS_KEYS])
+        stats = {name: counts.get(f"{KEY_PREFIX}:stats:{name}", 0) for name in STATS_KEYS}
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else None
+        return stats
+
+    def reset_stats(self):
+        cache.delete_many([f"{KEY_PREFIX}:stats:{name}" for name in STATS_KEYS])
+
+    def _store(self, key, results):
+        cache.set(key, {'results': results, 'fetched_at': time.time()}, self.fresh_ttl + self.stale_ttl)
+
+    def _refresh_in_background(self, key, fetch):
+        # Only one worker refreshes a given entry at a time
+        if not cache.add(f"{key}:refreshing", True, 60):
+            return
+
+        def refresh():
+            try:
+                self._store(key, fetch())
+                self._count('refreshes')
+            except Exception as e:
+                print(f"Background refresh of YouTube search {key} failed: {str(e)}")
+                self._count('errors')
+            finally:
+                cache.delete(f"{key}:refreshing")
+
+        run_in_background(refresh)
+
+    def _count(self, name):
+        key = f"{KEY_PREFIX}:stats:{name}"
+        try:
+            cache.add(key, 0, None)
+            cache.incr(key)
+        except Exception as e:
+            # Counters are best effort and must never break a search
+            print(f"Failed to update YouTube search cache stats: {str(e)}")
+
+
+youtube_search_cache = YouTubeSearchCache()
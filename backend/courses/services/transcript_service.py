@@ -0,0 +1,137 @@
+"""
+YouTube transcript fetching backed by the Transcript table.
+
+Transcripts are read from the database first and only fetched from YouTube
+when missing or older than ``TRANSCRIPT_STORE_TTL``. Missing transcripts are
+fetched on a bounded thread pool so the latency of a playlist is roughly that
+of its slowest video instead of the sum of all of them. Results always come
+back in the order the video IDs were given.
+"""
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+from youtube_transcript_api import YouTubeTranscriptApi
+
+from courses.models import Transcript
+
+DEFAULT_LANGUAGE = 'en'
+
+
+def fetch_transcript_segments(video_id, language=DEFAULT_LANGUAGE):
+    """
+    Fetch the raw transcript segments for a single video from YouTube
+    """
+    return YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
+
+
+def hash_segments(segments):
+    """
+    Return a stable SHA-256 hash of transcript segment data
+    """
+    return hashlib.sha256(json.dumps(segments, sort_keys=True).encode()).hexdigest()
+
+
+def fetch_transcripts(video_ids, language=DEFAULT_LANGUAGE, max_workers=None, timeout=None):
+    """
+    Return transcript texts for several videos, in the same order as ``video_ids``.
+
+    Stored transcripts are served from the database. Missing or expired ones
+    are fetched concurrently and saved; if a refresh fails the stale copy is
+    used. Videos with no transcript at all have ``None`` in their slot, so
+    callers get partial results instead of an error.
+    """
+    video_ids = list(video_ids)
+    if not video_ids:
+        return []
+
+    ttl = timedelta(seconds=getattr(settings, 'TRANSCRIPT_STORE_TTL', 60 * 60 * 24 * 7))
+    stored = {
+        transcript.video_id: transcript
+        for transcript in Transcript.objects.filter(video_id__in=video_ids, language=language)
+    }
+    now = timezone.now()
+    to_fetch = [
+        video_id for video_id in dict.fromkeys(video_ids)
+        if video_id not in stored or now - stored[video_id].fetched_at > ttl
+    ]
+
+    if to_fetch:
+        fetched = _fetch_concurrently(to_fetch, language, max_workers, timeout)
+        for video_id, segments in zip(to_fetch, fetched):
+            if segments is not None:
+                stored[video_id] = _save_transcript(video_id, language, segments, stored.get(video_id))
+
+    return [stored[video_id].text if video_id in stored else None for video_id in video_ids]
+
+
+def _save_transcript(video_id, language, segments, existing=None):
+    """
+    Insert or refresh a stored transcript
+    """
+    content_hash = hash_segments(segments)
+    fetched_at = timezone.now()
+
+    if existing is not None:
+        existing.fetched_at = fetched_at
+        if existing.content_hash == content_hash:
+            existing.save(update_fields=['fetched_at', 'updated_at'])
+        else:
+            existing.segments = segments
+            existing.content_hash = content_hash
+            existing.save(update_fields=['segments', 'content_hash', 'fetched_at', 'updated_at'])
+        return existing
+
+    try:
+        return Transcript.objects.create(
+            video_id=video_id,
+            language=language,
+            segments=segments,
+            content_hash=content_hash,
+            fetched_at=fetched_at
+        )
+    except IntegrityError:
+        # Another request stored it first
+        return Transcript.objects.get(video_id=video_id, language=language)
+
+
+def _fetch_concurrently(video_ids, language, max_workers=None, timeout=None):
+    """
+    Fetch transcript segments on a bounded thread pool.
+
+    Returns a list in the same order as ``video_ids`` with ``None`` for videos
+    whose transcript failed or did not arrive within ``timeout`` seconds.
+    """
+    if max_workers is None:
+        max_workers = getattr(settings, 'TRANSCRIPT_FETCH_CONCURRENCY', 5)
+    if timeout is None:
+        timeout = getattr(settings, 'TRANSCRIPT_FETCH_TIMEOUT', 20)
+    max_workers = max(1, min(max_workers, len(video_ids)))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='transcripts')
+    started_at = time.monotonic()
+    try:
+        futures = [executor.submit(fetch_transcript_segments, video_id, language) for video_id in video_ids]
+
+        results = []
+        for index, (video_id, future) in enumerate(zip(video_ids, futures)):
+            # With a bounded pool, the n-th video may only start after earlier
+            # waves finish, so each wave gets its own timeout budget
+            deadline = started_at + timeout * (index // max_workers + 1)
+            try:
+                results.append(future.result(timeout=max(0, deadline - time.monotonic())))
+            except FutureTimeoutError:
+                print(f"Timed out getting transcript for video {video_id}")
+                results.append(None)
+            except Exception as e:
+                print(f"Error getting transcript for video {video_id}: {e}")
+                results.append(None)
+        return results
+    finally:
+        # Don't let a stuck fetch hold up the request
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,187 @@
+"""
+Video and playlist metadata lookups by ID.
+
+``youtube_metadata`` is the one place views read video or playlist metadata
+from. It resolves any number of IDs with the fewest API calls:
+
+1. the per-ID cache (``YOUTUBE_METADATA_CACHE_TTL``),
+2. the ``YouTubeResource`` table, which survives restarts and cache flushes
+   (rows are used for ``YOUTUBE_METADATA_STORE_TTL``),
+3. ``videos().list`` / ``playlists().list`` in batches of up to 50 IDs (the
+   API maximum), saved back to both tiers.
+
+Each returned item is the raw API resource with ``snippet``,
+``contentDetails`` (and ``statistics`` for videos), so every caller shares
+the same entries whatever fields it needs.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from courses.models import YouTubeResource
+
+from .youtube_service import require_youtube_service
+
+KEY_PREFIX = 'youtube-meta:v1'
+
+# The API accepts at most 50 IDs per videos.list / playlists.list call
+MAX_IDS_PER_REQUEST = 50
+
+KIND_VIDEO = 'video'
+KIND_PLAYLIST = 'playlist'
+
+PARTS = {
+    KIND_VIDEO: 'snippet,contentDetails,statistics',
+    KIND_PLAYLIST: 'snippet,contentDetails',
+}
+
+# Cached for IDs the API didn't return (deleted or private)
+NOT_FOUND = {'not_found': True}
+
+
+def chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class YouTubeMetadata:
+    """
+    Batched, cached lookups of YouTube video and playlist resources
+    """
+
+    def videos(self, video_ids):
+        """
+        Return ``{video_id: resource}`` for the IDs that exist
+        """
+        return self.lookup(KIND_VIDEO, video_ids)
+
+    def playlists(self, playlist_ids):
+        """
+        Return ``{playlist_id: resource}`` for the IDs that exist
+        """
+        return self.lookup(KIND_PLAYLIST, playlist_ids)
+
+    def video(self, video_id):
+        return self.videos([video_id]).get(video_id)
+
+    def playlist(self, playlist_id):
+        return self.playlists([playlist_id]).get(playlist_id)
+
+    def lookup(self, kind, ids):
+        ids = list(dict.fromkeys(i for i in ids if i))
+        if not ids:
+            return {}
+
+        keys = {self.cache_key(kind, i): i for i in ids}
+        cached = cache.get_many(list(keys))
+        found = {keys[key]: item for key, item in cached.items()}
+
+        missing = [i for i in ids if i not in found]
+        if missing:
+            found.update(self.load(kind, missing))
+
+        missing = [i for i in ids if i not in found]
+        if missing:
+            found.update(self.fetch(kind, missing))
+
+        return {i: found[i] for i in ids if found.get(i) and not found[i].get('not_found')}
+
+    def load(self, kind, ids):
+        """
+        Load resources stored within ``store_ttl`` and put them back in the cache
+        """
+        now = timezone.now()
+        rows = YouTubeResource.objects.filter(
+            kind=kind,
+            youtube_id__in=ids,
+            fetched_at__gte=now - timedelta(seconds=self.store_ttl)
+        )
+
+        found = {}
+        not_found = []
+        for row in rows:
+            if row.is_available:
+                found[row.youtube_id] = row.data
+            elif now - row.fetched_at < timedelta(seconds=self.not_found_ttl):
+                # Deleted or private IDs are rechecked sooner than live ones
+                not_found.append(row.youtube_id)
+
+        if found:
+            cache.set_many({self.cache_key(kind, i): item for i, item in found.items()}, self.ttl)
+        if not_found:
+            cache.set_many({self.cache_key(kind, i): NOT_FOUND for i in not_found}, self.not_found_ttl)
+            found.update({i: NOT_FOUND for i in not_found})
+        return found
+
+    def fetch(self, kind, ids):
+        """
+        Fetch resources from the API in batches, then store and cache them per ID
+        """
+        youtube = require_youtube_service()
+        resource = youtube.videos() if kind == KIND_VIDEO else youtube.playlists()
+
+        fetched = {}
+        for batch in chunked(ids, MAX_IDS_PER_REQUEST):
+            response = resource.list(part=PARTS[kind], id=",".join(batch)).execute()
+            for item in response.get('items', []):
+                fetched[item['id']] = item
+
+        found = {i: fetched[i] for i in ids if i in fetched}
+        cache.set_many({self.cache_key(kind, i): item for i, item in found.items()}, self.ttl)
+
+        not_found = [i for i in ids if i not in fetched]
+        self.store(kind, found, not_found)
+
+        if not_found:
+            cache.set_many({self.cache_key(kind, i): NOT_FOUND for i in not_found}, self.not_found_ttl)
+            found.update({i: NOT_FOUND for i in not_found})
+        return found
+
+    def store(self, kind, found, not_found=()):
+        """
+        Upsert fetched resources into the YouTubeResource table
+        """
+        now = timezone.now()
+        rows = [
+            YouTubeResource(kind=kind, youtube_id=i, data=item, is_available=True, fetched_at=now)
+            for i, item in found.items()
+        ]
+        rows.extend(
+            YouTubeResource(kind=kind, youtube_id=i, data={}, is_available=False, fetched_at=now)
+            for i in not_found
+        )
+        if rows:
+            YouTubeResource.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['kind', 'youtube_id'],
+                update_fields=['data', 'is_available', 'fetched_at', 'updated_at']
+            )
+
+    def invalidate(self, kind, ids):
+        """
+        Drop cached and stored copies so the next lookup hits the API
+        """
+        cache.delete_many([self.cache_key(kind, i) for i in ids])
+        YouTubeResource.objects.filter(kind=kind, youtube_id__in=ids).delete()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'YOUTUBE_METADATA_CACHE_TTL', 60 * 60 * 6)
+
+    @property
+    def store_ttl(self):
+        return getattr(settings, 'YOUTUBE_METADATA_STORE_TTL', 60 * 60 * 24 * 7)
+
+    @property
+    def not_found_ttl(self):
+        return min(self.ttl, 60 * 10)
+
+    @staticmethod
+    def cache_key(kind, resource_id):
+        return f"{KEY_PREFIX}:{kind}:{resource_id}"
+
+
+youtube_metadata = YouTubeMetadata()
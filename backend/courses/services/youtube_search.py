@@ -0,0 +1,159 @@
+"""
+YouTube search for the course search page.
+
+``search_youtube`` runs one search against the YouTube Data API and returns
+the result cards shown by the frontend. Callers go through
+``search_cache.youtube_search_cache`` rather than calling it directly, since
+YouTube quota is the limiting resource. Video and playlist details come from
+``youtube_metadata``, which batches and caches them per ID.
+"""
+from .youtube_metadata import youtube_metadata
+
+# Max results returned per search type
+MAX_RESULTS = {
+    'video': 2,
+    'playlist': 2,
+    'all': 2,  # One playlist and one video
+}
+
+
+def format_playlist(item):
+    snippet = item['snippet']
+    content_details = item.get('contentDetails', {})
+    return {
+        'id': item['id'],
+        'title': snippet.get('title', ''),
+        'description': snippet.get('description', ''),
+        'thumbnail': snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
+        'channelTitle': snippet.get('channelTitle', ''),
+        'videoCount': content_details.get('itemCount', 0),
+        'publishedAt': snippet.get('publishedAt', '')
+    }
+
+
+def format_video(video_id, snippet, content_details, statistics):
+    return {
+        'id': video_id,
+        'title': snippet.get('title', ''),
+        'description': snippet.get('description', ''),
+        'thumbnail': snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
+        'channelTitle': snippet.get('channelTitle', ''),
+        'duration': content_details.get('duration', ''),
+        'viewCount': statistics.get('viewCount', 0),
+        'publishedAt': snippet.get('publishedAt', '')
+    }
+
+
+def looks_like_short(snippet):
+    """
+    Shorts typically have #shorts in the title or description
+    """
+    title = snippet.get('title', '').lower()
+    description = snippet.get('description', '').lower()
+    return '#shorts' in title or '#shorts' in description or 'short' in title or '/shorts/' in description
+
+
+def is_short_duration(duration_str):
+    """
+    Durations with only seconds (e.g. PT45S) are likely shorts
+    """
+    return 'PT' in duration_str and 'M' not in duration_str and 'H' not in duration_str
+
+
+def search_youtube(youtube, query='', video_id='', playlist_id='', search_type='video'):
+    """
+    Search YouTube for videos or playlists, or look one up by ID
+    """
+    # If searching by ID, don't limit results
+    if video_id or playlist_id:
+        if search_type == 'playlist' and playlist_id:
+            return get_playlists([playlist_id])
+        if search_type == 'video' and video_id:
+            video = youtube_metadata.video(video_id)
+            if not video:
+                return []
+            return [format_video(video['id'], video['snippet'], video.get('contentDetails', {}), video.get('statistics', {}))]
+        return []
+
+    # For regular search queries, get a mix of playlists and videos
+    if search_type == 'all' and query:
+        # Get playlists (limited to 1)
+        results = search_playlists(youtube, query, max_results=1)
+        # Add filtered videos to results (limited to 1)
+        results.extend(search_videos(youtube, query, limit=1))
+        return results
+
+    if search_type == 'playlist':
+        return search_playlists(youtube, query, max_results=MAX_RESULTS['playlist'])
+
+    return search_videos(youtube, query, limit=MAX_RESULTS['video'])
+
+
+def search_playlists(youtube, query, max_results):
+    """
+    Search for playlists and load their details
+    """
+    print("Searching for playlists...")
+    search_response = youtube.search().list(
+        part="snippet",
+        maxResults=max_results,
+        q=query,
+        type="playlist"
+    ).execute()
+
+    playlist_ids = [item['id']['playlistId'] for item in search_response.get('items', [])]
+    if not playlist_ids:
+        print("No playlists found matching the query")
+        return []
+    return get_playlists(playlist_ids)
+
+
+def get_playlists(playlist_ids):
+    """
+    Get details for a list of playlists, in request order
+    """
+    playlists = youtube_metadata.playlists(playlist_ids)
+    return [format_playlist(playlists[i]) for i in playlist_ids if i in playlists]
+
+
+def search_videos(youtube, query, limit):
+    """
+    Search for videos, skipping shorts, and return up to ``limit`` results
+    """
+    print("Searching for videos...")
+    response = youtube.search().list(
+        part="snippet",
+        maxResults=5,  # Get more to filter out shorts
+        q=query,
+        type="video"
+    ).execute()
+
+    # Skip likely shorts by title before spending quota on details
+    candidates = []
+    for item in response.get('items', []):
+        if looks_like_short(item['snippet']):
+            print(f"Skipping likely short: {item['snippet'].get('title', '')}")
+            continue
+        candidates.append(item)
+
+    # Durations and statistics for every candidate in one batched lookup
+    details = youtube_metadata.videos([item['id']['videoId'] for item in candidates])
+
+    results = []
+    for item in candidates:
+        video_id = item['id']['videoId']
+        snippet = item['snippet']
+        video_details = details.get(video_id, {})
+        content_details = video_details.get('contentDetails', {})
+        statistics = video_details.get('statistics', {})
+
+        duration_str = content_details.get('duration', '')
+        if is_short_duration(duration_str):
+            print(f"Skipping short duration video: {snippet.get('title', '')}, duration: {duration_str}")
+            continue
+
+        results.append(format_video(video_id, snippet, content_details, statistics))
+        if len(results) >= limit:
+            break
+
+    return results
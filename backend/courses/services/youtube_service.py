@@ -0,0 +1,183 @@
+"""
+Process-wide YouTube Data API client.
+
+Building a discovery client is expensive, so each worker process builds one
+service object and shares it between threads. httplib2 connections are not
+thread-safe, so every thread gets its own pooled ``Http`` instance which keeps
+its connections to googleapis.com alive between requests.
+
+API key validity is checked in the background and cached for
+``YOUTUBE_KEY_CHECK_TTL`` seconds instead of probing on every call.
+"""
+import os
+import threading
+import time
+
+import googleapiclient.discovery
+import httplib2
+from django.conf import settings
+from googleapiclient.http import HttpRequest
+
+# Well-known video used to check that the API key works
+PROBE_VIDEO_ID = "dQw4w9WgXcQ"
+
+KEY_STATUS_UNKNOWN = 'unknown'
+KEY_STATUS_VALID = 'valid'
+KEY_STATUS_INVALID = 'invalid'
+KEY_STATUS_QUOTA_EXCEEDED = 'quota_exceeded'
+
+_thread_local = threading.local()
+
+
+def _get_thread_http():
+    """
+    Return the pooled httplib2 connection object for the current thread
+    """
+    http = getattr(_thread_local, 'http', None)
+    if http is None:
+        http = httplib2.Http(timeout=getattr(settings, 'YOUTUBE_HTTP_TIMEOUT', 15))
+        _thread_local.http = http
+    return http
+
+
+def _build_request(http, *args, **kwargs):
+    """
+    Request builder that executes every request on the calling thread's connection
+    """
+    return HttpRequest(_get_thread_http(), *args, **kwargs)
+
+
+class YouTubeClientHolder:
+    """
+    Thread-safe holder for the shared YouTube service object
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._service = None
+        self._api_key = None
+        self._key_status = KEY_STATUS_UNKNOWN
+        self._key_checked_at = 0.0
+        self._probe_running = False
+
+    def get_service(self):
+        """
+        Return the shared YouTube service, or None if the API key is missing or known to be unusable
+        """
+        api_key = os.environ.get('YOUTUBE_API_KEY', '').strip()
+        if not api_key:
+            print("ERROR: YouTube API key is not configured in the .env file")
+            return None
+
+        with self._lock:
+            if self._service is None or api_key != self._api_key:
+                try:
+                    self._service = self._build(api_key)
+                except Exception as e:
+                    print(f"ERROR: Failed to create YouTube service: {str(e)}")
+                    return None
+                self._api_key = api_key
+                self._key_status = KEY_STATUS_UNKNOWN
+                self._key_checked_at = 0.0
+            service = self._service
+            key_status = self._key_status
+
+        self._schedule_key_check()
+
+        # Callers are optimistic until the background check says otherwise
+        if key_status in (KEY_STATUS_INVALID, KEY_STATUS_QUOTA_EXCEEDED):
+            return None
+        return service
+
+    @property
+    def key_status(self):
+        """
+        Last known result of the background API key check
+        """
+        return self._key_status
+
+    def invalidate(self):
+        """
+        Drop the cached key status so the next call re-checks it
+        """
+        with self._lock:
+            self._key_checked_at = 0.0
+
+    def _build(self, api_key):
+        """
+        Build the discovery client from the bundled discovery document
+        """
+        print(f"Initializing YouTube service with API key: {api_key[:5]}...{api_key[-4:]}")
+        return googleapiclient.discovery.build(
+            "youtube", "v3",
+            developerKey=api_key,
+            cache_discovery=False,
+            requestBuilder=_build_request,
+        )
+
+    def _schedule_key_check(self):
+        """
+        Start a background key check if the cached result has expired
+        """
+        ttl = getattr(settings, 'YOUTUBE_KEY_CHECK_TTL', 600)
+        with self._lock:
+            if self._probe_running or time.monotonic() - self._key_checked_at < ttl:
+                return
+            self._probe_running = True
+            service = self._service
+
+        thread = threading.Thread(target=self._check_key, args=(service,), daemon=True)
+        thread.start()
+
+    def _check_key(self, service):
+        """
+        Make a minimal API call to verify the key works and cache the result
+        """
+        try:
+            service.videos().list(part="id", id=PROBE_VIDEO_ID, maxResults=1).execute()
+            key_status = KEY_STATUS_VALID
+        except Exception as e:
+            message = str(e).lower()
+            if "quota" in message:
+                print(f"ERROR: YouTube API quota exceeded: {str(e)}")
+                key_status = KEY_STATUS_QUOTA_EXCEEDED
+            elif "forbidden" in message or "403" in message or "400" in message:
+                print(f"ERROR: YouTube API key is invalid or doesn't have proper permissions: {str(e)}")
+                key_status = KEY_STATUS_INVALID
+            else:
+                # Network hiccups say nothing about the key, keep using it
+                print(f"ERROR: YouTube API test request failed: {str(e)}")
+                key_status = KEY_STATUS_UNKNOWN
+
+        with self._lock:
+            if service is self._service:
+                self._key_status = key_status
+                self._key_checked_at = time.monotonic()
+            self._probe_running = False
+
+
+class YouTubeServiceUnavailable(Exception):
+    """
+    Raised when no usable YouTube API client is available
+    """
+
+
+youtube_client = YouTubeClientHolder()
+
+
+def get_youtube_service():
+    """
+    Return the process-wide YouTube API service object
+    """
+    return youtube_client.get_service()
+
+
+def require_youtube_service():
+    """
+    Like ``get_youtube_service`` but raises ``YouTubeServiceUnavailable``
+    instead of returning None
+    """
+    youtube = get_youtube_service()
+    if not youtube:
+        raise YouTubeServiceUnavailable('YouTube API service could not be initialized. Check your API key.')
+    return youtube
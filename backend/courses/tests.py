@@ -1,3 +1,201 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from .models import Course, Lesson
+from . import views
+from .services import playlist_sync, search_cache
+from .services.search_cache import CACHE_HIT, CACHE_MISS, CACHE_STALE, YouTubeSearchCache, canonical_params, make_key
+
+
+class SearchCacheKeyTests(SimpleTestCase):
+    def test_equivalent_searches_share_a_key(self):
+        self.assertEqual(
+            make_key(canonical_params('  Python   Basics ', 'Video', '10')),
+            make_key(canonical_params('python basics', 'video', 10))
+        )
+
+    def test_different_searches_get_different_keys(self):
+        base = make_key(canonical_params('python', 'video', 10))
+        self.assertNotEqual(base, make_key(canonical_params('python', 'playlist', 10)))
+        self.assertNotEqual(base, make_key(canonical_params('python', 'video', 20)))
+        self.assertNotEqual(base, make_key(canonical_params('python', 'video', 10, video_id='abc')))
+
+
+class SearchCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache = YouTubeSearchCache(fresh_ttl=60, stale_ttl=600)
+        self.params = canonical_params('python')
+        self.now = 1000.0
+        patcher = mock.patch.object(search_cache.time, 'time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Run background refreshes inline
+        patcher = mock.patch.object(search_cache, 'run_in_background', lambda fn: fn())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_miss_then_hit(self):
+        fetch = mock.Mock(return_value=['first'])
+        self.assertEqual(self.cache.get_or_fetch(self.params, fetch), (['first'], CACHE_MISS))
+        self.assertEqual(self.cache.get_or_fetch(canonical_params(' PYTHON '), fetch), (['first'], CACHE_HIT))
+        fetch.assert_called_once()
+
+    def test_stale_entry_is_served_while_it_refreshes(self):
+        self.cache.get_or_fetch(self.params, lambda: ['first'])
+        self.now += 61
+        fetch = mock.Mock(return_value=['second'])
+        self.assertEqual(self.cache.get_or_fetch(self.params, fetch), (['first'], CACHE_STALE))
+        fetch.assert_called_once()
+        self.assertEqual(self.cache.get_or_fetch(self.params, fetch), (['second'], CACHE_HIT))
+        self.assertEqual(self.cache.stats()['refreshes'], 1)
+
+    def test_only_one_refresh_runs_at_a_time(self):
+        self.cache.get_or_fetch(self.params, lambda: ['first'])
+        self.now += 61
+        cache.add(f"{make_key(self.params)}:refreshing", True, 60)
+        fetch = mock.Mock(return_value=['second'])
+        self.assertEqual(self.cache.get_or_fetch(self.params, fetch), (['first'], CACHE_STALE))
+        fetch.assert_not_called()
+
+    def test_failed_refresh_keeps_the_stale_entry(self):
+        self.cache.get_or_fetch(self.params, lambda: ['first'])
+        self.now += 61
+        failing = mock.Mock(side_effect=RuntimeError('quota'))
+        self.assertEqual(self.cache.get_or_fetch(self.params, failing), (['first'], CACHE_STALE))
+        self.assertEqual(cache.get(make_key(self.params))['results'], ['first'])
+        self.assertEqual(self.cache.stats()['errors'], 1)
+
+
+class LegacySearchTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def search(self, search_type):
+        request = APIRequestFactory().post(
+            '/', {'query': 'mixed case search', 'search_type': search_type}, format='json'
+        )
+        return views.test_youtube_search(request)
+
+    def test_search_type_is_normalized_before_fetching(self):
+        with mock.patch.object(views, 'require_youtube_service'), \
+                mock.patch.object(views, '_legacy_youtube_search', return_value=['result']) as search:
+            self.assertEqual(self.search(' VIDEO ').data, ['result'])
+            self.assertEqual(self.search('video').data, ['result'])
+        search.assert_called_once()
+        self.assertEqual(search.call_args.args[-1], 'video')
+
+
+def playlist_item(item_id, video_id, etag=None, title=None):
+    return {
+        'id': item_id,
+        'etag': etag or f"etag-{item_id}",
+        'snippet': {'title': title or f"Video {video_id}", 'description': ''},
+        'contentDetails': {'videoId': video_id, 'videoPublishedAt': '2024-01-01T00:00:00Z'},
+    }
+
+
+class FakeYouTube:
+    """
+    Serves a playlist's items two per page, like ``playlistItems().list``
+    """
+    def __init__(self, items):
+        self.items = items
+
+    def playlistItems(self):
+        return self
+
+    def list(self, pageToken=None, **kwargs):
+        start = int(pageToken or 0)
+        response = {'items': self.items[start:start + 2]}
+        if start + 2 < len(self.items):
+            response['nextPageToken'] = str(start + 2)
+        return mock.Mock(execute=mock.Mock(return_value=response))
+
+
+class PlaylistSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(title='Playlist', description='', youtube_id='PL1', is_playlist=True)
+        patcher = mock.patch.object(
+            playlist_sync.youtube_metadata, 'videos',
+            side_effect=lambda ids: {i: {'contentDetails': {'duration': 'PT1M5S'}} for i in ids}
+        )
+        self.videos = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sync(self, items):
+        return playlist_sync.sync_playlist_lessons(self.course, youtube=FakeYouTube(items))
+
+    def lessons(self):
+        return list(self.course.lessons.values_list('youtube_id', 'order'))
+
+    def test_first_sync_creates_lessons_across_pages(self):
+        items = [playlist_item(f"i{n}", f"v{n}") for n in range(3)]
+        items.insert(1, playlist_item('gone', 'vx', title='Deleted video'))
+        stats = self.sync(items)
+
+        self.assertEqual(stats, {'created': 3, 'updated': 0, 'deleted': 0, 'unchanged': 0})
+        self.assertEqual(self.lessons(), [('v0', 0), ('v1', 1), ('v2', 2)])
+        self.assertEqual(Lesson.objects.get(youtube_id='v0').duration, '1:05')
+        self.course.refresh_from_db()
+        self.assertIsNotNone(self.course.lessons_synced_at)
+
+    def test_resync_diffs_against_stored_lessons(self):
+        self.sync([playlist_item('i0', 'v0'), playlist_item('i1', 'v1'), playlist_item('i2', 'v2')])
+        self.videos.reset_mock()
+
+        stats = self.sync([
+            playlist_item('i2', 'v2'),
+            playlist_item('i0', 'v0', etag='changed', title='Renamed'),
+            playlist_item('i3', 'v3'),
+        ])
+
+        self.assertEqual(stats, {'created': 1, 'updated': 2, 'deleted': 1, 'unchanged': 0})
+        self.assertEqual(self.lessons(), [('v2', 0), ('v0', 1), ('v3', 2)])
+        self.assertEqual(Lesson.objects.get(youtube_id='v0').title, 'Renamed')
+        # Details are only looked up for new or changed items
+        self.videos.assert_called_once_with(['v0', 'v3'])
+
+    def test_unchanged_playlist_writes_nothing(self):
+        items = [playlist_item('i0', 'v0'), playlist_item('i1', 'v1')]
+        self.sync(items)
+        self.assertEqual(self.sync(items), {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 2})
+
+
+@override_settings(PLAYLIST_SYNC_RETRY_AFTER=3600)
+class SchedulePlaylistSyncTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title='Playlist', description='', youtube_id='PL1', is_playlist=True)
+        patcher = mock.patch.object(playlist_sync, 'run_in_background')
+        self.run_in_background = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def schedule(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return playlist_sync.schedule_playlist_sync(Course.objects.get(pk=self.course.pk), **kwargs)
+
+    def test_failed_sync_is_not_rescheduled_on_every_view(self):
+        self.assertTrue(self.schedule())
+        # The sync failed, so the lessons are still unsynced
+        self.assertTrue(playlist_sync.needs_lesson_sync(Course.objects.get(pk=self.course.pk)))
+        self.assertFalse(self.schedule())
+        self.assertEqual(self.run_in_background.call_count, 1)
+
+    def test_sync_is_retried_after_the_backoff(self):
+        self.schedule()
+        Course.objects.filter(pk=self.course.pk).update(
+            lessons_sync_attempted_at=timezone.now() - timedelta(seconds=3601)
+        )
+        self.assertTrue(self.schedule())
+        self.assertEqual(self.run_in_background.call_count, 2)
+
+    def test_forced_sync_ignores_the_backoff(self):
+        self.schedule()
+        self.assertTrue(self.schedule(force=True))
+        self.assertEqual(self.run_in_background.call_count, 2)
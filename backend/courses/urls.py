@@ -14,4 +14,5 @@ urlpatterns = [
     path('search-youtube/', views.YouTubeSearchView.as_view(), name='youtube-search'),
     path('courses/search-youtube/', views.YouTubeSearchView.as_view(), name='youtube-search-alt'),
     path('youtube/playlist-items/<str:playlist_id>/', views.youtube_playlist_items, name='youtube-playlist-items'),
+    path('youtube/search-cache/stats/', views.youtube_search_cache_stats, name='youtube-search-cache-stats'),
 ] 
\ No newline at end of file
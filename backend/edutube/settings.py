@@ -3,6 +3,7 @@ from pathlib import Path
 import dj_database_url
 from dotenv import load_dotenv
 import sys
+import tempfile
 
 # Add the base directory to the Python path so we can import our wrapper modules
 sys.path.append(str(Path(__file__).resolve().parent.parent))
@@ -193,8 +194,39 @@ CORS_ALLOW_METHODS = [
 
 # API Keys
 YOUTUBE_API_KEY = os.environ.get('YOUTUBE_API_KEY', '')
+YOUTUBE_KEY_CHECK_TTL = int(os.environ.get('YOUTUBE_KEY_CHECK_TTL', 600))  # Seconds between background API key checks
+YOUTUBE_HTTP_TIMEOUT = int(os.environ.get('YOUTUBE_HTTP_TIMEOUT', 15))  # Socket timeout for YouTube API requests
+YOUTUBE_SEARCH_FRESH_TTL = int(os.environ.get('YOUTUBE_SEARCH_FRESH_TTL', 60 * 60))  # Seconds a cached search is served as fresh
+YOUTUBE_SEARCH_STALE_TTL = int(os.environ.get('YOUTUBE_SEARCH_STALE_TTL', 60 * 60 * 24))  # Seconds a stale search is served while refreshing
+YOUTUBE_METADATA_CACHE_TTL = int(os.environ.get('YOUTUBE_METADATA_CACHE_TTL', 60 * 60 * 6))  # Seconds video/playlist details are cached per ID
+YOUTUBE_METADATA_STORE_TTL = int(os.environ.get('YOUTUBE_METADATA_STORE_TTL', 60 * 60 * 24 * 7))  # Seconds stored video/playlist details are used before refetching
+PLAYLIST_SYNC_INTERVAL = int(os.environ.get('PLAYLIST_SYNC_INTERVAL', 60 * 60 * 24))  # Seconds before a playlist course's lessons are re-synced
+PLAYLIST_SYNC_LOCK_TTL = int(os.environ.get('PLAYLIST_SYNC_LOCK_TTL', 600))  # Seconds before a per-course sync lock expires
+PLAYLIST_SYNC_RETRY_AFTER = int(os.environ.get('PLAYLIST_SYNC_RETRY_AFTER', 60 * 60))  # Seconds before a page view schedules another sync after an attempt
+YOUTUBE_PLAYLIST_PAGE_SIZE = int(os.environ.get('YOUTUBE_PLAYLIST_PAGE_SIZE', 50))  # Default videos per playlist items page (max 50)
+YOUTUBE_PLAYLIST_ITEMS_CACHE_TTL = int(os.environ.get('YOUTUBE_PLAYLIST_ITEMS_CACHE_TTL', 60 * 15))  # Seconds a playlist items page is cached
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 
+# Gemini model discovery for quiz generation
+GEMINI_MODEL_CACHE_TTL = int(os.environ.get('GEMINI_MODEL_CACHE_TTL', 60 * 60))  # Seconds to keep the resolved model list
+GEMINI_MODEL_RETRY_AFTER = int(os.environ.get('GEMINI_MODEL_RETRY_AFTER', 30))  # Seconds to keep the default model after listing fails
+GEMINI_MODEL_FALLBACKS = int(os.environ.get('GEMINI_MODEL_FALLBACKS', 3))  # Models kept ready in the fallback chain
+QUIZ_GENERATION_MODE = os.environ.get('QUIZ_GENERATION_MODE', 'batched')  # 'batched' (one JSON call) or 'per_level'
+
+# Transcript fetching for quiz generation
+TRANSCRIPT_FETCH_CONCURRENCY = int(os.environ.get('TRANSCRIPT_FETCH_CONCURRENCY', 5))  # Max transcripts fetched at once
+TRANSCRIPT_FETCH_TIMEOUT = int(os.environ.get('TRANSCRIPT_FETCH_TIMEOUT', 20))  # Seconds to wait for each transcript
+TRANSCRIPT_STORE_TTL = int(os.environ.get('TRANSCRIPT_STORE_TTL', 60 * 60 * 24 * 7))  # Seconds before a stored transcript is refreshed
+
+# Background jobs
+BACKGROUND_WORKERS = int(os.environ.get('BACKGROUND_WORKERS', 4))  # Threads in the shared background task pool
+QUIZ_JOB_WORKERS = int(os.environ.get('QUIZ_JOB_WORKERS', 2))  # Threads running quiz generation jobs
+QUIZ_JOB_STALE_AFTER = int(os.environ.get('QUIZ_JOB_STALE_AFTER', 600))  # Seconds before a quiz job that never started is failed
+QUIZ_GENERATION_ASYNC = os.environ.get('QUIZ_GENERATION_ASYNC', 'True').lower() == 'true'  # Queue quiz generation unless a request sends async=false
+QUIZ_GENERATION_LOCK_TTL = int(os.environ.get('QUIZ_GENERATION_LOCK_TTL', 300))  # Seconds before a per-course generation lock expires
+QUIZ_GENERATION_WAIT_TIMEOUT = int(os.environ.get('QUIZ_GENERATION_WAIT_TIMEOUT', 30))  # Seconds an inline request waits on another's generation (keep well below the gunicorn timeout)
+QUIZ_ANSWER_KEY_CACHE_TTL = int(os.environ.get('QUIZ_ANSWER_KEY_CACHE_TTL', 60 * 60 * 24))  # Seconds a quiz's answer key stays cached
+
 # ThirdWeb settings
 THIRDWEB_API_KEY = os.environ.get('THIRDWEB_API_KEY', '')
 THIRDWEB_PRIVATE_KEY = os.environ.get('THIRDWEB_PRIVATE_KEY', '')
@@ -202,6 +234,25 @@ THIRDWEB_PRIVATE_KEY = os.environ.get('THIRDWEB_PRIVATE_KEY', '')
 # IPFS (Pinata) settings
 PINATA_API_KEY = os.environ.get('PINATA_API_KEY', '')
 PINATA_SECRET_API_KEY = os.environ.get('PINATA_SECRET_API_KEY', '')
+PINATA_TIMEOUT = int(os.environ.get('PINATA_TIMEOUT', 30))  # Seconds to wait for a Pinata upload
+
+# Certificate issuance (render, upload and pin run in the background)
+CERTIFICATE_WORKERS = int(os.environ.get('CERTIFICATE_WORKERS', 2))  # Threads issuing certificate PDFs per process
+CERTIFICATE_STAGE_RETRIES = int(os.environ.get('CERTIFICATE_STAGE_RETRIES', 3))  # Retries per issuance stage
+CERTIFICATE_STAGE_RETRY_DELAY = int(os.environ.get('CERTIFICATE_STAGE_RETRY_DELAY', 2))  # Seconds before the first retry, doubled each time
+CERTIFICATE_PDF_CACHE_DIR = os.environ.get('CERTIFICATE_PDF_CACHE_DIR', 'certificates/rendered')  # Storage directory for rendered certificate PDFs
+CERTIFICATE_BATCH_RENDER_PROCESSES = int(os.environ.get('CERTIFICATE_BATCH_RENDER_PROCESSES', 0)) or None  # Render processes for batch issuance (default: one per core)
+CERTIFICATE_BATCH_UPLOAD_CONCURRENCY = int(os.environ.get('CERTIFICATE_BATCH_UPLOAD_CONCURRENCY', 8))  # Concurrent uploads during batch issuance
+CERTIFICATE_ADMIN_BATCH_RENDER_PROCESSES = int(os.environ.get('CERTIFICATE_ADMIN_BATCH_RENDER_PROCESSES', 2))  # Render processes for batches started from the admin
+CERTIFICATE_BATCH_LOCK_TTL = int(os.environ.get('CERTIFICATE_BATCH_LOCK_TTL', 600))  # Seconds before the certificate creation lock expires
+
+# Proxy for certificate PDFs served from Cloudinary
+CERTIFICATE_PDF_PROXY_CONNECT_TIMEOUT = int(os.environ.get('CERTIFICATE_PDF_PROXY_CONNECT_TIMEOUT', 5))  # Seconds to connect to cloud storage
+CERTIFICATE_PDF_PROXY_READ_TIMEOUT = int(os.environ.get('CERTIFICATE_PDF_PROXY_READ_TIMEOUT', 30))  # Seconds to wait for each chunk
+CERTIFICATE_PDF_PROXY_POOL_SIZE = int(os.environ.get('CERTIFICATE_PDF_PROXY_POOL_SIZE', 10))  # Pooled connections per host
+CERTIFICATE_PDF_PROXY_CACHE_DIR = os.environ.get('CERTIFICATE_PDF_PROXY_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'edutube-pdf-cache'))  # Local copies of proxied PDFs
+CERTIFICATE_PDF_PROXY_CACHE_MAX_BYTES = int(os.environ.get('CERTIFICATE_PDF_PROXY_CACHE_MAX_BYTES', 200 * 1024 * 1024))  # Size cap of the local copies
+CERTIFICATE_PDF_PROXY_CACHE_TTL = int(os.environ.get('CERTIFICATE_PDF_PROXY_CACHE_TTL', 60 * 60 * 24))  # Seconds before a local copy is revalidated
 
 # Blockchain settings
 BLOCKCHAIN_NETWORK = os.environ.get('BLOCKCHAIN_NETWORK', 'polygon-mumbai')
@@ -210,14 +261,37 @@ BLOCKCHAIN_RPC_URL = os.environ.get('BLOCKCHAIN_RPC_URL', 'https://rpc-mumbai.ma
 # Site URL for production
 SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
 
+# Redis (locks and caching), optional
+REDIS_URL = os.environ.get('REDIS_URL', '')
+
 # Add caching configuration
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-edutube',
-        'TIMEOUT': 300,  # 5 minutes default
+if REDIS_URL:
+    # Shared across gunicorn workers and deploys, with a short-lived
+    # per-process tier in front and local memory while Redis is down
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TieredRedisCache',
+            'LOCATION': REDIS_URL,
+            'TIMEOUT': 300,  # 5 minutes default
+            'KEY_PREFIX': 'edutube',
+            'L1_TIMEOUT': int(os.environ.get('CACHE_L1_TIMEOUT', 5)),  # Seconds a value stays in the per-process tier
+            'L1_MAX_ENTRIES': int(os.environ.get('CACHE_L1_MAX_ENTRIES', 500)),
+            'RETRY_AFTER': 30,  # Seconds before retrying Redis after a connection error
+            'OPTIONS': {
+                'max_connections': int(os.environ.get('REDIS_MAX_CONNECTIONS', 50)),
+                'socket_timeout': 2,
+                'socket_connect_timeout': 2,
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-edutube',
+            'TIMEOUT': 300,  # 5 minutes default
+        }
     }
-}
 
 # Cloudinary Settings
 import cloudinary
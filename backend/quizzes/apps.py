@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class QuizzesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'quizzes'
+
+    def ready(self):
+        from .models import Option, Question, Quiz
+        from .signals import connect_answer_key_signals
+        connect_answer_key_signals(Quiz, Question, Option)
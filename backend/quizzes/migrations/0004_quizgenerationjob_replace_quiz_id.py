@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0003_quizgenerationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizgenerationjob',
+            name='replace_quiz_id',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -53,3 +53,50 @@ class QuizAttempt(TimeStampedModel):
     
     def __str__(self):
         return f"{self.user.username}'s attempt at {self.quiz.course.title} quiz"
+
+class QuizGenerationJob(TimeStampedModel):
+    """
+    Background quiz generation request for a course
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = [STATUS_PENDING, STATUS_RUNNING]
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='quiz_generation_jobs')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='quiz_generation_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    difficulty = models.CharField(max_length=20, default='basic')
+    question_count = models.PositiveIntegerField(default=10)
+    generation_mode = models.CharField(max_length=20, blank=True, null=True)
+    quiz = models.ForeignKey(Quiz, on_delete=models.SET_NULL, null=True, blank=True, related_name='generation_jobs')
+    replace_quiz_id = models.PositiveIntegerField(blank=True, null=True)  # Quiz the generated one replaces (force_new)
+    used_fallback = models.BooleanField(default=False)
+    error = models.TextField(blank=True, null=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # Concurrent requests for the same course share one active job
+            models.UniqueConstraint(
+                fields=['course'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='unique_active_quiz_job_per_course'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Quiz generation for {self.course.title} ({self.status})"
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
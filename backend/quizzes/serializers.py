@@ -1,6 +1,8 @@
 from rest_framework import serializers
-from .models import Quiz, Question, Option, QuizAttempt
-from courses.serializers import CourseSerializer
+from .models import Quiz, Question, Option, QuizAttempt, QuizGenerationJob
+from courses.models import Course
+from courses.serializers import get_lesson_count
+from .services.scoring import score_submission
 
 class OptionSerializer(serializers.ModelSerializer):
     """
@@ -25,12 +27,29 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = ['id', 'quiz', 'text', 'difficulty', 'options', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+class QuizCourseSerializer(serializers.ModelSerializer):
+    """
+    The course a quiz belongs to, without its lessons
+    """
+    lesson_count = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Course
+        fields = ['id', 'title', 'youtube_id', 'thumbnail_url', 'lesson_count']
+        read_only_fields = fields
+    
+    def get_lesson_count(self, obj):
+        """
+        Get the number of lessons in the course
+        """
+        return get_lesson_count(obj)
+
 class QuizSerializer(serializers.ModelSerializer):
     """
     Serializer for the Quiz model
     """
     questions = QuestionSerializer(many=True, read_only=True)
-    course_details = CourseSerializer(source='course', read_only=True)
+    course_details = QuizCourseSerializer(source='course', read_only=True)
     question_count = serializers.SerializerMethodField()
     
     class Meta:
@@ -42,6 +61,12 @@ class QuizSerializer(serializers.ModelSerializer):
         """
         Get the number of questions in the quiz
         """
+        # Prefer the count annotated by the view, then prefetched questions
+        question_count = getattr(obj, 'question_count', None)
+        if question_count is not None:
+            return question_count
+        if 'questions' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len(obj.questions.all())
         return obj.questions.count()
 
 class AnswerSerializer(serializers.Serializer):
@@ -99,28 +124,10 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
         # Remove answers from validated_data
         answers_data = validated_data.pop('answers', [])
         
-        # Calculate score before creating attempt
-        correct_count = 0
-        total_questions = quiz.questions.count()
-        
-        for answer in answers_data:
-            question_id = answer.get('question_id')
-            option_id = answer.get('option_id')
-            
-            try:
-                option = Option.objects.get(id=option_id, question_id=question_id)
-                if option.is_correct:
-                    correct_count += 1
-            except Option.DoesNotExist:
-                pass
-        
-        # Set score and passed status in validated_data
-        if total_questions > 0:
-            validated_data['score'] = (correct_count / total_questions) * 100
-            validated_data['passed'] = validated_data['score'] >= 70  # Pass threshold is 70%
-        else:
-            validated_data['score'] = 0
-            validated_data['passed'] = False
+        # Score the whole submission against the quiz's answer key
+        score, passed, _, _ = score_submission(quiz, answers_data)
+        validated_data['score'] = score
+        validated_data['passed'] = passed  # Pass threshold is 70%
             
         # Store answers in JSON format for future reference
         validated_data['answers'] = [{
@@ -131,4 +138,41 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
         # Create the attempt with score already calculated
         attempt = super().create(validated_data)
         
-        return attempt 
\ No newline at end of file
+        return attempt 
+
+class QuizAttemptListSerializer(serializers.ModelSerializer):
+    """
+    Flat quiz attempt representation for attempt history
+    """
+    username = serializers.CharField(source='user.username', read_only=True)
+    quiz_title = serializers.SerializerMethodField()
+    course = serializers.IntegerField(source='quiz.course_id', read_only=True)
+    course_title = serializers.CharField(source='quiz.course.title', read_only=True)
+    
+    class Meta:
+        model = QuizAttempt
+        fields = ['id', 'user', 'username', 'quiz', 'quiz_title', 'course', 'course_title', 'score', 'passed', 'created_at']
+        read_only_fields = fields
+    
+    def get_quiz_title(self, obj):
+        return str(obj.quiz)
+
+class QuizGenerationJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for background quiz generation jobs
+    """
+    quiz = serializers.SerializerMethodField()
+
+    class Meta:
+        model = QuizGenerationJob
+        fields = ['id', 'course', 'status', 'difficulty', 'question_count', 'generation_mode',
+                  'quiz', 'used_fallback', 'error', 'started_at', 'finished_at', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+    def get_quiz(self, obj):
+        """
+        Include the generated quiz once the job has succeeded
+        """
+        if obj.status != QuizGenerationJob.STATUS_SUCCEEDED or obj.quiz is None:
+            return None
+        return QuizSerializer(obj.quiz).data
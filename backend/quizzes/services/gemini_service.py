@@ -0,0 +1,189 @@
+"""
+Process-wide Gemini model resolution.
+
+Listing the available Gemini models costs a network round trip, so the result
+is resolved once per process and kept for ``GEMINI_MODEL_CACHE_TTL`` seconds.
+When listing fails the ``DEFAULT_MODEL`` chain is kept for
+``GEMINI_MODEL_RETRY_AFTER`` seconds before trying again. The resolver keeps
+a ready-made fallback chain of ``GenerativeModel`` objects and re-resolves
+early when every model in the chain fails.
+"""
+import os
+import threading
+import time
+
+import google.generativeai as genai
+from django.conf import settings
+
+# Models to try first, in order of preference
+PREFERRED_MODELS = [
+    'models/gemini-1.5-pro',
+    'models/gemini-pro',
+    'models/gemini-1.0-pro',
+    'models/gemini-1.5-flash',
+    'models/text-bison-001'
+]
+
+# Models that predate structured output and reject ``response_schema``
+NO_SCHEMA_MODELS = ['gemini-pro', 'gemini-1.0', 'text-bison', 'chat-bison']
+
+# Used when the model list can't be read but the API key is set
+DEFAULT_MODEL = 'gemini-1.5-pro'
+
+GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 1,
+    "top_k": 32,
+    "max_output_tokens": 8192,
+}
+
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_ONLY_HIGH"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_ONLY_HIGH"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_ONLY_HIGH"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_ONLY_HIGH"},
+]
+
+
+def rank_model_names(model_names):
+    """
+    Order available model names by preference, skipping embedding models
+    """
+    ranked = []
+    for preferred in PREFERRED_MODELS:
+        ranked.extend(m for m in model_names if preferred in m and m not in ranked)
+    ranked.extend(m for m in model_names if 'embedding' not in m.lower() and m not in ranked)
+    return ranked
+
+
+def supports_response_schema(model_name):
+    """
+    Whether a model accepts a ``response_schema`` for JSON output
+    """
+    return not any(legacy in model_name for legacy in NO_SCHEMA_MODELS)
+
+
+class GeminiModelResolver:
+    """
+    Thread-safe cache of the Gemini models used for quiz generation
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._api_key = None
+        self._chain = []
+        self._expires_at = 0.0
+
+    @property
+    def model_name(self):
+        """
+        Name of the model currently at the head of the fallback chain
+        """
+        chain = self._chain
+        return chain[0][0] if chain else None
+
+    @property
+    def model_names(self):
+        """
+        Names of every model in the fallback chain, in the order they are tried
+        """
+        return [name for name, _ in self._chain]
+
+    def get_models(self):
+        """
+        Return the fallback chain as a list of ``(model_name, GenerativeModel)`` pairs.
+
+        Returns an empty list if no API key is configured or no text
+        generation model is available.
+        """
+        api_key = os.environ.get('GEMINI_API_KEY', '')
+        if not api_key:
+            return []
+
+        with self._lock:
+            if time.monotonic() >= self._expires_at or api_key != self._api_key:
+                self._resolve(api_key)
+            return list(self._chain)
+
+    def get_structured_models(self):
+        """
+        Return the part of the fallback chain that supports ``response_schema``
+        """
+        return [(name, model) for name, model in self.get_models() if supports_response_schema(name)]
+
+    def invalidate(self):
+        """
+        Force the next call to list the available models again
+        """
+        with self._lock:
+            self._expires_at = 0.0
+
+    def generate_content(self, prompt, structured=False, **kwargs):
+        """
+        Generate content with the first model in the chain that succeeds.
+
+        With ``structured=True`` only models that support ``response_schema``
+        are tried, since the others reject it.
+        """
+        chain = self.get_structured_models() if structured else self.get_models()
+        if not chain:
+            raise Exception("No text generation models available")
+
+        last_error = None
+        for model_name, model in chain:
+            try:
+                return model.generate_content(prompt, **kwargs)
+            except Exception as e:
+                print(f"Gemini model {model_name} failed: {str(e)}")
+                last_error = e
+
+        # Every model failed, the cached list may be out of date
+        self.invalidate()
+        raise last_error
+
+    def _resolve(self, api_key):
+        """
+        List the available models and build the fallback chain
+        """
+        genai.configure(api_key=api_key)
+
+        try:
+            model_names = [
+                model.name for model in genai.list_models()
+                if 'generateContent' in getattr(model, 'supported_generation_methods', ['generateContent'])
+            ]
+            print(f"Available Gemini models: {model_names}")
+            ranked = rank_model_names(model_names)
+            listed = True
+        except Exception as e:
+            print(f"Error listing Gemini models: {str(e)}, using {DEFAULT_MODEL}")
+            ranked = [DEFAULT_MODEL]
+            listed = False
+
+        max_models = getattr(settings, 'GEMINI_MODEL_FALLBACKS', 3)
+        chain = []
+        for model_name in ranked[:max_models]:
+            try:
+                chain.append((model_name, genai.GenerativeModel(
+                    model_name=model_name,
+                    generation_config=GENERATION_CONFIG,
+                    safety_settings=SAFETY_SETTINGS
+                )))
+            except Exception as e:
+                print(f"Error creating Gemini model {model_name}: {str(e)}")
+
+        self._api_key = api_key
+        self._chain = chain
+        # Keep a failed lookup only briefly so an outage isn't re-listed on every call
+        if listed and chain:
+            ttl = getattr(settings, 'GEMINI_MODEL_CACHE_TTL', 60 * 60)
+        else:
+            ttl = getattr(settings, 'GEMINI_MODEL_RETRY_AFTER', 30)
+        self._expires_at = time.monotonic() + ttl
+        if chain:
+            print(f"Using Gemini model: {chain[0][0]}")
+        else:
+            print("No suitable text generation models found")
+
+
+gemini_models = GeminiModelResolver()
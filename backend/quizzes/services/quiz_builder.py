@@ -0,0 +1,57 @@
+"""
+Bulk persistence for generated quizzes.
+
+Questions and options are built in memory and written with ``bulk_create``
+inside one transaction, so a 15-question quiz costs a handful of INSERTs
+instead of one per row.
+"""
+from django.db import transaction
+
+from quizzes.models import Quiz
+
+
+def create_quiz(course, questions, quiz_model=Quiz, **quiz_fields):
+    """
+    Create a quiz with all of its questions and options.
+
+    ``questions`` is a list of dicts as returned by
+    ``quiz_generation.generate_questions``. Returns the saved quiz with its
+    course, questions and options already loaded for serialization.
+    """
+    with transaction.atomic():
+        quiz = quiz_model.objects.create(course=course, **quiz_fields)
+        save_questions(quiz, questions)
+
+    return (
+        quiz_model.objects
+        .select_related('course')
+        .prefetch_related('questions__options')
+        .get(pk=quiz.pk)
+    )
+
+
+def save_questions(quiz, questions):
+    """
+    Bulk insert question and option rows for an existing quiz
+    """
+    question_model = quiz.questions.model
+    option_model = question_model._meta.get_field('options').related_model
+
+    question_rows = [
+        question_model(quiz=quiz, text=q_data['text'], difficulty=q_data['difficulty'])
+        for q_data in questions
+    ]
+    question_model.objects.bulk_create(question_rows)
+
+    if any(question.pk is None for question in question_rows):
+        # The database didn't return primary keys, read them back in insert order
+        question_rows = list(question_model.objects.filter(quiz=quiz).order_by('id'))[-len(question_rows):]
+
+    option_rows = [
+        option_model(question=question, text=o_data['text'], is_correct=o_data['is_correct'])
+        for question, q_data in zip(question_rows, questions)
+        for o_data in q_data['options']
+    ]
+    option_model.objects.bulk_create(option_rows)
+
+    return question_rows
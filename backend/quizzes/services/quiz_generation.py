@@ -0,0 +1,277 @@
+"""
+Quiz question generation with Gemini.
+
+The default ``batched`` mode asks for every difficulty level in one call and
+requests a JSON response matching ``QUIZ_RESPONSE_SCHEMA``, so the transcript
+is only sent once. Only models that accept a response schema are tried for
+it; without any, generation falls back to ``per_level``. The older
+``per_level`` mode makes one call per difficulty level and parses the
+numbered ``1. / A)`` text format.
+
+Both modes return questions as plain dicts::
+
+    {'text': ..., 'difficulty': ..., 'options': [{'text': ..., 'is_correct': ...}, ...]}
+"""
+import json
+import re
+
+from django.conf import settings
+
+from .gemini_service import gemini_models
+
+DIFFICULTY_LEVELS = ['basic', 'intermediate', 'advanced']
+QUESTIONS_PER_LEVEL = 5
+
+GENERATION_MODE_BATCHED = 'batched'
+GENERATION_MODE_PER_LEVEL = 'per_level'
+
+QUIZ_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "questions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "difficulty": {"type": "string"},
+                    "text": {"type": "string"},
+                    "options": {"type": "array", "items": {"type": "string"}},
+                    "correct_option": {"type": "integer"},
+                },
+                "required": ["difficulty", "text", "options", "correct_option"],
+            },
+        },
+    },
+    "required": ["questions"],
+}
+
+# Strips "A) ", "b. " style prefixes the model sometimes adds to options
+OPTION_PREFIX_RE = re.compile(r'^[A-Da-d][\).]\s+')
+
+
+def plan_questions(difficulty, question_count):
+    """
+    Return a list of ``(difficulty_level, count)`` pairs to generate
+    """
+    plan = []
+    remaining = question_count
+    for level in DIFFICULTY_LEVELS:
+        if remaining <= 0:
+            break
+        # Skip this difficulty level if the user didn't request it
+        if difficulty != 'all' and difficulty != level:
+            continue
+        count = min(QUESTIONS_PER_LEVEL, remaining)
+        plan.append((level, count))
+        remaining -= count
+    return plan
+
+
+def generate_questions(title, description, transcript_text, difficulty='basic', question_count=10, mode=None):
+    """
+    Generate quiz questions for the given content with Gemini.
+
+    Raises if the model call fails; returns an empty list if the response
+    contained no usable questions.
+    """
+    plan = plan_questions(difficulty, question_count)
+    if not plan:
+        return []
+
+    mode = mode or getattr(settings, 'QUIZ_GENERATION_MODE', GENERATION_MODE_BATCHED)
+    if mode != GENERATION_MODE_PER_LEVEL and not gemini_models.get_structured_models():
+        print("No Gemini model supports structured output, generating questions per level")
+        mode = GENERATION_MODE_PER_LEVEL
+
+    if mode == GENERATION_MODE_PER_LEVEL:
+        questions = []
+        for level, count in plan:
+            prompt = build_level_prompt(level, count, title, description, transcript_text)
+            response = gemini_models.generate_content(prompt)
+            questions.extend(parse_numbered_quiz(response.text, level))
+        return questions
+
+    prompt = build_batched_prompt(plan, title, description, transcript_text)
+    response = gemini_models.generate_content(
+        prompt,
+        structured=True,
+        generation_config={
+            "response_mime_type": "application/json",
+            "response_schema": QUIZ_RESPONSE_SCHEMA,
+        }
+    )
+    return parse_structured_quiz(response.text, plan)
+
+
+def build_batched_prompt(plan, title, description, transcript_text):
+    """
+    Build a single prompt asking for every planned difficulty level
+    """
+    counts = "\n".join(f"- {count} questions at {level} level" for level, count in plan)
+    return f"""
+    Generate multiple-choice quiz questions about the following educational content:
+    {counts}
+    Each question should have 4 options with exactly one correct answer.
+
+    Title: {title}
+    Description: {description}
+    Transcript: {transcript_text}
+
+    Return JSON with a "questions" array. For each question give:
+    - "difficulty": one of {", ".join(level for level, _ in plan)}
+    - "text": the question text
+    - "options": the 4 answer options as plain text, without letters
+    - "correct_option": the 0-based index of the correct option
+
+    The questions should test understanding of key concepts from the content.
+    Questions should be clear, concise, and focused on the important educational content.
+    DO NOT include any explanations.
+    """
+
+
+def parse_structured_quiz(text, plan):
+    """
+    Validate a JSON quiz response and convert it to question dicts.
+
+    Invalid questions are skipped, and each difficulty level is capped at the
+    planned count.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        # Tolerate a fenced code block around the JSON
+        text = text.strip("`")
+        text = text[text.find("{"):]
+
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        print(f"Could not parse quiz JSON: {e}")
+        return []
+
+    items = data.get('questions', []) if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return []
+
+    remaining = dict(plan)
+    questions = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+
+        level = str(item.get('difficulty', '')).strip().lower()
+        question_text = item.get('text')
+        options = item.get('options')
+        correct_option = item.get('correct_option')
+
+        if remaining.get(level, 0) <= 0:
+            continue
+        if not isinstance(question_text, str) or not question_text.strip():
+            continue
+        if not isinstance(options, list) or not 2 <= len(options) <= 6:
+            continue
+        if not all(isinstance(option, str) and option.strip() for option in options):
+            continue
+        if isinstance(correct_option, bool) or not isinstance(correct_option, int):
+            continue
+        if not 0 <= correct_option < len(options):
+            continue
+
+        questions.append({
+            'text': question_text.strip(),
+            'difficulty': level,
+            'options': [
+                {'text': OPTION_PREFIX_RE.sub('', option.strip()), 'is_correct': i == correct_option}
+                for i, option in enumerate(options)
+            ]
+        })
+        remaining[level] -= 1
+
+    return questions
+
+
+def build_level_prompt(difficulty, count, title, description, transcript_text):
+    """
+    Build the prompt for one difficulty level in the numbered text format
+    """
+    return f"""
+    Generate {count} multiple-choice quiz questions about the following educational content.
+    The questions should be at {difficulty} level.
+    Each question should have 4 options with exactly one correct answer.
+
+    Title: {title}
+    Description: {description}
+    Transcript: {transcript_text}
+
+    Format each question as:
+    1. Question text
+    A) First option (correct)
+    B) Second option
+    C) Third option
+    D) Fourth option
+
+    2. Question text
+    A) First option
+    B) Second option (correct)
+    C) Third option
+    D) Fourth option
+
+    ... and so on.
+
+    Make sure to mark the correct answer with (correct).
+    The questions should test understanding of key concepts from the content.
+    Questions should be clear, concise, and focused on the important educational content.
+    DO NOT include any explanations, just the questions and options as specified.
+    """
+
+
+def parse_numbered_quiz(text, difficulty):
+    """
+    Parse the numbered ``1. / A)`` text format into question dicts
+    """
+    questions = []
+    current_question = None
+    options = []
+    correct_option = None
+
+    def add_question():
+        if current_question and options:
+            questions.append({
+                'text': current_question,
+                'difficulty': difficulty,
+                'options': [
+                    {'text': option_text, 'is_correct': i == correct_option}
+                    for i, option_text in enumerate(options)
+                ]
+            })
+
+    for line in text.strip().split('\n'):
+        line = line.strip()
+
+        if not line:
+            continue
+
+        # Check if this is a question line (starts with a number and a dot)
+        if line[0].isdigit() and '.' in line[:3]:
+            # Save the previous question if exists
+            add_question()
+
+            # Start a new question
+            current_question = line.split('.', 1)[1].strip()
+            options = []
+            correct_option = None
+
+        # Check if this is an option line
+        elif len(line) > 1 and line[0] in "ABCD" and line[1] in [")", "."]:
+            option_text = line[2:].strip()
+
+            # Check if this is the correct option
+            if "(correct)" in option_text.lower():
+                correct_option = len(options)
+                option_text = option_text.replace("(correct)", "").replace("(Correct)", "").strip()
+
+            options.append(option_text)
+
+    # Save the last question if exists
+    add_question()
+
+    return questions
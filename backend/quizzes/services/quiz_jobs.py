@@ -0,0 +1,151 @@
+"""
+Background quiz generation jobs.
+
+``enqueue_quiz_generation`` records a ``QuizGenerationJob`` and hands it to a
+local worker pool once the transaction commits, so the request returns
+immediately. The job row is the source of truth for status: a partial unique
+constraint allows one active job per course, and concurrent requests for the
+same course get the existing job back instead of starting another pipeline.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.tasks import BackgroundPool
+from quizzes.models import QuizGenerationJob
+
+from .quiz_pipeline import get_or_generate_quiz
+
+quiz_job_pool = BackgroundPool('quiz-jobs', getattr(settings, 'QUIZ_JOB_WORKERS', 2))
+
+# Inserts to try before giving up when other jobs keep winning the race
+ENQUEUE_ATTEMPTS = 5
+
+
+class QuizJobConflict(Exception):
+    """
+    Raised when no active job could be created or found for a course
+    """
+
+
+def get_active_job(course):
+    """
+    Return the pending or running job for a course, if any
+    """
+    return (
+        QuizGenerationJob.objects
+        .filter(course=course, status__in=QuizGenerationJob.ACTIVE_STATUSES)
+        .first()
+    )
+
+
+def enqueue_quiz_generation(course, user=None, difficulty='basic', question_count=10, mode=None, replace_quiz_id=None):
+    """
+    Queue quiz generation for a course, replacing ``replace_quiz_id`` if given.
+
+    Returns ``(job, created)``. When the course already has an active job it
+    is returned with ``created=False`` and nothing new is queued.
+    """
+    expire_stale_job(course)
+
+    requested_by = user if user and user.is_authenticated else None
+
+    for attempt in range(ENQUEUE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                job = QuizGenerationJob.objects.create(
+                    course=course,
+                    requested_by=requested_by,
+                    difficulty=difficulty,
+                    question_count=question_count,
+                    generation_mode=mode,
+                    replace_quiz_id=replace_quiz_id
+                )
+        except IntegrityError:
+            existing = get_active_job(course)
+            if existing:
+                return existing, False
+            # The other job finished between our insert and lookup, try again
+            continue
+
+        transaction.on_commit(lambda: quiz_job_pool.submit(run_quiz_job, job.pk))
+        return job, True
+
+    raise QuizJobConflict(f"Could not queue quiz generation for course {course.pk}")
+
+
+def running_job_timeout():
+    """
+    Seconds a running job may take: waiting for another generation of the
+    course, then generating itself
+    """
+    return 2 * settings.QUIZ_GENERATION_LOCK_TTL
+
+
+def expire_stale_job(course):
+    """
+    Fail an active job that has been stuck for too long.
+
+    Jobs only live in this process's pool, so a worker restart leaves them
+    pending or running forever; expiring them lets the course be queued
+    again. Pending jobs expire ``QUIZ_JOB_STALE_AFTER`` seconds after they
+    were queued, running jobs once they've run longer than a generation can.
+    """
+    now = timezone.now()
+    pending_cutoff = now - timedelta(seconds=getattr(settings, 'QUIZ_JOB_STALE_AFTER', 600))
+    running_cutoff = now - timedelta(seconds=running_job_timeout())
+    QuizGenerationJob.objects.filter(course=course).filter(
+        Q(status=QuizGenerationJob.STATUS_PENDING, created_at__lt=pending_cutoff)
+        | Q(status=QuizGenerationJob.STATUS_RUNNING, started_at__lt=running_cutoff)
+    ).update(
+        status=QuizGenerationJob.STATUS_FAILED,
+        error='Job timed out',
+        finished_at=now,
+        updated_at=now
+    )
+
+
+def run_quiz_job(job_id):
+    """
+    Run a queued job on a worker thread and record the result
+    """
+    claimed = QuizGenerationJob.objects.filter(
+        pk=job_id, status=QuizGenerationJob.STATUS_PENDING
+    ).update(
+        status=QuizGenerationJob.STATUS_RUNNING,
+        started_at=timezone.now(),
+        updated_at=timezone.now()
+    )
+    if not claimed:
+        # Already picked up, or expired before a worker got to it
+        return
+
+    job = QuizGenerationJob.objects.select_related('course').get(pk=job_id)
+    try:
+        # Shares the per-course lock with inline generation, so a quiz that
+        # was created while this job was queued is reused. Jobs don't hold a
+        # request thread, so they wait as long as a generation may run
+        quiz, used_fallback, _ = get_or_generate_quiz(
+            job.course,
+            difficulty=job.difficulty,
+            question_count=job.question_count,
+            mode=job.generation_mode,
+            replace_quiz_id=job.replace_quiz_id,
+            wait_timeout=settings.QUIZ_GENERATION_LOCK_TTL
+        )
+    except Exception as e:
+        print(f"Quiz generation job {job_id} failed: {str(e)}")
+        job.status = QuizGenerationJob.STATUS_FAILED
+        job.error = str(e)
+    else:
+        job.status = QuizGenerationJob.STATUS_SUCCEEDED
+        job.quiz = quiz
+        job.used_fallback = used_fallback
+        job.error = None
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'quiz', 'used_fallback', 'error', 'finished_at', 'updated_at'])
+    return job
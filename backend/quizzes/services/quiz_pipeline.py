@@ -0,0 +1,240 @@
+"""
+End-to-end quiz generation for a course.
+
+Collects the course's transcripts and metadata from YouTube, generates
+questions with Gemini and saves the quiz. Used both inline by
+``CourseViewSet.generate_quiz`` and by background quiz generation jobs.
+"""
+import os
+import time
+
+from django.conf import settings
+
+from core.singleflight import SingleFlight
+from courses.services.transcript_service import fetch_transcripts
+from courses.services.youtube_metadata import youtube_metadata
+from courses.services.youtube_service import get_youtube_service
+from quizzes.models import Quiz
+
+from .gemini_service import gemini_models
+from .quiz_builder import create_quiz
+from .quiz_generation import generate_questions
+
+# Gemini has token limits, so long transcripts are truncated
+MAX_TRANSCRIPT_LENGTH = 10000
+
+
+class QuizGenerationError(Exception):
+    """
+    Raised when quiz generation can't run because a service isn't configured
+    """
+
+
+def get_or_generate_quiz(course, difficulty='basic', question_count=10, mode=None, replace_quiz_id=None,
+                         wait_timeout=None):
+    """
+    Return the course's quiz, generating it if there isn't one yet.
+
+    Generation is single-flight per course: one caller generates while
+    concurrent callers wait for it to finish and get the same quiz. With
+    ``replace_quiz_id`` that quiz doesn't count; a new one is generated and
+    the old one (with its attempts) deleted under the same lock, unless
+    another caller has replaced it already. Waits at most ``wait_timeout``
+    seconds (default ``QUIZ_GENERATION_WAIT_TIMEOUT``) on another caller.
+    Returns ``(quiz, used_fallback, generated)``.
+    """
+    if wait_timeout is None:
+        wait_timeout = settings.QUIZ_GENERATION_WAIT_TIMEOUT
+    flight = SingleFlight(f"quiz-generation:{course.pk}", ttl=settings.QUIZ_GENERATION_LOCK_TTL)
+    deadline = time.monotonic() + wait_timeout
+
+    while True:
+        if flight.acquire():
+            try:
+                # Another leader may have finished just before we got the lock
+                quiz = latest_quiz(course)
+                if quiz is not None and quiz.pk != replace_quiz_id:
+                    return quiz, False, False
+                quiz, used_fallback = generate_quiz_for_course(
+                    course,
+                    difficulty=difficulty,
+                    question_count=question_count,
+                    mode=mode
+                )
+                if replace_quiz_id is not None:
+                    # Only once the new quiz is saved, so readers never find the course without one
+                    print(f"Replacing quiz {replace_quiz_id} with {quiz.id} for course {course.pk}")
+                    Quiz.objects.filter(pk=replace_quiz_id, course=course).delete()
+                return quiz, used_fallback, True
+            finally:
+                flight.release()
+
+        print(f"Waiting for quiz generation already running for course {course.pk}")
+        flight.wait(max(deadline - time.monotonic(), 0))
+        quiz = latest_quiz(course)
+        if quiz is not None and quiz.pk != replace_quiz_id:
+            return quiz, False, False
+        # The leader failed without saving a quiz, take over if there's time left
+        if time.monotonic() >= deadline:
+            raise QuizGenerationError('Timed out waiting for quiz generation')
+
+
+def latest_quiz(course):
+    """
+    Return the most recent quiz for a course, if any
+    """
+    return (
+        Quiz.objects
+        .filter(course=course)
+        .select_related('course')
+        .prefetch_related('questions__options')
+        .order_by('-id')
+        .first()
+    )
+
+
+def generate_quiz_for_course(course, difficulty='basic', question_count=10, mode=None):
+    """
+    Generate and save a quiz for a course.
+
+    Returns ``(quiz, used_fallback)``. Falls back to sample questions when
+    the AI can't produce any, and raises ``QuizGenerationError`` when the
+    YouTube or Gemini API isn't configured.
+    """
+    # Get YouTube service for fetching video details
+    youtube = get_youtube_service()
+    if not youtube:
+        raise QuizGenerationError('YouTube API service could not be initialized')
+
+    # Get video IDs to process
+    if course.is_playlist:
+        try:
+            # For playlists, get the first few videos (up to 5)
+            playlist_items_request = youtube.playlistItems().list(
+                part="snippet,contentDetails",
+                playlistId=course.youtube_id,
+                maxResults=5
+            )
+            playlist_response = playlist_items_request.execute()
+            video_ids = [item['contentDetails']['videoId'] for item in playlist_response['items']]
+        except Exception as e:
+            print(f"Error fetching playlist items: {str(e)}")
+            # Fallback - if we can't get playlist items, treat as single video
+            video_ids = [course.youtube_id]
+    else:
+        # Single video
+        video_ids = [course.youtube_id]
+
+    # Get transcripts for all videos concurrently, keeping playlist order
+    all_transcripts = fetch_transcripts(video_ids)
+
+    # Combine all transcripts
+    transcript_text = " ".join(t for t in all_transcripts if t)
+    if len(transcript_text) > MAX_TRANSCRIPT_LENGTH:
+        transcript_text = transcript_text[:MAX_TRANSCRIPT_LENGTH]
+
+    # Get content details from YouTube
+    title = course.title
+    description = course.description
+    if not course.is_playlist:
+        video = youtube_metadata.video(course.youtube_id)
+        if video:
+            video_data = video['snippet']
+            title = video_data.get('title', course.title)
+            description = video_data.get('description', course.description)
+
+    if not os.environ.get('GEMINI_API_KEY'):
+        raise QuizGenerationError('Gemini API key not configured')
+
+    # Resolve the Gemini models (cached per process)
+    if not gemini_models.get_models():
+        print("No suitable text generation models found, using fallback quiz generation")
+        return create_fallback_quiz(course, title), True
+
+    print(f"Using Gemini model: {gemini_models.model_name}")
+
+    try:
+        questions = generate_questions(
+            title,
+            description,
+            transcript_text,
+            difficulty=difficulty,
+            question_count=question_count,
+            mode=mode
+        )
+    except Exception as ai_error:
+        print(f"Error during AI quiz generation: {str(ai_error)}")
+        questions = []
+
+    # If no questions were generated, use the fallback
+    if not questions:
+        return create_fallback_quiz(course, title), True
+
+    # Create the quiz with all questions and options in one transaction
+    return create_quiz(course, questions, title=f"Quiz for {course.title}"), False
+
+
+def create_fallback_quiz(course, title):
+    """
+    Save a simple quiz with sample questions when AI generation fails
+    """
+    print("Using fallback method to generate sample quiz questions")
+    return create_quiz(course, build_fallback_questions(title), title=f"Quiz for {course.title}")
+
+
+def build_fallback_questions(title):
+    """
+    Generate some sample questions based on the video title
+    """
+    return [
+        {
+            "text": f"What is the main topic of '{title}'?",
+            "options": [
+                {"text": "The content shown in the video", "is_correct": True},
+                {"text": "An unrelated topic", "is_correct": False},
+                {"text": "The history of YouTube", "is_correct": False},
+                {"text": "None of the above", "is_correct": False}
+            ],
+            "difficulty": "basic"
+        },
+        {
+            "text": f"Who created '{title}'?",
+            "options": [
+                {"text": "The channel owner", "is_correct": True},
+                {"text": "A random content creator", "is_correct": False},
+                {"text": "An AI system", "is_correct": False},
+                {"text": "Unknown", "is_correct": False}
+            ],
+            "difficulty": "basic"
+        },
+        {
+            "text": "What platform is this content hosted on?",
+            "options": [
+                {"text": "YouTube", "is_correct": True},
+                {"text": "Vimeo", "is_correct": False},
+                {"text": "Facebook", "is_correct": False},
+                {"text": "TikTok", "is_correct": False}
+            ],
+            "difficulty": "basic"
+        },
+        {
+            "text": "Which of the following is true about this content?",
+            "options": [
+                {"text": "It is available online", "is_correct": True},
+                {"text": "It requires a special subscription", "is_correct": False},
+                {"text": "It's only available in printed form", "is_correct": False},
+                {"text": "It doesn't exist", "is_correct": False}
+            ],
+            "difficulty": "basic"
+        },
+        {
+            "text": "What is required to watch this content?",
+            "options": [
+                {"text": "Internet access", "is_correct": True},
+                {"text": "Special hardware", "is_correct": False},
+                {"text": "A paid subscription", "is_correct": False},
+                {"text": "Administrative permission", "is_correct": False}
+            ],
+            "difficulty": "basic"
+        }
+    ]
@@ -0,0 +1,134 @@
+"""
+Set-based quiz scoring.
+
+A quiz's answer key (the correct option IDs for each question, plus the
+question count) is loaded in one query and submissions are scored against it
+in memory, instead of looking up every submitted option separately.
+
+Quizzes don't change after generation, so answer keys are kept in the shared
+cache and only rebuilt after the signal handlers in ``quizzes.signals``
+invalidate them.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import FilteredRelation, Q
+
+# Percentage needed to pass a quiz
+PASS_THRESHOLD = 70
+
+
+class AnswerKey:
+    """
+    Correct option IDs for each question of a quiz
+    """
+
+    def __init__(self, quiz_id, correct_options):
+        self.quiz_id = quiz_id
+        # question_id -> frozenset of correct option IDs
+        self.correct_options = correct_options
+
+    @property
+    def total_questions(self):
+        return len(self.correct_options)
+
+    @classmethod
+    def load(cls, quiz):
+        """
+        Build the answer key for a quiz with a single query.
+
+        Works for any quiz model with ``questions`` and ``options`` relations,
+        so the legacy ``api`` app can use it too.
+        """
+        question_model = quiz.questions.model
+        rows = (
+            question_model.objects
+            .filter(quiz_id=quiz.pk)
+            # LEFT JOIN only the correct options, so questions without one still count
+            .annotate(correct=FilteredRelation('options', condition=Q(options__is_correct=True)))
+            .values_list('id', 'correct__id')
+        )
+
+        correct_options = {}
+        for question_id, option_id in rows:
+            options = correct_options.setdefault(question_id, set())
+            if option_id is not None:
+                options.add(option_id)
+
+        return cls(quiz.pk, {question_id: frozenset(ids) for question_id, ids in correct_options.items()})
+
+    @classmethod
+    def get(cls, quiz):
+        """
+        Return the cached answer key for a quiz, building it on first use
+        """
+        key = answer_key_cache_key(quiz._meta.label_lower, quiz.pk)
+        cached = cache.get(key)
+        if cached is not None:
+            return cls.from_cache(quiz.pk, cached)
+
+        answer_key = cls.load(quiz)
+        cache.set(key, answer_key.to_cache(), getattr(settings, 'QUIZ_ANSWER_KEY_CACHE_TTL', 60 * 60 * 24))
+        return answer_key
+
+    def to_cache(self):
+        """
+        Compact form for the cache: ``[[question_id, [option_id, ...]], ...]``
+        """
+        return [[question_id, sorted(ids)] for question_id, ids in self.correct_options.items()]
+
+    @classmethod
+    def from_cache(cls, quiz_id, data):
+        return cls(quiz_id, {question_id: frozenset(ids) for question_id, ids in data})
+
+    def count_correct(self, answers):
+        """
+        Count correctly answered questions.
+
+        ``answers`` is a list of ``{'question_id', 'option_id'}`` dicts. Only
+        the last answer for each question counts, and answers for questions
+        outside this quiz are ignored.
+        """
+        selected = {}
+        for answer in answers:
+            try:
+                question_id = int(answer.get('question_id'))
+                option_id = int(answer.get('option_id'))
+            except (TypeError, ValueError):
+                continue
+            selected[question_id] = option_id
+
+        return sum(
+            1 for question_id, option_id in selected.items()
+            if option_id in self.correct_options.get(question_id, ())
+        )
+
+    def score(self, answers):
+        """
+        Score a submission, returning ``(score, passed, correct_count)``
+        """
+        correct_count = self.count_correct(answers)
+        if self.total_questions > 0:
+            score = (correct_count / self.total_questions) * 100
+        else:
+            score = 0
+        return score, score >= PASS_THRESHOLD, correct_count
+
+
+def score_submission(quiz, answers):
+    """
+    Score answers for a quiz, returning ``(score, passed, correct_count, total_questions)``
+    """
+    answer_key = AnswerKey.get(quiz)
+    score, passed, correct_count = answer_key.score(answers)
+    return score, passed, correct_count, answer_key.total_questions
+
+
+def answer_key_cache_key(model_label, quiz_id):
+    return f"quiz-answer-key:{model_label}:{quiz_id}"
+
+
+def invalidate_answer_key(quiz_model, quiz_id):
+    """
+    Drop a quiz's cached answer key so the next submission rebuilds it
+    """
+    cache.delete(answer_key_cache_key(quiz_model._meta.label_lower, quiz_id))
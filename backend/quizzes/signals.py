@@ -0,0 +1,38 @@
+"""
+Answer key cache invalidation.
+
+Cached answer keys (see ``quizzes.services.scoring``) are dropped when a quiz
+is deleted or replaced, or when its questions or options are edited.
+"""
+from django.db.models.signals import post_delete, post_save
+
+from .services.scoring import invalidate_answer_key
+
+
+def connect_answer_key_signals(quiz_model, question_model, option_model):
+    """
+    Invalidate cached answer keys when these models change
+    """
+    def quiz_deleted(sender, instance, **kwargs):
+        invalidate_answer_key(quiz_model, instance.pk)
+
+    def question_changed(sender, instance, **kwargs):
+        invalidate_answer_key(quiz_model, instance.quiz_id)
+
+    def option_saved(sender, instance, **kwargs):
+        quiz_id = (
+            question_model.objects
+            .filter(pk=instance.question_id)
+            .values_list('quiz_id', flat=True)
+            .first()
+        )
+        if quiz_id is not None:
+            invalidate_answer_key(quiz_model, quiz_id)
+
+    # Option deletes aren't tracked: options are only deleted along with their
+    # question or quiz, whose own signals already cover it
+    uid = quiz_model._meta.label_lower
+    post_delete.connect(quiz_deleted, sender=quiz_model, weak=False, dispatch_uid=f'{uid}-answer-key-quiz')
+    post_save.connect(question_changed, sender=question_model, weak=False, dispatch_uid=f'{uid}-answer-key-question-save')
+    post_delete.connect(question_changed, sender=question_model, weak=False, dispatch_uid=f'{uid}-answer-key-question-delete')
+    post_save.connect(option_saved, sender=option_model, weak=False, dispatch_uid=f'{uid}-answer-key-option')
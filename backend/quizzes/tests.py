@@ -1,3 +1,289 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from courses.models import Course, Lesson
+
+from .models import Option, Question, Quiz, QuizAttempt, QuizGenerationJob
+from .services import quiz_generation, quiz_jobs
+from .services.gemini_service import GeminiModelResolver, supports_response_schema
+from .services.quiz_pipeline import create_fallback_quiz, get_or_generate_quiz
+from .services.scoring import AnswerKey, score_submission
+
+
+def fake_generation(course, **kwargs):
+    return create_fallback_quiz(course, course.title), True
+
+
+class AnswerKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        course = Course.objects.create(title='Course', description='About', youtube_id='video1')
+        self.quiz = Quiz.objects.create(course=course)
+        self.questions = []
+        for number in range(4):
+            question = Question.objects.create(quiz=self.quiz, text=f'Question {number}')
+            right = Option.objects.create(question=question, text='Right', is_correct=True)
+            wrong = Option.objects.create(question=question, text='Wrong', is_correct=False)
+            self.questions.append((question, right, wrong))
+
+    def answers(self, correct):
+        return [
+            {'question_id': question.pk, 'option_id': (right if number < correct else wrong).pk}
+            for number, (question, right, wrong) in enumerate(self.questions)
+        ]
+
+    def test_load_uses_one_query(self):
+        with self.assertNumQueries(1):
+            answer_key = AnswerKey.load(self.quiz)
+        self.assertEqual(answer_key.total_questions, 4)
+
+    def test_score(self):
+        self.assertEqual(score_submission(self.quiz, self.answers(3)), (75.0, True, 3, 4))
+        self.assertEqual(score_submission(self.quiz, self.answers(2)), (50.0, False, 2, 4))
+
+    def test_last_answer_per_question_counts_and_foreign_answers_are_ignored(self):
+        question, right, wrong = self.questions[0]
+        answers = [
+            {'question_id': question.pk, 'option_id': right.pk},
+            {'question_id': question.pk, 'option_id': wrong.pk},
+            {'question_id': 999999, 'option_id': right.pk},
+            {'question_id': 'bad', 'option_id': None},
+        ]
+        self.assertEqual(AnswerKey.load(self.quiz).count_correct(answers), 0)
+
+    def test_question_without_correct_option_still_counts(self):
+        Question.objects.create(quiz=self.quiz, text='No answer')
+        self.assertEqual(AnswerKey.load(self.quiz).total_questions, 5)
+
+    def test_answer_key_is_cached(self):
+        AnswerKey.get(self.quiz)
+        with self.assertNumQueries(0):
+            self.assertEqual(AnswerKey.get(self.quiz).total_questions, 4)
+
+    def test_editing_an_option_invalidates_the_answer_key(self):
+        AnswerKey.get(self.quiz)
+        question, right, wrong = self.questions[0]
+        Option.objects.filter(pk=right.pk).update(is_correct=False)
+        wrong.is_correct = True
+        wrong.save()
+        self.assertEqual(AnswerKey.get(self.quiz).correct_options[question.pk], frozenset([wrong.pk]))
+
+    def test_adding_and_deleting_questions_invalidates_the_answer_key(self):
+        AnswerKey.get(self.quiz)
+        extra = Question.objects.create(quiz=self.quiz, text='Extra')
+        self.assertEqual(AnswerKey.get(self.quiz).total_questions, 5)
+        extra.delete()
+        self.assertEqual(AnswerKey.get(self.quiz).total_questions, 4)
+
+    def test_deleting_the_quiz_invalidates_the_answer_key(self):
+        quiz_id = self.quiz.pk
+        AnswerKey.get(self.quiz)
+        self.quiz.delete()
+        self.quiz.pk = quiz_id
+        self.assertEqual(AnswerKey.get(self.quiz).total_questions, 0)
+
+
+class QuizSerializerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_quiz(self, number):
+        course = Course.objects.create(title=f'Course {number}', description='About', youtube_id=f'video{number}')
+        for order in range(3):
+            Lesson.objects.create(course=course, title=f'Lesson {order}', youtube_id=f'lesson{number}-{order}', order=order)
+        return create_fallback_quiz(course, course.title)
+
+    def test_course_details_are_slim(self):
+        quiz = self.add_quiz(1)
+        response = self.client.get(f'/api/quizzes/{quiz.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['course_details'], {
+            'id': quiz.course_id,
+            'title': 'Course 1',
+            'youtube_id': 'video1',
+            'thumbnail_url': None,
+            'lesson_count': 3,
+        })
+
+    def test_list_queries_do_not_grow_with_quizzes(self):
+        self.add_quiz(1)
+        with self.assertNumQueries(5):
+            self.client.get('/api/quizzes/')
+        self.add_quiz(2)
+        self.add_quiz(3)
+        # Skip the site-wide page cache
+        cache.clear()
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/quizzes/')
+        self.assertEqual(response.json()['count'], 3)
+
+
+class QuizGenerationJobTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', password='pw')
+        self.course = Course.objects.create(title='Course', description='About', youtube_id='video1')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def generate_url(self):
+        return f'/api/courses/{self.course.pk}/generate_quiz/'
+
+    def test_one_active_job_per_course(self):
+        QuizGenerationJob.objects.create(course=self.course)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            QuizGenerationJob.objects.create(course=self.course, status=QuizGenerationJob.STATUS_RUNNING)
+        # Finished jobs don't count
+        QuizGenerationJob.objects.create(course=self.course, status=QuizGenerationJob.STATUS_FAILED)
+
+    def test_enqueue_joins_the_active_job(self):
+        job, created = quiz_jobs.enqueue_quiz_generation(self.course, self.user)
+        again, created_again = quiz_jobs.enqueue_quiz_generation(self.course, self.user)
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(job.pk, again.pk)
+
+    def test_enqueue_raises_when_it_keeps_losing_the_race(self):
+        with mock.patch.object(QuizGenerationJob.objects, 'create', side_effect=IntegrityError), \
+                mock.patch.object(quiz_jobs, 'get_active_job', return_value=None):
+            with self.assertRaises(quiz_jobs.QuizJobConflict):
+                quiz_jobs.enqueue_quiz_generation(self.course, self.user)
+
+    def test_request_returns_job_by_default(self):
+        response = self.client.post(self.generate_url(), {}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], QuizGenerationJob.STATUS_PENDING)
+        self.assertEqual(response['Location'], f"/api/quiz-jobs/{response.json()['job_id']}/")
+        self.assertEqual(response.json()['status_url'], response['Location'])
+
+    def test_second_requester_can_follow_the_shared_job(self):
+        first = self.client.post(self.generate_url(), {}, format='json')
+        other = User.objects.create_user('other', password='pw')
+        client = APIClient()
+        client.force_authenticate(other)
+        second = client.post(self.generate_url(), {}, format='json')
+        self.assertEqual(second.status_code, 202)
+        self.assertEqual(second.json()['job_id'], first.json()['job_id'])
+        self.assertEqual(client.get(second['Location']).status_code, 200)
+
+    def test_sync_request_returns_quiz_while_a_job_is_queued(self):
+        QuizGenerationJob.objects.create(course=self.course)
+        with mock.patch('quizzes.services.quiz_pipeline.generate_quiz_for_course', fake_generation):
+            response = self.client.post(self.generate_url(), {'async': False}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['quiz']['questions']), 5)
+
+    @override_settings(QUIZ_GENERATION_LOCK_TTL=300, QUIZ_GENERATION_WAIT_TIMEOUT=30)
+    def test_job_waits_longer_than_inline_requests(self):
+        job = QuizGenerationJob.objects.create(course=self.course)
+        quiz = create_fallback_quiz(self.course, 'Course')
+        with mock.patch.object(quiz_jobs, 'get_or_generate_quiz', return_value=(quiz, True, True)) as generate:
+            quiz_jobs.run_quiz_job(job.pk)
+        self.assertEqual(generate.call_args.kwargs['wait_timeout'], 300)
+        job.refresh_from_db()
+        self.assertEqual(job.status, QuizGenerationJob.STATUS_SUCCEEDED)
+
+    def test_long_running_job_is_not_expired(self):
+        job = QuizGenerationJob.objects.create(
+            course=self.course, status=QuizGenerationJob.STATUS_RUNNING, started_at=timezone.now()
+        )
+        QuizGenerationJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        quiz_jobs.expire_stale_job(self.course)
+        job.refresh_from_db()
+        self.assertEqual(job.status, QuizGenerationJob.STATUS_RUNNING)
+
+        QuizGenerationJob.objects.filter(pk=job.pk).update(
+            started_at=timezone.now() - timedelta(seconds=quiz_jobs.running_job_timeout() + 1)
+        )
+        quiz_jobs.expire_stale_job(self.course)
+        job.refresh_from_db()
+        self.assertEqual(job.status, QuizGenerationJob.STATUS_FAILED)
+
+    def test_job_list_is_scoped_to_the_requester(self):
+        job = QuizGenerationJob.objects.create(course=self.course, requested_by=self.user)
+        other = User.objects.create_user('other', password='pw')
+        client = APIClient()
+        client.force_authenticate(other)
+        self.assertEqual(client.get('/api/quiz-jobs/').json()['count'], 0)
+        self.assertEqual(self.client.get('/api/quiz-jobs/').json()['count'], 1)
+        self.assertEqual(client.get(f'/api/quiz-jobs/{job.pk}/').status_code, 200)
+
+
+@mock.patch('quizzes.services.quiz_pipeline.generate_quiz_for_course', fake_generation)
+class ReplaceQuizTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('learner', password='pw')
+        self.course = Course.objects.create(title='Course', description='About', youtube_id='video1')
+        self.old_quiz = create_fallback_quiz(self.course, 'Old')
+        QuizAttempt.objects.create(user=self.user, quiz=self.old_quiz, score=80, passed=True)
+
+    def test_force_new_replaces_the_quiz_and_its_attempts(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            f'/api/courses/{self.course.pk}/generate_quiz/', {'force_new': True, 'async': False}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertNotEqual(response.json()['id'], self.old_quiz.pk)
+        self.assertEqual(list(Quiz.objects.filter(course=self.course).values_list('pk', flat=True)), [response.json()['id']])
+        self.assertFalse(QuizAttempt.objects.exists())
+
+    def test_replacement_by_another_caller_is_reused(self):
+        first, _, generated = get_or_generate_quiz(self.course, replace_quiz_id=self.old_quiz.pk)
+        second, _, generated_again = get_or_generate_quiz(self.course, replace_quiz_id=self.old_quiz.pk)
+        self.assertTrue(generated)
+        self.assertFalse(generated_again)
+        self.assertEqual(first.pk, second.pk)
+
+    def test_failed_generation_keeps_the_old_quiz(self):
+        with mock.patch('quizzes.services.quiz_pipeline.generate_quiz_for_course', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                get_or_generate_quiz(self.course, replace_quiz_id=self.old_quiz.pk)
+        self.assertTrue(Quiz.objects.filter(pk=self.old_quiz.pk).exists())
+
+
+class StructuredGenerationTests(SimpleTestCase):
+    def test_legacy_models_are_not_sent_a_schema(self):
+        self.assertTrue(supports_response_schema('models/gemini-1.5-pro'))
+        self.assertTrue(supports_response_schema('models/gemini-1.5-flash'))
+        self.assertFalse(supports_response_schema('models/gemini-pro'))
+        self.assertFalse(supports_response_schema('models/gemini-1.0-pro'))
+        self.assertFalse(supports_response_schema('models/text-bison-001'))
+
+    def test_structured_request_skips_legacy_models(self):
+        legacy, current = mock.Mock(), mock.Mock()
+        resolver = GeminiModelResolver()
+        chain = [('models/gemini-pro', legacy), ('models/gemini-1.5-pro', current)]
+        with mock.patch.object(resolver, 'get_models', return_value=chain):
+            resolver.generate_content('prompt', structured=True)
+        legacy.generate_content.assert_not_called()
+        current.generate_content.assert_called_once()
+
+    def test_failed_listing_is_not_retried_on_every_call(self):
+        resolver = GeminiModelResolver()
+        with mock.patch.dict('os.environ', {'GEMINI_API_KEY': 'key'}), \
+                mock.patch('quizzes.services.gemini_service.genai') as genai:
+            genai.list_models.side_effect = RuntimeError('outage')
+            resolver.get_models()
+            chain = resolver.get_models()
+        genai.list_models.assert_called_once()
+        self.assertEqual([name for name, _ in chain], ['gemini-1.5-pro'])
+
+    def test_batched_mode_falls_back_to_per_level_without_schema_models(self):
+        response = mock.Mock(text="1. Question\nA) Right (correct)\nB) Wrong\nC) Wrong\nD) Wrong")
+        resolver = mock.Mock(get_structured_models=mock.Mock(return_value=[]))
+        resolver.generate_content.return_value = response
+        with mock.patch.object(quiz_generation, 'gemini_models', resolver):
+            questions = quiz_generation.generate_questions('Title', '', '', question_count=1, mode='batched')
+        self.assertEqual(len(questions), 1)
+        self.assertNotIn('structured', resolver.generate_content.call_args.kwargs)
@@ -8,6 +8,7 @@ router = DefaultRouter()
 router.register(r'quizzes', views.QuizViewSet, basename='quiz')
 router.register(r'questions', views.QuestionViewSet, basename='question')
 router.register(r'attempts', views.QuizAttemptViewSet, basename='attempt')
+router.register(r'quiz-jobs', views.QuizGenerationJobViewSet, basename='quiz-job')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,26 +1,28 @@
 from django.shortcuts import render, get_object_or_404
+from django.db.models import Count, Prefetch
 from rest_framework import viewsets, status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
 
 import os
-from youtube_transcript_api import YouTubeTranscriptApi
-import googleapiclient.discovery
 import google.generativeai as genai
 
-from .models import Quiz, Question, Option, QuizAttempt
-from .serializers import QuizSerializer, QuestionSerializer, OptionSerializer, QuizAttemptSerializer, AnswerSerializer
+from .models import Quiz, Question, Option, QuizAttempt, QuizGenerationJob
+from .serializers import (
+    QuizSerializer, QuestionSerializer, OptionSerializer, QuizAttemptSerializer, AnswerSerializer,
+    QuizAttemptListSerializer, QuizGenerationJobSerializer
+)
 from courses.models import Course
+from courses.services.transcript_service import fetch_transcripts
+from courses.services.youtube_metadata import youtube_metadata
+from courses.services.youtube_service import get_youtube_service
 
-def get_youtube_service():
+def courses_with_lesson_count():
     """
-    Create and return a YouTube API service object
+    Courses annotated with the lesson count quiz serializers show
     """
-    return googleapiclient.discovery.build(
-        "youtube", "v3", 
-        developerKey=os.environ.get('YOUTUBE_API_KEY')
-    )
+    return Course.objects.annotate(lesson_count=Count('lessons'))
 
 class QuizViewSet(viewsets.ModelViewSet):
     """
@@ -34,6 +36,13 @@ class QuizViewSet(viewsets.ModelViewSet):
         Optionally filter by course_id
         """
         queryset = Quiz.objects.all()
+        if self.action != 'destroy':
+            # Everything the nested QuizSerializer reads, in a fixed number of queries
+            queryset = (
+                queryset
+                .prefetch_related('questions__options', Prefetch('course', queryset=courses_with_lesson_count()))
+                .annotate(question_count=Count('questions'))
+            )
         course_id = self.request.query_params.get('course', None)
         
         # Check if course_id is valid before filtering
@@ -90,7 +99,7 @@ class QuestionViewSet(viewsets.ModelViewSet):
         """
         Optionally filter by quiz_id
         """
-        queryset = Question.objects.all()
+        queryset = Question.objects.prefetch_related('options')
         quiz_id = self.request.query_params.get('quiz', None)
         if quiz_id is not None:
             queryset = queryset.filter(quiz_id=quiz_id)
@@ -107,7 +116,43 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
         """
         Return only the current user's attempts
         """
-        return QuizAttempt.objects.filter(user=self.request.user)
+        queryset = QuizAttempt.objects.filter(user=self.request.user)
+        if self.action == 'list':
+            return queryset.select_related('user', 'quiz__course')
+        return queryset.select_related('user', 'quiz').prefetch_related(
+            'quiz__questions__options',
+            Prefetch('quiz__course', queryset=courses_with_lesson_count())
+        )
+    
+    def get_serializer_class(self):
+        """
+        Use the flat representation for attempt history
+        """
+        if self.action == 'list':
+            return QuizAttemptListSerializer
+        return super().get_serializer_class()
+
+class QuizGenerationJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Status and result of background quiz generation jobs
+    """
+    serializer_class = QuizGenerationJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """
+        Any job by ID, since requests for the same course share the first
+        requester's job and any user may request generation; only the
+        current user's jobs are listed
+        """
+        user = self.request.user
+        queryset = QuizGenerationJob.objects.select_related('quiz__course')
+        if self.action == 'list':
+            queryset = queryset.filter(requested_by=user)
+            course_id = self.request.query_params.get('course', None)
+            if course_id is not None:
+                queryset = queryset.filter(course_id=course_id)
+        return queryset
 
 class GenerateQuizView(APIView):
     """
@@ -130,6 +175,8 @@ class GenerateQuizView(APIView):
         
         # Get course details from YouTube
         youtube = get_youtube_service()
+        if not youtube:
+            return Response({'error': 'YouTube API service could not be initialized'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
         # Get video details or playlist details
         video_ids = []
@@ -152,18 +199,11 @@ class GenerateQuizView(APIView):
             # Single video - just use the video ID directly
             video_ids = [course.youtube_id]
         
-        # Get transcripts for all videos
-        all_transcripts = []
-        for video_id in video_ids:
-            try:
-                transcript = YouTubeTranscriptApi.get_transcript(video_id)
-                transcript_text = " ".join([entry['text'] for entry in transcript])
-                all_transcripts.append(transcript_text)
-            except Exception as e:
-                print(f"Error getting transcript for video {video_id}: {e}")
+        # Get transcripts for all videos concurrently, keeping playlist order
+        all_transcripts = fetch_transcripts(video_ids)
         
         # Combine all transcripts
-        transcript_text = " ".join(all_transcripts)
+        transcript_text = " ".join(t for t in all_transcripts if t)
         
         # Truncate if too long (Gemini also has token limits)
         max_length = 10000  # Gemini can handle more tokens than GPT-3
@@ -171,36 +211,21 @@ class GenerateQuizView(APIView):
             transcript_text = transcript_text[:max_length]
         
         # Get video/playlist title and description
-        if course.is_playlist:
-            try:
-                playlist_request = youtube.playlists().list(
-                    part="snippet",
-                    id=course.youtube_id
-                )
-                playlist_response = playlist_request.execute()
-                playlist_data = playlist_response['items'][0]['snippet']
-                title = playlist_data['title']
-                description = playlist_data['description']
-            except Exception as e:
-                print(f"Error fetching playlist details: {e}")
-                # If we can't get the playlist details, use the course title and description
-                title = course.title
-                description = course.description
+        try:
+            if course.is_playlist:
+                resource = youtube_metadata.playlist(course.youtube_id)
+            else:
+                resource = youtube_metadata.video(course.youtube_id)
+        except Exception as e:
+            print(f"Error fetching {'playlist' if course.is_playlist else 'video'} details: {e}")
+            resource = None
+        if resource:
+            title = resource['snippet']['title']
+            description = resource['snippet']['description']
         else:
-            try:
-                video_request = youtube.videos().list(
-                    part="snippet",
-                    id=course.youtube_id
-                )
-                video_response = video_request.execute()
-                video_data = video_response['items'][0]['snippet']
-                title = video_data['title']
-                description = video_data['description']
-            except Exception as e:
-                print(f"Error fetching video details: {e}")
-                # If we can't get the video details, use the course title and description
-                title = course.title
-                description = course.description
+            # If we can't get the details, use the course title and description
+            title = course.title
+            description = course.description
         
         # Get Gemini API key from environment variable
         gemini_api_key = os.environ.get('GEMINI_API_KEY', '')
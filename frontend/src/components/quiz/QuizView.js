@@ -83,7 +83,7 @@ const QuizView = () => {
                 try {
                   const quizResponse = await CourseAPI.generateQuiz(courseId);
                   console.log('Generated new quiz:', quizResponse.data);
-                  setQuiz(quizResponse.data);
+                  setQuiz(quizResponse.data.quiz || quizResponse.data);
                   setLoading(false);
                   return;
                 } catch (genError) {
@@ -385,12 +385,48 @@ export const CourseAPI = {
   updateProgress: (courseId, data) => 
     API.post(`/user-courses/${courseId}/update_progress/`, data),
 
+  // Generation is queued (202); resolves with the generated quiz once the job finishes
   generateQuiz: (courseId, options = {}) =>
     API.post(`/courses/${courseId}/generate_quiz/`, options, {
       headers: {
         'Content-Type': 'application/json'
       }
-    }),
+    }).then(waitForQuizJob),
+};
+
+// Poll a queued quiz generation job until it succeeds or fails
+const QUIZ_JOB_POLL_INTERVAL = 2000;
+const QUIZ_JOB_TIMEOUT = 5 * 60 * 1000;
+
+const waitForQuizJob = async (response) => {
+  // An existing quiz (200) or an inline generation (201) needs no polling
+  if (response.status !== 202) {
+    return response;
+  }
+
+  // Relative to the API base URL, so polling keeps the page's scheme
+  const statusUrl = `/quiz-jobs/${response.data.job_id}/`;
+  const deadline = Date.now() + QUIZ_JOB_TIMEOUT;
+
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, QUIZ_JOB_POLL_INTERVAL));
+    const { data: job } = await API.get(statusUrl);
+
+    if (job.status === 'succeeded' && job.quiz) {
+      const message = job.used_fallback
+        ? 'Quiz generated successfully (using sample questions)'
+        : 'Quiz generated successfully';
+      // Same shape as an inline generation response
+      return { ...response, status: 201, data: { message, id: job.quiz.id, quiz: job.quiz, job_id: job.id } };
+    }
+    if (job.status === 'failed' || job.status === 'succeeded') {
+      const error = new Error(job.error || 'Quiz generation failed');
+      error.response = { status: 500, data: { error: job.error || 'Quiz generation failed' } };
+      throw error;
+    }
+  }
+
+  throw new Error('Timed out waiting for quiz generation');
 };
 
 // Quiz endpoints